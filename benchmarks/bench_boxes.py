@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-box BoundingBox objects vs array-backed BoxBatch.
+
+Converts N random Pascal VOC boxes to YOLO, validates them and formats the
+label text, once with one BoundingBox per annotation (the parser path) and
+once with a single BoxBatch. Also reports the memory held by the result
+(boxes + label text).
+
+Usage:
+    python benchmarks/bench_boxes.py
+    python benchmarks/bench_boxes.py --boxes 200000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.annotation_parsers import BoundingBox, BoxBatch  # noqa: E402
+
+
+def make_boxes(count, rng):
+    xmin = rng.uniform(-10, 600, count)
+    ymin = rng.uniform(0, 440, count)
+    xyxy = np.stack([xmin, ymin, xmin + rng.uniform(1, 120, count), ymin + rng.uniform(1, 90, count)], 1)
+    return rng.integers(0, 10, count), xyxy
+
+
+def run_objects(class_ids, xyxy):
+    annotations = []
+    for class_id, (xmin, ymin, xmax, ymax) in zip(class_ids.tolist(), xyxy.tolist()):
+        bbox = BoundingBox.from_voc(xmin, ymin, xmax, ymax, 640, 480)
+        if bbox.is_valid():
+            annotations.append((class_id, bbox))
+    text = ''.join(bbox.to_yolo_line(class_id) + '\n' for class_id, bbox in annotations)
+    return annotations, text
+
+
+def run_batch(class_ids, xyxy, dtype):
+    batch = BoxBatch.from_voc(class_ids, xyxy, 640, 480, dtype=dtype)
+    batch = batch[batch.is_valid()]
+    return batch, batch.to_yolo_text()
+
+
+def measure(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result, _ = fn(*args)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return elapsed, held
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BoundingBox vs BoxBatch")
+    parser.add_argument('--boxes', type=int, default=1_000_000, help='Number of boxes (default: 1000000)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    class_ids, xyxy = make_boxes(args.boxes, rng)
+
+    _, expected = run_objects(class_ids, xyxy)
+    _, exact = run_batch(class_ids, xyxy, np.float64)
+    _, compact = run_batch(class_ids, xyxy, np.float32)
+    lines_differ = sum(a != b for a, b in zip(expected.splitlines(), compact.splitlines()))
+
+    print(f"VOC -> YOLO convert + validate + format, {args.boxes:,} boxes")
+    print(f"{'path':<20}{'seconds':>10}{'held MB':>10}{'speedup':>10}")
+    base = None
+    rows = [('BoundingBox objects', run_objects, ()),
+            ('BoxBatch float64', run_batch, (np.float64,)),
+            ('BoxBatch float32', run_batch, (np.float32,))]
+    for name, fn, extra in rows:
+        elapsed, held = measure(fn, class_ids, xyxy, *extra)
+        base = base or elapsed
+        print(f"{name:<20}{elapsed:>10.2f}{held / 1e6:>10.1f}{base / elapsed:>9.1f}x")
+    print(f"float64 batch text identical to objects: {exact == expected}")
+    print(f"float32 batch lines differing in the 6th decimal: {lines_differ:,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-frame overlay render time, legacy vs OverlayRenderer.
+
+The legacy path is the original detect.draw()/detect.info() pair (full-frame
+copy + full-frame alpha blend, text measured for every label, one GPU->CPU
+transfer per box). Synthetic frames and boxes are used, no model or camera
+is needed.
+
+Usage:
+    python benchmarks/bench_overlay.py
+    python benchmarks/bench_overlay.py --boxes 20 --iters 500
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.overlay import OverlayRenderer  # noqa: E402
+
+COLORS = {
+    'battery': (0, 0, 255), 'biological': (0, 128, 0), 'cardboard': (0, 165, 255),
+    'clothes': (255, 0, 255), 'glass': (0, 255, 0), 'metal': (255, 0, 0),
+    'paper': (255, 255, 0), 'plastic': (0, 255, 255), 'shoes': (128, 0, 128),
+    'trash': (128, 128, 128),
+}
+NAMES = dict(enumerate(COLORS))
+SIZES = {'640x480': (480, 640), '1080p': (1080, 1920)}
+
+
+class _Tensor:
+    """Stand-in for a torch tensor: .cpu().numpy() like ultralytics boxes."""
+
+    def __init__(self, data):
+        self.data = np.asarray(data)
+
+    def __getitem__(self, i):
+        return _Tensor(self.data[i])
+
+    def __float__(self):
+        return float(self.data)
+
+    def __int__(self):
+        return int(self.data)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.data
+
+
+class _Box:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = _Tensor([xyxy])
+        self.conf = _Tensor([conf])
+        self.cls = _Tensor([cls])
+
+
+class _Model:
+    names = NAMES
+
+
+def legacy_draw(frame, box, idx, model, show_conf):
+    x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
+    conf, cls = float(box.conf[0]), int(box.cls[0])
+    name = model.names[cls]
+    color = COLORS.get(name, (255, 255, 255))
+
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+    cv2.circle(frame, (x1 + 15, y1 + 15), 15, color, -1)
+    cv2.putText(frame, f"#{idx}", (x1 + 7, y1 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
+
+    label = f"{name.upper()}: {conf:.2f}" if show_conf else name.upper()
+    (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+    cv2.rectangle(frame, (x1, y1 - h - 15), (x1 + w + 15, y1), color, -1)
+    cv2.putText(frame, label, (x1 + 7, y1 - 7), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+    return name
+
+
+def legacy_info(frame, fps, device, dets):
+    h, w = frame.shape[:2]
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (0, 0), (w, 100), (0, 0, 0), -1)
+    cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
+
+    cv2.putText(frame, "WASTE CLASSIFICATION", (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    cv2.putText(frame, f"FPS:{fps:.1f}|{device.upper()}|Objects:{len(dets)}", (10, 50),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    cv2.putText(frame, "Q:Quit|S:Save|C:Confidence|P:Profile", (10, 75),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
+
+    if dets:
+        y = 30
+        for i, n in enumerate(dets, 1):
+            cv2.putText(frame, f"#{i}:{n.upper()}", (w - 180, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                        COLORS.get(n, (255, 255, 255)), 2)
+            y += 25
+
+
+def make_boxes(shape, count, rng):
+    h, w = shape
+    x1 = rng.uniform(0, w * 0.7, count)
+    y1 = rng.uniform(40, h * 0.7, count)
+    xyxy = np.stack([x1, y1, x1 + rng.uniform(40, w * 0.3, count), y1 + rng.uniform(40, h * 0.3, count)], 1)
+    return xyxy.astype(np.float32), rng.uniform(0.25, 1.0, count).astype(np.float32), \
+        rng.integers(0, len(NAMES), count).astype(np.float32)
+
+
+def bench(shape, count, iters, rng):
+    base = rng.integers(0, 255, (*shape, 3), dtype=np.uint8)
+    frame = base.copy()
+    xyxy, conf, cls = make_boxes(shape, count, rng)
+    boxes = [_Box(b, c, k) for b, c, k in zip(xyxy, conf, cls)]
+    model = _Model()
+    renderer = OverlayRenderer(COLORS)
+
+    def run_legacy():
+        dets = [legacy_draw(frame, box, i, model, True) for i, box in enumerate(boxes, 1)]
+        legacy_info(frame, 30.0, 'cpu', dets)
+
+    def run_renderer():
+        dets = renderer.draw_boxes(frame, xyxy, conf, cls, NAMES, True)
+        renderer.draw_header(frame, 30.0, 'cpu', dets)
+
+    # Same output check
+    run_legacy()
+    expected = frame.copy()
+    np.copyto(frame, base)
+    run_renderer()
+    identical = bool(np.array_equal(expected, frame))
+
+    results = {}
+    for name, fn in (('legacy', run_legacy), ('renderer', run_renderer)):
+        total = 0.0
+        for _ in range(iters):
+            np.copyto(frame, base)
+            start = time.perf_counter()
+            fn()
+            total += time.perf_counter() - start
+        results[name] = total / iters * 1000.0
+    return results, identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark overlay rendering")
+    parser.add_argument('--boxes', type=int, default=8, help='Boxes per frame (default: 8)')
+    parser.add_argument('--iters', type=int, default=300, help='Frames per measurement (default: 300)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"Overlay render time per frame ({args.boxes} boxes, {args.iters} frames)")
+    print(f"{'size':<10}{'legacy ms':>12}{'renderer ms':>14}{'speedup':>10}{'identical':>11}")
+    for label, shape in SIZES.items():
+        res, identical = bench(shape, args.boxes, args.iters, rng)
+        print(f"{label:<10}{res['legacy']:>12.3f}{res['renderer']:>14.3f}"
+              f"{res['legacy'] / res['renderer']:>9.1f}x{str(identical):>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: loose image/label files vs packed shards.
+
+Reads every image and label of a split in random order (like one training
+epoch), once from the loose files and once from utils.packed_shards, and
+prints images/sec for raw reads and for read + decode. With --cold the page
+cache of all files is dropped (posix_fadvise) before each pass, which is
+closer to network storage where every open and read is a round trip.
+
+Usage:
+    python benchmarks/bench_packed.py
+    python benchmarks/bench_packed.py --images-dir datasets/processed/train/images --cold
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.annotation_store import read_yolo_label  # noqa: E402
+from utils.output_layout import label_path, list_images  # noqa: E402
+from utils.packed_shards import PackedShards, index_path, write_shards  # noqa: E402
+
+
+def make_split(root, count, rng):
+    """Generated JPEGs (smooth content + noise, ~640x480) with one label each."""
+    images_dir, labels_dir = root / 'images', root / 'labels'
+    for i in range(count):
+        shard = f'{i % 256:02x}'
+        (images_dir / shard).mkdir(parents=True, exist_ok=True)
+        (labels_dir / shard).mkdir(parents=True, exist_ok=True)
+        base = np.linspace(0, 255, 640, dtype=np.float32)[None, :, None] * rng.uniform(0.3, 1, 3)
+        img = np.clip(base + rng.normal(0, 12, (480, 640, 3)), 0, 255).astype(np.uint8)
+        cv2.imwrite(str(images_dir / shard / f'img_{i:06d}.jpg'), img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        (labels_dir / shard / f'img_{i:06d}.txt').write_text(f'{i % 10} 0.5 0.5 0.3 0.4\n')
+    return images_dir, labels_dir
+
+
+def drop_cache(paths):
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def run_loose(images, labels, order, decode):
+    for i in order:
+        if decode:
+            cv2.imread(str(images[i]), cv2.IMREAD_COLOR)
+        else:
+            with open(images[i], 'rb') as f:
+                f.read()
+        if labels[i].exists():
+            read_yolo_label(labels[i].read_text())
+
+
+def run_packed(pack, order, decode):
+    for i in order:
+        if decode:
+            pack.image(i)
+        else:
+            bytes(pack.raw(i)[0])
+        pack.labels(i)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loose files vs packed shards")
+    parser.add_argument('--images-dir', type=Path, default=None,
+                        help='Existing images folder (labels in the sibling labels folder)')
+    parser.add_argument('--images', type=int, default=2000, help='Generated images (default: 2000)')
+    parser.add_argument('--shard-size-mb', type=int, default=256, help='Shard size (default: 256)')
+    parser.add_argument('--cold', action='store_true', help='Drop the page cache of all files before each pass')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.images_dir:
+            images_dir = args.images_dir
+            labels_dir = images_dir.parent / 'labels'
+        else:
+            print(f"Generating {args.images} images...")
+            images_dir, labels_dir = make_split(tmp / 'split', args.images, rng)
+        images = list_images(images_dir)
+        labels = [label_path(img, images_dir, labels_dir) for img in images]
+
+        start = time.perf_counter()
+        stats = write_shards(images, images_dir, labels_dir, tmp / 'packed', 'bench', args.shard_size_mb << 20)
+        pack_s = time.perf_counter() - start
+        pack = PackedShards(index_path(tmp / 'packed', 'bench'))
+        shard_files = [tmp / 'packed' / name for name in pack.shards]
+        loose_files = images + [lbl for lbl in labels if lbl.exists()]
+        print(f"{len(images)} images, {stats['bytes'] / 1e6:.1f} MB; "
+              f"{len(loose_files)} loose files vs {len(shard_files)} shards (packed in {pack_s:.2f}s)")
+
+        order = rng.permutation(len(images)).tolist()
+        print(f"{'layout':<8}{'mode':<14}{'images/s':>12}")
+        for decode in (False, True):
+            mode = 'read+decode' if decode else 'read'
+            for name, files, run in (('loose', loose_files, lambda: run_loose(images, labels, order, decode)),
+                                     ('packed', shard_files, lambda: run_packed(pack, order, decode))):
+                if args.cold:
+                    pack.close()
+                    drop_cache(files)
+                start = time.perf_counter()
+                run()
+                seconds = time.perf_counter() - start
+                print(f"{name:<8}{mode:<14}{len(order) / seconds:>12.0f}")
+        pack.close()
+
+
+if __name__ == '__main__':
+    main()
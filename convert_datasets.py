@@ -6,28 +6,52 @@ Auto-detect and convert multiple dataset formats to YOLO format.
 
 Simple usage:
     python convert_datasets.py
+    python convert_datasets.py --workers 16   # parallel verify/copy/label writing
+    python convert_datasets.py --link-mode hardlink   # no second copy of every JPEG
+
+Re-running only converts new or changed images (see conversion_manifest.json
+next to conversion_stats.json); use --full to reconvert everything. All labels
+are also kept in a columnar store (annotations/, see utils.annotation_store).
+
+Outputs are named per dataset and sharded into subfolders
+(images/3f/TACO_3fa9c2d1_img_0001.jpg, see utils.output_layout) so equal file
+names from different datasets do not collide; image_map.csv records the
+source of every output. --layout flat keeps the original file names.
 """
 
 import argparse
+import hashlib
 import json
-import shutil
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 from tqdm import tqdm
 
 from utils.annotation_parsers import (
-    parse_coco_json,
-    parse_voc_xml,
+    BoxBatch,
+    StreamingCocoParser,
+    StreamingCsvParser,
+    parse_voc_batch,
     parse_yolo_txt,
-    parse_csv_annotations,
     create_class_folder_annotation,
     BoundingBox,
 )
-from utils.dataset_stats import detect_dataset_format
-from utils.image_utils import verify_image
-from utils.label_mapper import TARGET_CLASSES, map_label, MANUAL_CLASS_MAPPINGS
+from utils.annotation_store import STORE_DIRNAME, AnnotationStore, read_yolo_label
+from utils.dataset_inventory import DatasetInventory
+from utils.dataset_stats import detect_dataset_format, find_coco_json
+from utils.file_utils import LINK_MODES, LinkStats, materialize
+from utils.image_index import ImageIndex
+from utils.file_cache import DEFAULT_CACHE_PATH, FileCache
+from utils.hashing import cached_hash
+from utils.image_utils import VERIFY_LEVELS, verify_image
+from utils.label_mapper import LABEL_DECISIONS_NAME, MANUAL_CLASS_MAPPINGS, TARGET_CLASSES, LabelMapper
 from utils.logger import setup_logger
+from utils.manifest import MANIFEST_NAME, ConversionManifest, mapping_digest
+from utils.output_layout import IMAGE_MAP_NAME, LAYOUTS, label_name, output_name, save_image_map
 
 logger = setup_logger(__name__)
 
@@ -36,6 +60,12 @@ DEFAULT_SRC = './datasets/raw'
 DEFAULT_DST = './datasets/processed/all'
 # Use TARGET_CLASSES from label_mapper (10 classes from garbage-classification-v2)
 DEFAULT_CLASSES = TARGET_CLASSES
+# Bump when the conversion logic changes so existing manifests are invalidated
+CONVERTER_VERSION = '1'
+# XML files parsed per worker task
+VOC_BATCH_SIZE = 256
+# Image files taken from each class folder, in this order
+CLASS_FOLDER_IMAGE_SUFFIXES = ('.jpg', '.png', '.jpeg')
 
 
 def save_mapping(mapping_file: Path, stats: Dict):
@@ -48,34 +78,247 @@ def save_mapping(mapping_file: Path, stats: Dict):
     logger.info(f"Saved mapping: {mapping_file}")
 
 
-def copy_image_and_label(img_path: Path, annotations, out_dir: Path) -> int:
-    """Copy image and create YOLO label. Returns number of annotations."""
+def format_yolo_label(annotations) -> str:
+    """
+    Render annotations as the contents of a YOLO label file.
+
+    Annotations are a BoxBatch, (class_id, BoundingBox) tuples or already
+    formatted YOLO lines (str), as produced by StreamingCsvParser(as_lines=True).
+    """
+    if isinstance(annotations, BoxBatch):
+        return annotations.to_yolo_text()
+    return ''.join((ann if isinstance(ann, str) else ann[1].to_yolo_line(ann[0])) + '\n'
+                   for ann in annotations)
+
+
+def copy_image_and_label(img_path: Path, annotations, out_dir: Path,
+                         link_mode: str = 'copy', verify_level: str = 'header',
+                         cache: Optional[FileCache] = None,
+                         out_name: Optional[str] = None) -> Tuple[bool, int, str, int]:
+    """
+    Copy (or link) image and create YOLO label.
+
+    ``out_name`` is the image path relative to out_dir/images (see
+    utils.output_layout); the source file name by default.
+
+    Returns (copied, number of annotations, link mode used, bytes not written).
+    """
     # Verify image
-    is_valid, error = verify_image(img_path)
+    is_valid, error = verify_image(img_path, verify_level, cache)
     if not is_valid:
         logger.warning(f"Invalid: {img_path.name} - {error}")
-        return 0
+        return False, 0, '', 0
     
     # Copy image
-    dest_img = out_dir / 'images' / img_path.name
+    out_name = out_name or img_path.name
+    dest_img = out_dir / 'images' / out_name
     dest_img.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(img_path, dest_img)
+    used, saved = materialize(img_path, dest_img, link_mode)
+    if cache is not None:
+        # Same content as the source: split_and_prep will not verify it again
+        cache.copy('verify', img_path, dest_img)
     
     # Create label
     if annotations:
-        dest_lbl = out_dir / 'labels' / f'{img_path.stem}.txt'
+        dest_lbl = out_dir / 'labels' / label_name(out_name)
         dest_lbl.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(dest_lbl, 'w') as f:
-            for class_id, bbox in annotations:
-                f.write(bbox.to_yolo_line(class_id) + '\n')
+        dest_lbl.write_text(format_yolo_label(annotations))
         
-        return len(annotations)
-    return 0
+        return True, len(annotations), used, saved
+    return True, 0, used, saved
+
+
+def _convert_job(img_path: Path, annotations, out_dir: Path, link_mode: str,
+                 fingerprint: bool, verify_level: str = 'header',
+                 cache: Optional[FileCache] = None,
+                 out_name: Optional[str] = None) -> Tuple[bool, int, str, int, Optional[str]]:
+    """copy_image_and_label plus the source content hash for the manifest."""
+    out_name = out_name or img_path.name
+    copied, count, used, saved = copy_image_and_label(img_path, annotations, out_dir, link_mode,
+                                                      verify_level, cache, out_name)
+    sha256 = None
+    if copied and fingerprint:
+        sha256 = cached_hash(img_path, 'sha256', cache)
+        if cache is not None:
+            # split_and_prep deduplicates with the same digest by default
+            cache.copy('hash:sha256', img_path, out_dir / 'images' / out_name)
+    return copied, count, used, saved, sha256
+
+
+class ConversionRunner:
+    """
+    Run copy_image_and_label jobs, optionally on a thread/process pool.
+
+    Jobs are submitted through a bounded window and collected in submission
+    order, so memory stays flat and the output is the same for any number of
+    workers. Output names (see utils.output_layout) are claimed in the main
+    process before dispatch: the first image claiming a name wins and later
+    ones are counted as collisions instead of racing to overwrite each
+    other. With the sharded layout names include the dataset and source
+    path, so only the flat layout can collide.
+
+    With a manifest, images that are unchanged since the last run (same
+    source, same label) are counted but not dispatched, and every converted
+    image is recorded under the current ``dataset`` name.
+    """
+
+    def __init__(self, out_dir: Path, workers: int = 1, use_processes: bool = False,
+                 link_mode: str = 'copy', manifest: Optional[ConversionManifest] = None,
+                 verify_level: str = 'header', cache: Optional[FileCache] = None,
+                 layout: str = 'sharded'):
+        self.out_dir = out_dir
+        self.link_mode = link_mode
+        self.verify_level = verify_level
+        self.cache = cache
+        self.manifest = manifest
+        self.layout = layout
+        self.dataset = ''
+        self.dataset_root: Optional[Path] = None
+        self.link_stats = LinkStats(link_mode)
+        self.workers = max(1, workers)
+        self.executor = None
+        if self.workers > 1:
+            pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            self.executor = pool_cls(max_workers=self.workers)
+        self.claimed: Dict[str, Path] = {}
+        # (image name, dataset, class_ids, xywh) of converted images for the annotation store
+        self.store_rows: List[Tuple[str, str, np.ndarray, np.ndarray]] = []
+        self.collisions = 0
+        self.invalid = 0
+
+    def _claim(self, img_path: Path) -> Optional[str]:
+        """Output name of ``img_path``, or None if another image already owns it."""
+        name = output_name(img_path, self.dataset, self.dataset_root, self.layout)
+        owner = self.claimed.setdefault(name, img_path)
+        if owner != img_path:
+            self.collisions += 1
+            logger.debug(f"Name collision: {img_path} (kept {owner})")
+            return None
+        return name
+
+    def run(self, jobs: Iterable[Tuple[Path, list]], desc: str, total: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Convert (image_path, annotations) jobs.
 
+        Returns:
+            Tuple of (images converted, annotations written)
+        """
+        num_img, num_ann = 0, 0
+        manifest = self.manifest
+        fingerprint = manifest is not None
+
+        def collect(img_path, name, label, result):
+            nonlocal num_img, num_ann
+            copied, count, used, saved, sha256 = result
+            if copied:
+                num_img += 1
+                num_ann += count
+                self.link_stats.add(used, saved)
+                self.store_rows.append((name, self.dataset, *read_yolo_label(label)))
+                if manifest is not None:
+                    digest = hashlib.sha1(label.encode()).hexdigest()
+                    outputs = [f'images/{name}']
+                    if count:
+                        outputs.append(f'labels/{label_name(name)}')
+                    manifest.record(img_path, self.dataset, digest, outputs, sha256, self.out_dir)
+            else:
+                self.invalid += 1
+
+        with tqdm(total=total, desc=desc) as bar:
+            pending = deque()
+            for img_path, annotations in jobs:
+                name = self._claim(img_path)
+                if name is None:
+                    bar.update()
+                    continue
+                # Format once: used for the manifest digest, the store and the label file
+                label = format_yolo_label(annotations)
+                lines = label.splitlines()
+                if manifest is not None:
+                    digest = hashlib.sha1(label.encode()).hexdigest()
+                    if manifest.is_current(img_path, digest, self.out_dir):
+                        num_img += 1
+                        num_ann += len(lines)
+                        bar.update()
+                        continue
+                if self.executor is None:
+                    collect(img_path, name, label,
+                            _convert_job(img_path, lines, self.out_dir, self.link_mode, fingerprint,
+                                         self.verify_level, self.cache, name))
+                    bar.update()
+                    continue
+                future = self.executor.submit(_convert_job, img_path, lines, self.out_dir, self.link_mode,
+                                              fingerprint, self.verify_level, self.cache, name)
+                pending.append((img_path, name, label, future))
+                if len(pending) >= self.workers * 4:
+                    img, out_name, lbl, fut = pending.popleft()
+                    collect(img, out_name, lbl, fut.result())
+                    bar.update()
+            while pending:
+                img, out_name, lbl, fut = pending.popleft()
+                collect(img, out_name, lbl, fut.result())
+                bar.update()
+
+        return num_img, num_ann
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def update_annotation_store(out_dir: Path, store_dir: Path, manifest: ConversionManifest,
+                            rows: List[Tuple[str, str, np.ndarray, np.ndarray]],
+                            classes: List[str]) -> AnnotationStore:
+    """
+    Merge this run's converted images into the columnar annotation store.
+
+    Images that were skipped as unchanged keep their rows from the previous
+    store; images whose output disappeared are dropped. Any live image the
+    old store does not know (e.g. the store was deleted) is read back from
+    its label file.
+    """
+    live = {}
+    for entry in manifest.entries.values():
+        for rel in entry['outputs']:
+            if rel.startswith('images/'):
+                live[rel[len('images/'):]] = entry['dataset']
+
+    store = None
+    if (store_dir / 'meta.json').exists():
+        try:
+            store = AnnotationStore.load(store_dir, mmap=False)
+        except (ValueError, OSError) as e:
+            logger.warning(f"Rebuilding unreadable annotation store {store_dir}: {e}")
+    if store is None:
+        store = AnnotationStore.from_rows([], classes)
+
+    known = set(store.names.tolist()) | {row[0] for row in rows}
+    for name in sorted(set(live) - known):
+        label_path = out_dir / 'labels' / label_name(name)
+        label = label_path.read_text() if label_path.exists() else ''
+        rows.append((name, live[name], *read_yolo_label(label)))
+
+    store = store.merged(rows, keep=live)
+    store.classes = list(classes)
+    store.save(store_dir)
+    return store
+
+
+def image_map_rows(manifest: ConversionManifest) -> Iterable[Tuple[str, str, str, str]]:
+    """(dataset, source, image output, label output) of every converted source."""
+    for source, entry in manifest.entries.items():
+        image = next((rel for rel in entry['outputs'] if rel.startswith('images/')), None)
+        if image is not None:
+            label = next((rel for rel in entry['outputs'] if rel.startswith('labels/')), '')
+            yield entry['dataset'], source, image, label
+
+
+def find_image(filename: str, search_dir: Path, index: Optional[ImageIndex] = None) -> Path:
+    """Find image file in directory or subdirectories (via index when given)."""
+    if index is not None:
+        return index.find(filename)
 
-def find_image(filename: str, search_dir: Path) -> Path:
-    """Find image file in directory or subdirectories."""
     # Try direct path
     img_path = search_dir / filename
     if img_path.exists():
@@ -91,121 +334,192 @@ def find_image(filename: str, search_dir: Path) -> Path:
     return found[0] if found else None
 
 
-def convert_coco(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool) -> Tuple[int, int]:
+def _scan(dataset_path: Path, inventory: Optional[DatasetInventory]) -> DatasetInventory:
+    return inventory if inventory is not None else DatasetInventory.scan(dataset_path)
+
+
+def build_image_index(dataset_path: Path, inventory: Optional[DatasetInventory] = None) -> ImageIndex:
+    """
+    Index a dataset once for constant-time image lookups.
+
+    Built from ``inventory`` when given (persisted with --index-cache),
+    otherwise from a fresh directory walk.
+    """
+    if inventory is not None:
+        index = ImageIndex.from_inventory(inventory)
+    else:
+        index = ImageIndex.build(dataset_path)
+    duplicates = index.duplicates()
+    logger.info(f"Indexed {len(index)} files")
+    if duplicates:
+        logger.warning(f"{len(duplicates)} ambiguous basenames (same name in several folders), "
+                       f"e.g. {next(iter(duplicates))}")
+    return index
+
+
+def convert_coco(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool,
+                 runner: Optional[ConversionRunner] = None,
+                 inventory: Optional[DatasetInventory] = None) -> Tuple[int, int]:
     """Convert COCO format to YOLO."""
     logger.info(f"Converting COCO: {dataset_path.name}")
     
-    # Find JSON
-    json_files = list(dataset_path.rglob('annotations.json')) + \
-                 list(dataset_path.rglob('instances_*.json'))
+    # Find JSON (every split file, e.g. instances_train.json and instances_val.json)
+    inventory = _scan(dataset_path, inventory)
+    json_files = find_coco_json(dataset_path, inventory)
     
     if not json_files:
         logger.warning("No COCO JSON found")
         return 0, 0
     
-    # Parse annotations
-    image_annotations = parse_coco_json(json_files[0], class_map)
+    # Parse annotations (streamed, bounded memory)
+    parsers = [StreamingCocoParser(json_file, class_map) for json_file in json_files]
     
     if dry_run:
-        num_ann = sum(len(a) for a in image_annotations.values())
-        logger.info(f"[DRY RUN] {len(image_annotations)} images, {num_ann} annotations")
-        return len(image_annotations), num_ann
+        num_img, num_ann = 0, 0
+        for parser in parsers:
+            for _, annotations in parser:
+                num_img += 1
+                num_ann += len(annotations)
+        logger.info(f"[DRY RUN] {num_img} images, {num_ann} annotations")
+        return num_img, num_ann
     
     # Convert
+    runner = runner or ConversionRunner(out_dir)
+    index = build_image_index(dataset_path, inventory=inventory)
     num_img, num_ann = 0, 0
-    for filename, annotations in tqdm(image_annotations.items(), desc="COCO"):
-        img_path = find_image(filename, dataset_path)
-        if img_path:
-            num_ann += copy_image_and_label(img_path, annotations, out_dir)
-            num_img += 1
+    for parser in parsers:
+        parser.spill()
+        jobs = ((find_image(filename, dataset_path, index), annotations)
+                for filename, annotations in parser)
+        n_img, n_ann = runner.run(((p, a) for p, a in jobs if p), f"COCO {parser.json_path.name}",
+                                  parser.num_images)
+        num_img += n_img
+        num_ann += n_ann
+    if index.ambiguous_lookups:
+        logger.warning(f"{index.ambiguous_lookups} images resolved by ambiguous basename")
     
     logger.info(f"Converted {num_img} images, {num_ann} annotations")
     return num_img, num_ann
 
 
-def convert_voc(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool) -> Tuple[int, int]:
+def convert_voc(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool,
+                runner: Optional[ConversionRunner] = None,
+                inventory: Optional[DatasetInventory] = None) -> Tuple[int, int]:
     """Convert Pascal VOC format to YOLO."""
     logger.info(f"Converting VOC: {dataset_path.name}")
     
-    xml_files = list((dataset_path / 'Annotations').glob('*.xml'))
+    inventory = _scan(dataset_path, inventory)
+    xml_files = inventory.files_in('Annotations', ('.xml',))
     
     if dry_run:
         logger.info(f"[DRY RUN] {len(xml_files)} XML files")
         return len(xml_files), 0
     
     # Find images directory
-    img_dir = dataset_path / 'JPEGImages'
-    if not img_dir.exists():
-        img_dir = dataset_path / 'images'
-    
-    num_img, num_ann = 0, 0
-    for xml_path in tqdm(xml_files, desc="VOC"):
-        try:
-            filename, _, _, annotations = parse_voc_xml(xml_path, class_map)
-            img_path = img_dir / filename
-            
-            if img_path.exists():
-                num_ann += copy_image_and_label(img_path, annotations, out_dir)
-                num_img += 1
-        except Exception as e:
-            logger.error(f"Failed {xml_path.name}: {e}")
+    img_rel = 'JPEGImages' if inventory.has_dir('JPEGImages') else 'images'
+    img_dir = dataset_path / img_rel
+    img_names = set(inventory.names_in(img_rel))
+    
+    # Parse all XML files on the worker pool, in batches, into compact arrays
+    runner = runner or ConversionRunner(out_dir)
+    batches = [xml_files[i:i + VOC_BATCH_SIZE] for i in range(0, len(xml_files), VOC_BATCH_SIZE)]
+    parse = partial(parse_voc_batch, class_mapping=class_map)
+    results = runner.executor.map(parse, batches) if runner.executor is not None else map(parse, batches)
+    
+    parsed, malformed, missing, invalid = [], [], 0, 0
+    skipped_classes = Counter()
+    with tqdm(total=len(xml_files), desc="VOC parse") as bar:
+        for records, errors in results:
+            malformed.extend(f"{xml_path.name} ({error})" for xml_path, error in errors)
+            for _, record in records:
+                skipped_classes.update(record.skipped_classes)
+                invalid += record.invalid
+                if record.filename in img_names or ('/' in record.filename and
+                                                    (img_dir / record.filename).exists()):
+                    parsed.append((img_dir / record.filename, record))
+                else:
+                    missing += 1
+            bar.update(len(records) + len(errors))
+    
+    if malformed:
+        logger.warning(f"Skipped {len(malformed)} malformed XML files: {', '.join(malformed[:5])}"
+                       f"{' ...' if len(malformed) > 5 else ''}")
+    for class_name, count in skipped_classes.most_common():
+        logger.warning(f"Class '{class_name}' not in mapping, skipped {count} annotations")
+    if invalid:
+        logger.warning(f"Skipped {invalid} invalid bboxes")
+    if missing:
+        logger.warning(f"{missing} annotated images not found in {img_dir}")
+    
+    jobs = ((img_path, record.boxes) for img_path, record in parsed)
+    num_img, num_ann = runner.run(jobs, "VOC", len(parsed))
     
     logger.info(f"Converted {num_img} images, {num_ann} annotations")
     return num_img, num_ann
 
 
-def convert_yolo(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool) -> Tuple[int, int]:
+def convert_yolo(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool,
+                 runner: Optional[ConversionRunner] = None,
+                 inventory: Optional[DatasetInventory] = None) -> Tuple[int, int]:
     """Copy existing YOLO format."""
     logger.info(f"Converting YOLO: {dataset_path.name}")
     
-    img_files = list((dataset_path / 'images').glob('*.jpg')) + \
-                list((dataset_path / 'images').glob('*.png'))
+    inventory = _scan(dataset_path, inventory)
+    img_files = inventory.files_in('images', ('.jpg',)) + inventory.files_in('images', ('.png',))
     
     if dry_run:
         logger.info(f"[DRY RUN] {len(img_files)} images")
         return len(img_files), 0
     
     lbl_dir = dataset_path / 'labels'
-    num_img, num_ann = 0, 0
+    lbl_names = set(inventory.names_in('labels', ('.txt',)))
     
-    for img_path in tqdm(img_files, desc="YOLO"):
-        lbl_path = lbl_dir / f'{img_path.stem}.txt'
-        annotations = parse_yolo_txt(lbl_path) if lbl_path.exists() else []
-        
-        num_ann += copy_image_and_label(img_path, annotations, out_dir)
-        num_img += 1
+    def jobs():
+        for img_path in img_files:
+            lbl_name = f'{img_path.stem}.txt'
+            yield img_path, parse_yolo_txt(lbl_dir / lbl_name) if lbl_name in lbl_names else []
+    
+    runner = runner or ConversionRunner(out_dir)
+    num_img, num_ann = runner.run(jobs(), "YOLO", len(img_files))
     
     logger.info(f"Converted {num_img} images, {num_ann} annotations")
     return num_img, num_ann
 
 
-def convert_class_folders(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool) -> Tuple[int, int]:
+def convert_class_folders(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool,
+                          runner: Optional[ConversionRunner] = None,
+                          inventory: Optional[DatasetInventory] = None,
+                          mapper: Optional[LabelMapper] = None) -> Tuple[int, int]:
     """Convert class folder structure to YOLO with intelligent label mapping."""
     logger.info(f"Converting class folders: {dataset_path.name}")
     
-    class_dirs = [d for d in dataset_path.iterdir() if d.is_dir()]
+    inventory = _scan(dataset_path, inventory)
     
     # Filter out non-class directories (like TRAIN, TEST, etc)
     valid_class_dirs = []
-    for d in class_dirs:
-        if d.name.upper() in ['TRAIN', 'TEST', 'VAL', 'VALIDATION']:
+    for d in inventory.subdirs():
+        if d.upper() in ['TRAIN', 'TEST', 'VAL', 'VALIDATION']:
             # Recursively add subdirectories
-            valid_class_dirs.extend([sd for sd in d.iterdir() if sd.is_dir()])
+            valid_class_dirs.extend(inventory.subdirs(d))
         else:
             valid_class_dirs.append(d)
     
     if dry_run:
-        total = sum(len(list(d.glob('*.jpg')) + list(d.glob('*.png')) + list(d.glob('*.jpeg'))) for d in valid_class_dirs)
+        total = sum(len(inventory.names_in(d, CLASS_FOLDER_IMAGE_SUFFIXES)) for d in valid_class_dirs)
         logger.info(f"[DRY RUN] {total} images from {len(valid_class_dirs)} classes")
         return total, total
     
-    num_img, num_ann = 0, 0
     class_counts = {}
+    jobs: List[Tuple[Path, list]] = []
+    
+    # Map every folder name in one batch (decisions are reused across datasets and runs)
+    if mapper is None:
+        mapper = LabelMapper()
+    source_classes = [(dataset_path / class_rel).name.lower() for class_rel in valid_class_dirs]
+    mappings = mapper.map_batch(source_classes)
     
-    for class_dir in tqdm(valid_class_dirs, desc="Class folders"):
-        # Use map_label to get target class
-        source_class = class_dir.name.lower()
-        target_class, method, confidence = map_label(source_class)
+    for class_rel, source_class, (target_class, method, confidence) in zip(valid_class_dirs, source_classes, mappings):
+        class_dir = dataset_path / class_rel
         
         if target_class not in class_map:
             logger.warning(f"Mapped class '{target_class}' not in target classes, skipping: {class_dir.name}")
@@ -221,11 +535,12 @@ def convert_class_folders(dataset_path: Path, out_dir: Path, class_map: Dict, dr
         bbox = BoundingBox(x_center=0.5, y_center=0.5, width=1.0, height=1.0)
         annotation = (class_id, bbox)
         
-        img_files = list(class_dir.glob('*.jpg')) + list(class_dir.glob('*.png')) + list(class_dir.glob('*.jpeg'))
-        for img_path in img_files:
-            num_ann += copy_image_and_label(img_path, [annotation], out_dir)
-            num_img += 1
-            class_counts[source_class]["count"] += 1
+        img_files = [p for suffix in CLASS_FOLDER_IMAGE_SUFFIXES for p in inventory.files_in(class_rel, (suffix,))]
+        jobs.extend((img_path, [annotation]) for img_path in img_files)
+        class_counts[source_class]["count"] += len(img_files)
+    
+    runner = runner or ConversionRunner(out_dir)
+    num_img, num_ann = runner.run(jobs, "Class folders", len(jobs))
     
     # Log class mapping summary
     logger.info("Class mapping summary:")
@@ -236,28 +551,36 @@ def convert_class_folders(dataset_path: Path, out_dir: Path, class_map: Dict, dr
     return num_img, num_ann
 
 
-def convert_csv(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool) -> Tuple[int, int]:
+def convert_csv(dataset_path: Path, out_dir: Path, class_map: Dict, dry_run: bool,
+                runner: Optional[ConversionRunner] = None,
+                inventory: Optional[DatasetInventory] = None) -> Tuple[int, int]:
     """Convert CSV annotations to YOLO."""
     logger.info(f"Converting CSV: {dataset_path.name}")
     
-    csv_files = list(dataset_path.glob('*.csv'))
+    inventory = _scan(dataset_path, inventory)
+    csv_files = inventory.files_in('', ('.csv',))
     if not csv_files:
         logger.warning("No CSV files found")
         return 0, 0
     
-    image_annotations = parse_csv_annotations(csv_files[0], class_map)
+    # Parse annotations (streamed, bounded memory)
+    parser = StreamingCsvParser(csv_files[0], class_map, as_lines=True)
     
     if dry_run:
-        num_ann = sum(len(a) for a in image_annotations.values())
-        logger.info(f"[DRY RUN] {len(image_annotations)} images, {num_ann} annotations")
-        return len(image_annotations), num_ann
-    
-    num_img, num_ann = 0, 0
-    for filename, annotations in tqdm(image_annotations.items(), desc="CSV"):
-        img_path = find_image(filename, dataset_path)
-        if img_path:
-            num_ann += copy_image_and_label(img_path, annotations, out_dir)
+        num_img, num_ann = 0, 0
+        for _, annotations in parser:
             num_img += 1
+            num_ann += len(annotations)
+        logger.info(f"[DRY RUN] {num_img} images, {num_ann} annotations")
+        return num_img, num_ann
+    
+    runner = runner or ConversionRunner(out_dir)
+    index = build_image_index(dataset_path, inventory=inventory)
+    jobs = ((find_image(filename, dataset_path, index), annotations)
+            for filename, annotations in parser)
+    num_img, num_ann = runner.run(((p, a) for p, a in jobs if p), "CSV")
+    if index.ambiguous_lookups:
+        logger.warning(f"{index.ambiguous_lookups} images resolved by ambiguous basename")
     
     logger.info(f"Converted {num_img} images, {num_ann} annotations")
     return num_img, num_ann
@@ -274,6 +597,26 @@ Simple usage:
 Custom paths:
   python convert_datasets.py --src ./datasets/raw --dst ./datasets/processed/all
   python convert_datasets.py --dry-run  # Preview only
+
+Parallel conversion:
+  python convert_datasets.py --workers 16             # thread pool
+  python convert_datasets.py --workers 16 --processes # process pool
+
+Link instead of copy (falls back to copy when not possible):
+  python convert_datasets.py --link-mode hardlink
+
+Ignore the manifest and reconvert everything:
+  python convert_datasets.py --full
+
+Class-folder names are mapped once and recorded in label_decisions.csv (edit a
+row's target to override it; --remap-labels to map everything again):
+  python convert_datasets.py --remap-labels
+
+Decode every image once (results cached in runs/cache/file_cache.sqlite):
+  python convert_datasets.py --verify-level full
+
+Keep the original file names in one folder (old layout, names may collide):
+  python convert_datasets.py --layout flat
         """
     )
 
@@ -287,6 +630,30 @@ Custom paths:
                         help='Preview only, no conversion')
     parser.add_argument('--verbose', action='store_true',
                         help='Verbose output')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parallel workers for verify/copy/label writing (default: 1)')
+    parser.add_argument('--processes', action='store_true',
+                        help='Use a process pool instead of threads for --workers')
+    parser.add_argument('--link-mode', choices=LINK_MODES, default='copy',
+                        help='How images are placed in --dst (default: copy)')
+    parser.add_argument('--index-cache', type=Path, default=None,
+                        help='Persist per-dataset file inventories in this directory '
+                             '(later runs only re-list changed folders)')
+    parser.add_argument('--full', action='store_true',
+                        help='Reconvert all images instead of only new/changed ones')
+    parser.add_argument('--verify-level', choices=VERIFY_LEVELS, default='header',
+                        help="Image check: 'header' (format/size) or 'full' (decode pixels) (default: header)")
+    parser.add_argument('--file-cache', type=Path, default=DEFAULT_CACHE_PATH,
+                        help=f'Verification/hash cache shared with split_and_prep (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-file-cache', action='store_true',
+                        help='Do not read or write the verification/hash cache')
+    parser.add_argument('--label-decisions', type=Path, default=None,
+                        help=f'Reviewable class-name mapping decisions (default: {LABEL_DECISIONS_NAME} next to --dst)')
+    parser.add_argument('--remap-labels', action='store_true',
+                        help='Ignore stored label decisions and map every class name again')
+    parser.add_argument('--layout', choices=LAYOUTS, default='sharded',
+                        help="Output naming: 'sharded' (dataset-prefixed, hash subfolders) or "
+                             "'flat' (original names) (default: sharded)")
 
     args = parser.parse_args()
 
@@ -305,28 +672,57 @@ Custom paths:
     # Build class mapping
     class_map = {name: idx for idx, name in enumerate(args.classes)}
 
+    # Class-name mapping decisions, reused across runs (edit the file to override)
+    mapper = LabelMapper(decisions_path=args.label_decisions or args.dst.parent / LABEL_DECISIONS_NAME,
+                         reuse=not args.remap_labels)
+
     # Converter dispatch
     converters = {
         'coco': convert_coco,
         'voc': convert_voc,
         'yolo': convert_yolo,
-        'class_folders': convert_class_folders,
+        'class_folders': partial(convert_class_folders, mapper=mapper),
         'csv': convert_csv
     }
 
-    # Scan datasets
-    dataset_dirs = [d for d in args.src.iterdir() if d.is_dir()]
+    # Scan datasets (sorted so output does not depend on directory listing order)
+    dataset_dirs = sorted(d for d in args.src.iterdir() if d.is_dir())
     logger.info(f"Found {len(dataset_dirs)} datasets in {args.src}")
 
+    manifest = None
+    if not args.dry_run:
+        mapping = mapping_digest(classes=class_map, manual=MANUAL_CLASS_MAPPINGS, link_mode=args.link_mode,
+                                 layout=args.layout)
+        manifest_path = args.dst.parent / MANIFEST_NAME
+        if args.full:
+            manifest = ConversionManifest(manifest_path, CONVERTER_VERSION, mapping)
+        else:
+            manifest = ConversionManifest.load(manifest_path, CONVERTER_VERSION, mapping)
+            if manifest.entries:
+                logger.info(f"Manifest: {len(manifest.entries)} previously converted images")
+
     total_img, total_ann = 0, 0
+    finished = set()
+    cache = None if args.dry_run or args.no_file_cache else FileCache(args.file_cache)
+    runner = ConversionRunner(args.dst, args.workers, args.processes, args.link_mode, manifest,
+                              args.verify_level, cache, args.layout)
+    if runner.workers > 1:
+        logger.info(f"Workers: {runner.workers} ({'processes' if args.processes else 'threads'})")
 
     for dataset_dir in dataset_dirs:
         logger.info("")
         logger.info(f"Processing: {dataset_dir.name}")
         logger.info("-" * 60)
 
+        # Walk the dataset once; detection and conversion share the listing
+        if args.index_cache:
+            inventory = DatasetInventory.cached(dataset_dir, args.index_cache / f'{dataset_dir.name}.inventory.json')
+        else:
+            inventory = DatasetInventory.scan(dataset_dir)
+        logger.info(f"Files: {len(inventory)}")
+
         # Detect format
-        fmt = detect_dataset_format(dataset_dir)
+        fmt = detect_dataset_format(dataset_dir, inventory)
         logger.info(f"Format: {fmt}")
 
         if fmt == 'unknown':
@@ -337,15 +733,33 @@ Custom paths:
         try:
             converter = converters.get(fmt)
             if converter:
-                num_img, num_ann = converter(dataset_dir, args.dst, class_map, args.dry_run)
+                runner.dataset = dataset_dir.name
+                runner.dataset_root = dataset_dir
+                num_img, num_ann = converter(dataset_dir, args.dst, class_map, args.dry_run,
+                                             runner=runner, inventory=inventory)
                 total_img += num_img
                 total_ann += num_ann
+                finished.add(dataset_dir.name)
             else:
                 logger.warning(f"Converter for '{fmt}' not implemented")
 
         except Exception as e:
             logger.error(f"Failed: {e}", exc_info=args.verbose)
 
+    runner.close()
+
+    if not args.dry_run:
+        mapper.save()
+
+    if manifest is not None:
+        # Drop outputs of images that disappeared from the sources
+        manifest.prune(args.dst, finished, {d.name for d in dataset_dirs})
+        manifest.save()
+        # Columnar copy of all labels for fast queries (the .txt files stay the training export)
+        store = update_annotation_store(args.dst, args.dst.parent / STORE_DIRNAME, manifest,
+                                        runner.store_rows, args.classes)
+        save_image_map(args.dst.parent / IMAGE_MAP_NAME, image_map_rows(manifest))
+
     # Summary
     logger.info("")
     logger.info("=" * 60)
@@ -353,6 +767,20 @@ Custom paths:
     logger.info("=" * 60)
     logger.info(f"Images: {total_img}")
     logger.info(f"Annotations: {total_ann}")
+    if runner.invalid:
+        logger.info(f"Invalid images skipped: {runner.invalid}")
+    if runner.collisions:
+        logger.warning(f"Name collisions skipped: {runner.collisions} (same filename in another dataset/folder)")
+    if manifest is not None:
+        logger.info(f"Unchanged (skipped): {manifest.skipped}")
+        if manifest.removed:
+            logger.info(f"Removed (source deleted): {manifest.removed}")
+    if not args.dry_run:
+        logger.info(runner.link_stats.summary())
+    if cache is not None and (cache.hits or cache.misses):
+        logger.info(cache.summary())
+    if len(mapper):
+        logger.info(mapper.summary())
     logger.info(f"Output: {args.dst}")
 
     if not args.dry_run:
@@ -360,7 +788,17 @@ Custom paths:
         stats = {
             "total_classes": len(args.classes),
             "total_images": total_img,
-            "total_annotations": total_ann
+            "total_annotations": total_ann,
+            "invalid_images": runner.invalid,
+            "name_collisions": runner.collisions,
+            "link_mode": args.link_mode,
+            "layout": args.layout,
+            "link_counts": runner.link_stats.counts,
+            "bytes_not_written": runner.link_stats.bytes_saved,
+            "unchanged_skipped": manifest.skipped,
+            "removed_sources": manifest.removed,
+            "class_distribution": {args.classes[c] if c < len(args.classes) else str(c): n
+                                   for c, n in store.class_counts().items()},
         }
         save_mapping(args.dst.parent / 'conversion_stats.json', stats)
 
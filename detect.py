@@ -3,14 +3,28 @@
 Real-time Waste Detection - Simplified
 
 Usage: python detect.py
+       python detect.py --telemetry runs/telemetry/detect.csv   # per-stage timings
+       python detect.py --sources 0 1 rtsp://host/stream           # multi-camera, one model
+       python detect.py --record --event-classes battery           # video + pre-event clips
+       python detect.py --publish udp://127.0.0.1:5555 --track     # send detections to actuators
+       python detect.py --target-fps 20                            # adapt imgsz (320-640) to hold 20 FPS
 """
 
+import argparse
 import cv2
+import statistics
 import time
+from collections import deque
 from pathlib import Path
 from ultralytics import YOLO
 import torch
 
+from utils.multicam import MultiCameraServer, parse_source
+from utils.overlay import OverlayRenderer
+from utils.publisher import DetectionPublisher
+from utils.recorder import AsyncRecorder
+from utils.telemetry import StageTimer, Telemetry, ProfilerToggle
+
 # Config
 MODEL = './models/best_model.pt'
 CONF = 0.25
@@ -30,105 +44,264 @@ COLORS = {
     'trash': (128, 128, 128),     # Gray
 }
 
-def load():
-    if not Path(MODEL).exists():
-        print(f"❌ Model not found: {MODEL}\n   Run: python train.py")
+PROFILE_DIR = './runs/profile'
+RECORD_DIR = './runs/record'
+
+def load(path=MODEL):
+    if not Path(path).exists():
+        print(f"❌ Model not found: {path}\n   Run: python train.py")
         return None
     device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
-    model = YOLO(MODEL).to(device)
+    model = YOLO(path).to(device)
     gpu = torch.cuda.get_device_name(0) if torch.cuda.is_available() else "CPU"
     print(f"✓ Model loaded on {gpu}")
     return model, device
 
-def draw(frame, box, idx, model, show_conf):
-    x1,y1,x2,y2 = map(int, box.xyxy[0].cpu().numpy())
-    conf, cls = float(box.conf[0]), int(box.cls[0])
-    name = model.names[cls]
-    color = COLORS.get(name, (255,255,255))
-    
-    cv2.rectangle(frame, (x1,y1), (x2,y2), color, 3)
-    cv2.circle(frame, (x1+15,y1+15), 15, color, -1)
-    cv2.putText(frame, f"#{idx}", (x1+7,y1+20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,0,0), 2)
-    
-    label = f"{name.upper()}: {conf:.2f}" if show_conf else name.upper()
-    (w,h),_ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
-    cv2.rectangle(frame, (x1,y1-h-15), (x1+w+15,y1), color, -1)
-    cv2.putText(frame, label, (x1+7,y1-7), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,0,0), 2)
-    return name
-
-def info(frame, fps, device, dets):
-    h,w = frame.shape[:2]
-    overlay = frame.copy()
-    cv2.rectangle(overlay, (0,0), (w,100), (0,0,0), -1)
-    cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
-    
-    cv2.putText(frame, "WASTE CLASSIFICATION", (10,25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
-    cv2.putText(frame, f"FPS:{fps:.1f}|{device.upper()}|Objects:{len(dets)}", (10,50), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
-    cv2.putText(frame, "Q:Quit|S:Save|C:Confidence", (10,75), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200,200,200), 1)
-    
-    if dets:
-        y=30
-        for i,n in enumerate(dets,1):
-            cv2.putText(frame, f"#{i}:{n.upper()}", (w-180,y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLORS.get(n,(255,255,255)), 2)
-            y+=25
+class ImgszController:
+    """Step the inference size (multiples of 32) up/down to hold a target FPS.
+
+    Uses the median of the last `window` frames. Steps down when the frame
+    time is over budget; steps up only when the frame is predicted to stay
+    under budget at the next size (inference cost ~ imgsz^2). A cooldown
+    after each change lets the window refill with frames at the new size.
+    """
+
+    def __init__(self, target_fps, min_size=320, max_size=640, step=32, window=15, margin=0.1):
+        self.budget_ms = 1000.0 / target_fps
+        self.min_size = max(step, min_size // step * step)
+        self.max_size = max(self.min_size, max_size // step * step)
+        self.step, self.margin = step, margin
+        self.size = self.max_size
+        self.frame_ms, self.infer_ms = deque(maxlen=window), deque(maxlen=window)
+
+    def update(self, frame_ms, infer_ms):
+        """Feed one frame's timings; returns the new size if it changed, else None."""
+        self.frame_ms.append(frame_ms)
+        self.infer_ms.append(infer_ms)
+        if len(self.frame_ms) < self.frame_ms.maxlen:
+            return None
+        frame, infer = statistics.median(self.frame_ms), statistics.median(self.infer_ms)
+        new = self.size
+        if frame > self.budget_ms * (1 + self.margin) and self.size > self.min_size:
+            new = self.size - self.step
+        elif self.size < self.max_size:
+            bigger = self.size + self.step
+            predicted = frame - infer + infer * (bigger / self.size) ** 2
+            if predicted < self.budget_ms * (1 - self.margin):
+                new = bigger
+        if new == self.size:
+            return None
+        print(f"📐 imgsz {self.size} -> {new} (frame {frame:.1f} ms, inference {infer:.1f} ms, "
+              f"budget {self.budget_ms:.1f} ms)")
+        self.size = new
+        self.frame_ms.clear()
+        self.infer_ms.clear()
+        return new
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Real-time waste detection")
+    p.add_argument('--model', default=MODEL, help=f'Model path (default: {MODEL})')
+    p.add_argument('--conf', type=float, default=CONF, help=f'Confidence threshold (default: {CONF})')
+    p.add_argument('--cam', type=int, default=CAM, help=f'Camera index (default: {CAM})')
+    p.add_argument('--telemetry', type=Path, default=None,
+                   help='Write per-frame stage timings to a rolling .csv or .jsonl file')
+    p.add_argument('--telemetry-rows', type=int, default=100_000,
+                   help='Rotate the telemetry file after N rows (default: 100000)')
+    p.add_argument('--profile-dir', type=Path, default=Path(PROFILE_DIR),
+                   help=f'Where P / SIGUSR1 profiles are saved (default: {PROFILE_DIR})')
+    p.add_argument('--record', action='store_true',
+                   help='Record the annotated stream to a session video (background thread)')
+    p.add_argument('--record-dir', type=Path, default=Path(RECORD_DIR),
+                   help=f'Where videos and event clips are written (default: {RECORD_DIR})')
+    p.add_argument('--event-classes', nargs='*', default=[],
+                   help='Save a clip (with pre-event buffer) when one of these classes is detected, e.g. battery')
+    p.add_argument('--pre-event', type=float, default=5.0,
+                   help='Seconds kept in memory before an event (default: 5)')
+    p.add_argument('--post-event', type=float, default=5.0,
+                   help='Seconds recorded after the last trigger (default: 5)')
+    p.add_argument('--buffer-mb', type=float, default=256.0,
+                   help='Memory cap of the pre-event buffer plus frames waiting to be written, in MB (default: 256)')
+    p.add_argument('--publish', default=None, metavar='ENDPOINT',
+                   help='Publish detections as binary datagrams: udp://host:port or unix:///path')
+    p.add_argument('--track', action='store_true',
+                   help='Run the YOLO tracker so published detections carry track ids')
+    p.add_argument('--target-fps', type=float, default=None,
+                   help='Adapt the inference size to hold this FPS (off by default)')
+    p.add_argument('--min-imgsz', type=int, default=320, help='Smallest adaptive imgsz (default: 320)')
+    p.add_argument('--max-imgsz', type=int, default=640, help='Largest adaptive imgsz (default: 640)')
+    p.add_argument('--sources', nargs='+', default=None,
+                   help='Multi-camera mode: camera indexes, files or stream URLs sharing one model')
+    p.add_argument('--max-batch', type=int, default=8,
+                   help='Multi-camera: max frames per model call (default: 8)')
+    p.add_argument('--camera-fps', type=float, default=None,
+                   help='Multi-camera: serve each camera at most N times per second')
+    args = p.parse_args()
+    if args.sources:
+        # run_multi has no recorder, publisher, telemetry or imgsz controller
+        single = [flag for flag, value in (('--record', args.record), ('--event-classes', args.event_classes),
+                                           ('--publish', args.publish), ('--track', args.track),
+                                           ('--telemetry', args.telemetry), ('--target-fps', args.target_fps))
+                  if value]
+        if single:
+            p.error(f"{', '.join(single)} only work with a single camera, not with --sources")
+    return args
+
+def run_multi(args, model, device):
+    """Serve several sources from one process: shared weights, one batched call per round."""
+    sources = [parse_source(s) for s in args.sources]
+    server = MultiCameraServer(sources, max_batch=args.max_batch, max_fps=args.camera_fps)
+    renderer = OverlayRenderer(COLORS, controls="Q:Quit|C:Confidence")
+    state = {'show': True}
+    print(f"📹 Opening {len(sources)} sources (batch<={args.max_batch})...")
+    print("✓ Ready\nControls: Q=Quit|C=Confidence\n")
+
+    def infer(frames):
+        return model(frames, conf=args.conf, verbose=False)
+
+    def on_result(reader, frame, result):
+        b = result.boxes
+        dets = renderer.draw_boxes(frame, b.xyxy.cpu().numpy(), b.conf.cpu().numpy(),
+                                   b.cls.cpu().numpy(), model.names, state['show'])
+        renderer.draw_header(frame, reader.stats.fps, device, dets,
+                             extra=f"|{reader.cam_name}|{reader.stats.latency(50):.0f}ms")
+        cv2.imshow(f'Waste Classification - {reader.cam_name}', frame)
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('q'): return False
+        if key == ord('c'):
+            state['show'] = not state['show']
+            print(f"🔄 Confidence:{'ON' if state['show'] else 'OFF'}")
+        return True
+
+    try:
+        server.run(infer, on_result)
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted")
+    finally:
+        server.stop()
+        cv2.destroyAllWindows()
+        print(server.format_stats())
+        print("✓ Done!")
 
 def main():
+    args = parse_args()
     print("="*50)
     print("🎥 REAL-TIME WASTE CLASSIFICATION")
     print("="*50)
     
-    r = load()
+    r = load(args.model)
     if not r: return
     model, device = r
+    if args.sources:
+        return run_multi(args, model, device)
     
-    print(f"📹 Opening camera {CAM}...")
-    cap = cv2.VideoCapture(CAM)
+    print(f"📹 Opening camera {args.cam}...")
+    cap = cv2.VideoCapture(args.cam)
     if not cap.isOpened():
-        print(f"❌ Could not open camera {CAM}")
+        print(f"❌ Could not open camera {args.cam}")
         return
     
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    print("✓ Ready\nControls: Q=Quit|S=Save|C=Confidence\n")
+    print("✓ Ready\nControls: Q=Quit|S=Save|C=Confidence|P=Profile\n")
     
     fps,fc,st = 0,0,time.time()
     show,save = True,0
+    renderer = OverlayRenderer(COLORS)
+    timer = StageTimer()
+    telemetry = Telemetry(args.telemetry, max_rows=args.telemetry_rows)
+    profiler = ProfilerToggle(args.profile_dir)
+    recorder = AsyncRecorder(args.record_dir, record=args.record, event_classes=args.event_classes,
+                             pre_event=args.pre_event, post_event=args.post_event,
+                             max_buffer_mb=args.buffer_mb)
+    adapt = ImgszController(args.target_fps, args.min_imgsz, args.max_imgsz) if args.target_fps else None
+    if adapt:
+        print(f"📐 Adaptive imgsz {adapt.min_size}-{adapt.max_size} for {args.target_fps:g} FPS")
+    publisher = DetectionPublisher(args.publish) if args.publish else None
+    if publisher:
+        print(f"📡 Publishing detections to {args.publish}")
+    if args.event_classes:
+        print(f"🎬 Event clips for: {', '.join(args.event_classes)} -> {args.record_dir}")
+    if profiler.install_signal():
+        print("ℹ️ Profiler: press P or send SIGUSR1 to this process")
     
     try:
         while True:
+            timer.reset()
             ret,frame = cap.read()
             if not ret: break
+            captured, captured_ns = time.perf_counter(), time.monotonic_ns()
+            timer.mark('capture')
+            
+            size = {'imgsz': adapt.size} if adapt else {}
+            if args.track:
+                results = model.track(frame, conf=args.conf, persist=True, verbose=False, **size)
+            else:
+                results = model(frame, conf=args.conf, verbose=False, **size)
+            model_ms = timer.mark('inference')
+            if publisher and results:
+                # Publish before drawing: actuators should not wait on the overlay
+                b = results[0].boxes
+                publisher.publish(captured_ns, frame.shape[1], frame.shape[0], b.xyxy.cpu().numpy(),
+                                  b.conf.cpu().numpy(), b.cls.cpu().numpy(),
+                                  b.id.cpu().numpy() if b.id is not None else None)
+            speed = results[0].speed if results else {}
+            if speed.get('inference') is not None:
+                # Split the model call into YOLO's own stage timings
+                for stage in ('preprocess','inference','postprocess'):
+                    timer.set(stage, speed.get(stage) or 0.0)
+            else:
+                timer.set('inference', model_ms)
             
-            results = model(frame, conf=CONF, verbose=False)
             dets = []
             for result in results:
-                for idx,box in enumerate(result.boxes,1):
-                    dets.append(draw(frame,box,idx,model,show))
+                b = result.boxes
+                dets += renderer.draw_boxes(frame, b.xyxy.cpu().numpy(), b.conf.cpu().numpy(),
+                                            b.cls.cpu().numpy(), model.names, show)
             
             fc += 1
             if fc >= 10:
                 fps = fc/(time.time()-st)
                 fc,st = 0,time.time()
             
-            info(frame,fps,device,dets)
+            renderer.draw_header(frame,fps,device,dets,extra=f"|{adapt.size}px" if adapt else "")
+            timer.mark('draw')
             cv2.imshow('Waste Classification',frame)
+            recorder.submit(frame, dets)
             
             key = cv2.waitKey(1) & 0xFF
+            timer.mark('display')
+            telemetry.record(timer.timings, captured)
+            if adapt:
+                adapt.update(sum(timer.timings.values()), model_ms)
+            profiler.poll()
             if key == ord('q'): break
             elif key == ord('s'):
                 save += 1
                 f = f"capture_{save}.jpg"
-                cv2.imwrite(f,frame)
-                print(f"💾 {f}")
+                if recorder.snapshot(frame, Path(f)): print(f"💾 {f}")
             elif key == ord('c'):
                 show = not show
                 print(f"🔄 Confidence:{'ON' if show else 'OFF'}")
+            elif key == ord('p'):
+                profiler.toggle()
     
     except KeyboardInterrupt:
         print("\n⚠️ Interrupted")
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        recorder.close()
+        if recorder.errors:
+            print(f"⚠️ Recorder: {recorder.errors} failed writes (see log)")
+        profiler.stop()
+        if publisher:
+            publisher.close()
+            print(f"📡 Published {publisher.sent} frames ({publisher.errors} send errors)")
+        telemetry.close()
+        if telemetry.frames:
+            print(telemetry.format_summary())
+        if args.telemetry:
+            print(f"📈 Telemetry: {args.telemetry}")
         print("✓ Done!")
 
 if __name__ == '__main__':
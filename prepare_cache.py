@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Letterbox Cache Preparation Script
+
+Decode and letterbox every split of data.yaml to one image size, once, so
+CPU training does not decode and resize every JPEG again each epoch (see
+utils.letterbox_cache). data.yaml gets a ``letterbox`` entry; train.py uses
+the cache when it was built for the requested --imgsz.
+
+Simple usage:
+    python prepare_cache.py --data datasets/processed/data.yaml --imgsz 640
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import yaml
+
+from utils.letterbox_cache import LETTERBOX_DIRNAME, LetterboxCache, build_cache, measure_epoch, split_images
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_DATA = './datasets/processed/data.yaml'
+SPLIT_KEYS = ('train', 'val', 'test')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-letterbox dataset splits for faster CPU training",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Simple usage:
+  python prepare_cache.py --imgsz 640
+
+Only some splits, 4 decode threads:
+  python prepare_cache.py --imgsz 416 --splits train val --workers 4
+
+Then train at the same size (the cache is skipped for any other --imgsz):
+  python train.py --imgsz 640 --device cpu
+        """
+    )
+
+    parser.add_argument('--data', type=Path, default=Path(DEFAULT_DATA),
+                        help=f'Data config written by split_and_prep.py (default: {DEFAULT_DATA})')
+    parser.add_argument('--imgsz', type=int, default=640,
+                        help='Image size, must match train.py --imgsz (default: 640)')
+    parser.add_argument('--splits', nargs='+', choices=SPLIT_KEYS, default=list(SPLIT_KEYS),
+                        help='Splits to cache (default: all present in data.yaml)')
+    parser.add_argument('--out', type=Path, default=None,
+                        help=f'Cache directory (default: {LETTERBOX_DIRNAME}/ next to data.yaml)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Decode threads (default: CPU count)')
+    parser.add_argument('--sample', type=int, default=200,
+                        help='Images timed for the per-epoch speedup estimate (0 to skip) (default: 200)')
+
+    args = parser.parse_args()
+
+    logger.info("=" * 60)
+    logger.info("Letterbox Cache Preparation")
+    logger.info("=" * 60)
+
+    if args.imgsz % 32 != 0:
+        logger.error(f"Image size must be multiple of 32, got {args.imgsz}")
+        return 1
+    if not args.data.exists():
+        logger.error(f"Data YAML not found: {args.data}")
+        logger.error("Run split_and_prep.py first to generate data.yaml")
+        return 1
+
+    data = yaml.safe_load(args.data.read_text()) or {}
+    root = Path(data.get('path') or args.data.parent)
+    if not root.is_absolute():
+        root = args.data.parent / root
+    cache_dir = args.out or args.data.parent / LETTERBOX_DIRNAME
+
+    report = {'imgsz': args.imgsz, 'splits': {}}
+    total_bytes = total_source = 0
+    for split in args.splits:
+        if not data.get(split):
+            continue
+        images = split_images(data[split], root)
+        if not images:
+            logger.warning(f"{split}: no images in {data[split]}, skipped")
+            continue
+        try:
+            # Only train is loaded with augmentation (which changes the resize interpolation)
+            stats = build_cache(images, cache_dir, split, args.imgsz, args.workers, augment=split == 'train')
+        except ValueError as e:
+            logger.error(f"{split}: {e}")
+            return 1
+        total_bytes += stats['bytes']
+        total_source += stats['source_bytes']
+
+        if args.sample:
+            cache = LetterboxCache.open(cache_dir, split, args.imgsz)
+            stats['epoch'] = measure_epoch(cache, images, args.sample)
+            cache.close()
+            epoch = stats['epoch']
+            logger.info(f"  {split} per epoch (1 worker): decode+resize {epoch['decode_epoch_s']}s "
+                        f"({epoch['decode_ms']} ms/img) vs cache {epoch['cache_epoch_s']}s "
+                        f"({epoch['cache_ms']} ms/img) -> {epoch['speedup']}x")
+        report['splits'][split] = stats
+
+    if not report['splits']:
+        logger.error("No split to cache")
+        return 1
+
+    # Point train.py at the cache
+    data['letterbox'] = str(cache_dir.resolve())
+    args.data.write_text(yaml.dump(data, default_flow_style=False, sort_keys=False))
+    (cache_dir / f'report_{args.imgsz}.json').write_text(json.dumps(report, indent=2))
+
+    # Summary
+    logger.info("")
+    logger.info("=" * 60)
+    logger.info("SUMMARY")
+    logger.info("=" * 60)
+    for split, stats in report['splits'].items():
+        logger.info(f"{split.capitalize() + ':':<6} {stats['images']} images, {stats['bytes'] / 1e6:.1f} MB")
+    logger.info(f"Disk: {total_bytes / 1e6:.1f} MB cache for {total_source / 1e6:.1f} MB of images "
+                f"({total_bytes / max(total_source, 1):.1f}x)")
+    logger.info(f"Cache: {cache_dir} (imgsz {args.imgsz})")
+    logger.info(f"Config: {args.data}")
+    logger.info("=" * 60)
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -2,24 +2,35 @@
 """
 Dataset Split and Preparation Script
 
-Split dataset into train/val/test with deduplication and stratified sampling.
+Split dataset into train/val/test (or any named splits) with deduplication
+and multi-label stratified sampling.
 
 Simple usage:
     python split_and_prep.py
+    python split_and_prep.py --link-mode hardlink   # no second copy of every JPEG
 """
 
 import argparse
-import shutil
+import json
 from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import yaml
-from sklearn.model_selection import train_test_split
 from tqdm import tqdm
 
-from utils.image_utils import verify_image, hash_image
+from utils.annotation_store import STORE_DIRNAME, AnnotationStore
+from utils.file_utils import LINK_MODES, LinkStats, materialize
+from utils.file_cache import DEFAULT_CACHE_PATH, FileCache
+from utils.hashing import HASH_ALGORITHMS, hash_files
+from utils.image_utils import VERIFY_LEVELS, verify_image
+from utils.label_index import LabelIndex
 from utils.logger import setup_logger
+from utils.output_layout import is_nested, label_path, list_images
+from utils.packed_shards import DEFAULT_SHARD_BYTES, PACKED_DIRNAME, write_shards
+from utils.near_duplicates import DEFAULT_THRESHOLD, PHASH_METHODS, near_duplicate_clusters, perceptual_hashes
+from utils.stratify import iterative_stratification, log_split_report
 
 logger = setup_logger(__name__)
 
@@ -27,6 +38,7 @@ logger = setup_logger(__name__)
 DEFAULT_SRC = './datasets/processed/all'
 DEFAULT_OUT = './datasets/processed'
 DEFAULT_SPLIT = (0.8, 0.1, 0.1)  # train, val, test
+DEFAULT_SPLIT_NAMES = ('train', 'val', 'test')
 # 10 classes from garbage-classification-v2
 DEFAULT_CLASSES = [
     'battery',     # 0: Batteries (hazardous waste)
@@ -42,22 +54,37 @@ DEFAULT_CLASSES = [
 ]
 
 
-def deduplicate_images(images_dir: Path, labels_dir: Path) -> Tuple[List[Path], int]:
-    """Deduplicate images based on content hash."""
+def deduplicate_images(images_dir: Path, labels_dir: Path, verify_level: str = 'header',
+                       cache: Optional[FileCache] = None, hash_algorithm: str = 'sha256',
+                       hash_workers: Optional[int] = None) -> Tuple[List[Path], int]:
+    """
+    Deduplicate images based on content hash.
+
+    Verification results and digests come from ``cache`` when the file is
+    unchanged; the remaining files are hashed in parallel.
+    """
     logger.info("Deduplicating images...")
     
-    image_files = list(images_dir.glob('*.jpg')) + list(images_dir.glob('*.png'))
+    image_files = list_images(images_dir)
+    valid_images = []
+    for img_path in tqdm(image_files, desc="Verifying images"):
+        is_valid, error = verify_image(img_path, verify_level, cache)
+        if not is_valid:
+            logger.warning(f"Invalid: {img_path.name} - {error}")
+            continue
+        valid_images.append(img_path)
+
+    digests, hash_stats = hash_files(valid_images, hash_algorithm, hash_workers, cache, "Hashing images")
+    logger.info(hash_stats.summary())
+
     seen_hashes = {}
     unique_images = []
     dup_count = 0
 
-    for img_path in tqdm(image_files, desc="Hashing images"):
-        is_valid, error = verify_image(img_path)
-        if not is_valid:
-            logger.warning(f"Invalid: {img_path.name} - {error}")
+    for img_path in valid_images:
+        img_hash = digests.get(img_path)
+        if img_hash is None:
             continue
-
-        img_hash = hash_image(img_path)
         if img_hash in seen_hashes:
             dup_count += 1
         else:
@@ -68,92 +95,205 @@ def deduplicate_images(images_dir: Path, labels_dir: Path) -> Tuple[List[Path],
     return unique_images, dup_count
 
 
-def get_labels(image_path: Path, labels_dir: Path) -> List[int]:
-    """Get class IDs from label file."""
-    label_path = labels_dir / f'{image_path.stem}.txt'
-    if not label_path.exists():
+def save_near_duplicate_report(report_path: Path, clusters: List[List[Path]], method: str, threshold: int):
+    """Log and save near-duplicate clusters (first image = representative)."""
+    covered = sum(len(c) for c in clusters)
+    logger.info(f"Near-duplicates ({method}, <= {threshold} bits): {len(clusters)} clusters, {covered} images")
+    for cluster in clusters[:5]:
+        logger.info(f"  {len(cluster)}: {', '.join(p.name for p in cluster[:4])}{' ...' if len(cluster) > 4 else ''}")
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps({
+        'method': method,
+        'threshold': threshold,
+        'clusters': [[p.name for p in cluster] for cluster in clusters],
+    }, indent=2))
+    logger.info(f"Near-duplicate report: {report_path}")
+
+
+def load_label_index(src: Path, use_store: bool = True, cache_path: Optional[Path] = None,
+                     workers: Optional[int] = None) -> LabelIndex:
+    """
+    Class ids of every label file, read once.
+
+    Indexes src/labels in one parallel pass, reusing ``cache_path`` for
+    files whose size and mtime are unchanged and the annotation store
+    written by convert_datasets for files not modified since it was saved.
+    """
+    store_dir = src.parent / STORE_DIRNAME
+    if use_store and (store_dir / 'meta.json').exists():
+        try:
+            store = AnnotationStore.load(store_dir)
+            saved_ns = (store_dir / 'meta.json').stat().st_mtime_ns
+            logger.info(f"Using annotation store: {store_dir} ({store.num_images} images, {store.num_boxes} boxes)")
+            return LabelIndex.from_store(store, saved_ns, src / 'labels', workers, cache_path)
+        except (ValueError, OSError) as e:
+            logger.warning(f"Ignoring annotation store {store_dir}: {e}")
+    return LabelIndex.build(src / 'labels', workers, cache_path)
+
+
+def get_labels(image_path: Path, labels_dir: Path,
+               index: Optional[LabelIndex] = None) -> List[int]:
+    """
+    Get class IDs from the label index, else from the label file.
+
+    The label file mirrors the image's place under the sibling images/
+    folder (flat or sharded layout).
+    """
+    if index is not None and image_path.stem in index:
+        return index.class_ids(image_path.stem).tolist()
+    try:
+        lbl = label_path(image_path, labels_dir.parent / 'images', labels_dir)
+    except ValueError:
+        lbl = labels_dir / f'{image_path.stem}.txt'
+    if not lbl.exists():
         return []
     
-    return [int(line.split()[0]) for line in label_path.read_text().splitlines() if line.strip()]
+    return [int(line.split()[0]) for line in lbl.read_text().splitlines() if line.strip()]
 
 
 def split_dataset(
     images: List[Path],
     labels_dir: Path,
-    ratios: Tuple[float, float, float],
-    seed: int = 42
-) -> Tuple[List[Path], List[Path], List[Path]]:
-    """Stratified split into train/val/test."""
-    logger.info(f"Splitting with ratios {ratios}...")
-    
-    # Get labels for stratification
-    valid_images = []
-    image_classes = []
-    
-    for img in tqdm(images, desc="Reading labels"):
-        class_ids = get_labels(img, labels_dir)
-        if class_ids:
-            valid_images.append(img)
-            image_classes.append(class_ids[0])  # Use first class
-        else:
-            logger.warning(f"No labels: {img.name}")
+    ratios: Sequence[float],
+    seed: int = 42,
+    index: Optional[LabelIndex] = None,
+    groups: Optional[List[List[Path]]] = None,
+    split_names: Sequence[str] = DEFAULT_SPLIT_NAMES,
+    class_names: Optional[List[str]] = None,
+    report_path: Optional[Path] = None
+) -> List[List[Path]]:
+    """
+    Multi-label stratified split into any number of named splits.
+
+    Every class present in an image counts (not only the first), using
+    iterative stratification over the per-image class-count matrix.
+    Images in the same group (near-duplicate cluster) always land in the
+    same split: a group is split as one unit carrying the boxes of all its
+    labeled images.
+
+    Returns:
+        One image list per ratio, in the order of ``ratios``
+    """
+    logger.info(f"Splitting with ratios {dict(zip(split_names, ratios))}...")
     
-    if not valid_images:
+    index = index if index is not None else LabelIndex.build(labels_dir)
+    stems = [img.stem for img in images]
+    counts = index.count_matrix(stems, len(class_names or []))
+    labeled = counts.any(axis=1)
+    for i in np.flatnonzero(~labeled).tolist():
+        logger.warning(f"No labels: {images[i].name}")
+    valid = np.flatnonzero(labeled)
+    if not len(valid):
         raise ValueError("No valid images with labels!")
     
-    # Split: train vs (val+test)
-    train_imgs, temp_imgs, train_lbls, temp_lbls = train_test_split(
-        valid_images, image_classes,
-        train_size=ratios[0],
-        stratify=image_classes,
-        random_state=seed
-    )
+    # Group members follow the first labeled image of their group
+    unit = np.arange(len(images))
+    if groups:
+        position = {stem: i for i, stem in enumerate(stems)}
+        for group in groups:
+            members = [position[img.stem] for img in group if img.stem in position and labeled[position[img.stem]]]
+            unit[members[1:]] = members[:1]
+    leaders = valid[unit[valid] == valid]
+    followers = valid[unit[valid] != valid]
+    unit_counts = counts.copy()
+    np.add.at(unit_counts, unit[followers], counts[followers])
     
-    # Split: val vs test
-    val_size = ratios[1] / (ratios[1] + ratios[2])
-    val_imgs, test_imgs, _, _ = train_test_split(
-        temp_imgs, temp_lbls,
-        train_size=val_size,
-        stratify=temp_lbls,
-        random_state=seed
-    )
+    split_of = np.full(len(images), -1, dtype=np.int64)
+    split_of[leaders] = iterative_stratification(unit_counts[leaders], ratios, seed)
+    split_of[valid] = split_of[unit[valid]]
+    if len(leaders) < len(valid):
+        logger.info(f"Kept {len(valid) - len(leaders)} near-duplicates in the split of their cluster")
     
-    logger.info(f"Split: {len(train_imgs)} train, {len(val_imgs)} val, {len(test_imgs)} test")
-    return train_imgs, val_imgs, test_imgs
+    parts = [[images[i] for i in np.flatnonzero(split_of == j).tolist()] for j in range(len(ratios))]
+    logger.info("Split: " + ", ".join(f"{len(part)} {name}" for name, part in zip(split_names, parts)))
+    report = log_split_report(counts[valid], split_of[valid], ratios, split_names, class_names)
+    if report_path is not None:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report['ratios'] = dict(zip(split_names, map(float, ratios)))
+        report['images'] = {name: len(part) for name, part in zip(split_names, parts)}
+        report_path.write_text(json.dumps(report, indent=2))
+    return parts
 
 
 def copy_files(images: List[Path], src_img_dir: Path, src_lbl_dir: Path, 
-               dst_img_dir: Path, dst_lbl_dir: Path, name: str):
-    """Copy images and labels to destination."""
+               dst_img_dir: Path, dst_lbl_dir: Path, name: str,
+               link_mode: str = 'copy', stats: LinkStats = None):
+    """
+    Copy (or link) images and labels to destination.
+
+    Shard subfolders of the source (see utils.output_layout) are kept, and
+    labels mirror the image tree as YOLO expects. Only images are linked:
+    labels are always copied, since a later conversion rewrites the source
+    labels in place and must not change the split's labels with them.
+    """
     dst_img_dir.mkdir(parents=True, exist_ok=True)
     dst_lbl_dir.mkdir(parents=True, exist_ok=True)
+    made = {dst_img_dir, dst_lbl_dir}
     
     for img in tqdm(images, desc=f"Copying {name}"):
-        shutil.copy2(img, dst_img_dir / img.name)
+        dst_img = dst_img_dir / img.relative_to(src_img_dir)
+        dst_lbl = label_path(dst_img, dst_img_dir, dst_lbl_dir)
+        for folder in (dst_img.parent, dst_lbl.parent):
+            if folder not in made:
+                folder.mkdir(parents=True, exist_ok=True)
+                made.add(folder)
+        used, saved = materialize(img, dst_img, link_mode)
+        if stats is not None:
+            stats.add(used, saved)
         
-        lbl = src_lbl_dir / f'{img.stem}.txt'
+        lbl = label_path(img, src_img_dir, src_lbl_dir)
         if lbl.exists():
-            shutil.copy2(lbl, dst_lbl_dir / lbl.name)
+            materialize(lbl, dst_lbl, 'copy')
+
+
+def get_distribution(images: List[Path], labels_dir: Path,
+                     index: Optional[LabelIndex] = None) -> Dict[int, int]:
+    """Calculate class distribution (boxes per class id)."""
+    if index is None:
+        all_classes = []
+        for img in images:
+            all_classes.extend(get_labels(img, labels_dir))
+        return dict(Counter(all_classes))
+    return index.distribution(img.stem for img in images)
 
 
-def get_distribution(images: List[Path], labels_dir: Path) -> Dict[int, int]:
-    """Calculate class distribution."""
-    all_classes = []
-    for img in images:
-        all_classes.extend(get_labels(img, labels_dir))
-    return dict(Counter(all_classes))
+def write_image_list(list_path: Path, images: List[Path]) -> Path:
+    """Write a YOLO image list (one absolute path per line)."""
+    list_path.write_text(''.join(f'{img.resolve()}\n' for img in sorted(images)))
+    logger.info(f"Image list: {list_path} ({len(images)} images)")
+    return list_path
 
 
 def create_data_yaml(out_path: Path, train_dir: Path, val_dir: Path, 
-                     test_dir: Path, classes: List[str]):
-    """Generate data.yaml for YOLO."""
+                     test_dir: Optional[Path], classes: List[str],
+                     train_dist: Optional[Dict[int, int]] = None,
+                     packed_dir: Optional[Path] = None):
+    """
+    Generate data.yaml for YOLO.
+
+    Each split is an images folder or an image list file (.txt). With
+    ``packed_dir``, train.py reads the splits from packed shards instead.
+
+    With the train distribution (from the label index), class ids outside
+    ``classes`` and classes without any training box are reported.
+    """
+    if train_dist is not None:
+        unknown = sorted(c for c in train_dist if not 0 <= c < len(classes))
+        if unknown:
+            logger.warning(f"Labels use class ids not in names (nc={len(classes)}): {unknown}")
+        empty = [name for i, name in enumerate(classes) if not train_dist.get(i)]
+        if empty:
+            logger.warning(f"Classes without training boxes: {', '.join(empty)}")
+    
     data = {
         'train': str(train_dir.resolve()),
         'val': str(val_dir.resolve()),
-        'test': str(test_dir.resolve()),
-        'nc': len(classes),
-        'names': classes
     }
+    if test_dir is not None:
+        data['test'] = str(test_dir.resolve())
+    if packed_dir is not None:
+        data['packed'] = str(packed_dir.resolve())
+    data.update(nc=len(classes), names=classes)
     
     out_path.write_text(yaml.dump(data, default_flow_style=False, sort_keys=False))
     logger.info(f"Generated: {out_path}")
@@ -169,6 +309,19 @@ Simple usage:
 
 Custom split:
   python split_and_prep.py --split 0.7 0.15 0.15
+
+Named splits (any number; data.yaml uses train/val/test when present):
+  python split_and_prep.py --split 0.7 0.1 0.1 0.1 --split-names train val test holdout
+
+Link instead of copy (falls back to copy when not possible):
+  python split_and_prep.py --link-mode hardlink
+
+Packed shards for network storage (a few large files per split, read by train.py):
+  python split_and_prep.py --pack --shard-size-mb 2048
+
+Near-duplicate grouping (re-encoded/resized copies stay in one split):
+  python split_and_prep.py --near-dup phash --near-dup-threshold 6
+  python split_and_prep.py --near-dup off
         """
     )
 
@@ -176,13 +329,39 @@ Custom split:
                         help=f'Source directory (default: {DEFAULT_SRC})')
     parser.add_argument('--out', type=Path, default=Path(DEFAULT_OUT),
                         help=f'Output directory (default: {DEFAULT_OUT})')
-    parser.add_argument('--split', nargs=3, type=float, default=list(DEFAULT_SPLIT),
-                        metavar=('TRAIN', 'VAL', 'TEST'),
+    parser.add_argument('--split', nargs='+', type=float, default=list(DEFAULT_SPLIT),
+                        metavar='RATIO',
                         help=f'Split ratios (default: {DEFAULT_SPLIT[0]} {DEFAULT_SPLIT[1]} {DEFAULT_SPLIT[2]})')
+    parser.add_argument('--split-names', nargs='+', default=list(DEFAULT_SPLIT_NAMES), metavar='NAME',
+                        help=f"Name of each split, one per ratio (default: {' '.join(DEFAULT_SPLIT_NAMES)})")
     parser.add_argument('--seed', type=int, default=42,
                         help='Random seed (default: 42)')
     parser.add_argument('--classes', nargs='*', default=DEFAULT_CLASSES,
                         help='Class names')
+    parser.add_argument('--link-mode', choices=LINK_MODES, default='copy',
+                        help='How images are placed in the split folders (default: copy)')
+    parser.add_argument('--no-store', action='store_true',
+                        help='Read the .txt label files even if an annotation store exists')
+    parser.add_argument('--label-index', type=Path, default=None,
+                        help='Persist the label index here (.npz); later runs only re-read changed labels')
+    parser.add_argument('--verify-level', choices=VERIFY_LEVELS, default='header',
+                        help="Image check: 'header' (format/size) or 'full' (decode pixels) (default: header)")
+    parser.add_argument('--file-cache', type=Path, default=DEFAULT_CACHE_PATH,
+                        help=f'Verification/hash cache shared with convert_datasets (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-file-cache', action='store_true',
+                        help='Do not read or write the verification/hash cache')
+    parser.add_argument('--hash-algo', choices=HASH_ALGORITHMS, default='sha256',
+                        help='Digest used for deduplication (xxh* need the xxhash package) (default: sha256)')
+    parser.add_argument('--hash-workers', type=int, default=None,
+                        help='Parallel hashing threads (default: CPU count)')
+    parser.add_argument('--pack', action='store_true',
+                        help=f'Also write each split as packed shards in OUT/{PACKED_DIRNAME} (see utils.packed_shards)')
+    parser.add_argument('--shard-size-mb', type=int, default=DEFAULT_SHARD_BYTES >> 20,
+                        help=f'Target size of one packed shard (default: {DEFAULT_SHARD_BYTES >> 20})')
+    parser.add_argument('--near-dup', choices=('off',) + PHASH_METHODS, default='dhash',
+                        help='Perceptual hash used to keep near-duplicates in one split (default: dhash)')
+    parser.add_argument('--near-dup-threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help=f'Max Hamming distance (of 64 bits) for near-duplicates (default: {DEFAULT_THRESHOLD})')
 
     args = parser.parse_args()
 
@@ -195,6 +374,10 @@ Custom split:
     if abs(sum(ratios) - 1.0) > 0.001:
         logger.error(f"Split ratios must sum to 1.0, got {sum(ratios)}")
         return 1
+    split_names = list(args.split_names)
+    if len(split_names) != len(ratios) or len(set(split_names)) != len(split_names):
+        logger.error(f"Need one unique name per ratio, got {split_names} for {list(ratios)}")
+        return 1
 
     # Check source
     src_img_dir = args.src / 'images'
@@ -208,44 +391,81 @@ Custom split:
         return 1
 
     # Deduplicate
-    unique_images, dup_count = deduplicate_images(src_img_dir, src_lbl_dir)
+    cache = None if args.no_file_cache else FileCache(args.file_cache)
+    try:
+        unique_images, dup_count = deduplicate_images(src_img_dir, src_lbl_dir, args.verify_level, cache,
+                                                      args.hash_algo, args.hash_workers)
+    except ImportError as e:
+        logger.error(str(e))
+        return 1
+    if cache is not None:
+        logger.info(cache.summary())
     if not unique_images:
         logger.error("No valid images found!")
         return 1
 
+    # Near-duplicates (re-encoded/resized copies) must not straddle splits
+    clusters = []
+    if args.near_dup != 'off':
+        hashes = perceptual_hashes(unique_images, args.near_dup, args.hash_workers, cache)
+        clusters = near_duplicate_clusters(hashes, args.near_dup_threshold)
+        save_near_duplicate_report(args.out / 'near_duplicates.json', clusters, args.near_dup,
+                                   args.near_dup_threshold)
+
+    # Every label read once: columnar store when available, else one parallel pass
+    index = load_label_index(args.src, not args.no_store, args.label_index)
+
     # Split
-    train_imgs, val_imgs, test_imgs = split_dataset(
-        unique_images, src_lbl_dir, ratios, args.seed
+    parts = split_dataset(
+        unique_images, src_lbl_dir, ratios, args.seed, index, clusters,
+        split_names, args.classes, args.out / 'split_report.json'
     )
+    splits = dict(zip(split_names, parts))
 
     # Show distributions
-    train_dist = get_distribution(train_imgs, src_lbl_dir)
-    val_dist = get_distribution(val_imgs, src_lbl_dir)
-    test_dist = get_distribution(test_imgs, src_lbl_dir)
+    dists = {name: get_distribution(imgs, src_lbl_dir, index) for name, imgs in splits.items()}
 
     logger.info("")
     logger.info("Class Distribution:")
-    logger.info(f"  Train: {train_dist}")
-    logger.info(f"  Val:   {val_dist}")
-    logger.info(f"  Test:  {test_dist}")
+    for name, dist in dists.items():
+        logger.info(f"  {name.capitalize() + ':':<6} {dist}")
 
     # Copy files
     logger.info("")
-    copy_files(train_imgs, src_img_dir, src_lbl_dir,
-               args.out / 'train' / 'images', args.out / 'train' / 'labels', 'train')
-    copy_files(val_imgs, src_img_dir, src_lbl_dir,
-               args.out / 'val' / 'images', args.out / 'val' / 'labels', 'val')
-    copy_files(test_imgs, src_img_dir, src_lbl_dir,
-               args.out / 'test' / 'images', args.out / 'test' / 'labels', 'test')
-
-    # Generate data.yaml
+    link_stats = LinkStats(args.link_mode)
+    for name, imgs in splits.items():
+        copy_files(imgs, src_img_dir, src_lbl_dir,
+                   args.out / name / 'images', args.out / name / 'labels', name,
+                   args.link_mode, link_stats)
+    logger.info(link_stats.summary())
+
+    # Packed shards: few large files per split instead of one per image and label
+    packed_dir = None
+    if args.pack:
+        packed_dir = args.out / PACKED_DIRNAME
+        for name, imgs in splits.items():
+            write_shards(imgs, src_img_dir, src_lbl_dir, packed_dir, name,
+                         args.shard_size_mb << 20, args.out / name / 'images')
+
+    # Sharded images: give YOLO file lists instead of letting it walk every shard
+    sources = {name: args.out / name / 'images' for name in split_names}
+    if is_nested(unique_images, src_img_dir):
+        sources = {name: write_image_list(args.out / f'{name}.txt',
+                                          [sources[name] / img.relative_to(src_img_dir) for img in imgs])
+                   for name, imgs in splits.items()}
+
+    # Generate data.yaml (the first two splits stand in for missing train/val)
+    train_name = 'train' if 'train' in splits else split_names[0]
+    val_name = 'val' if 'val' in splits else next((n for n in split_names if n != train_name), train_name)
     data_yaml = args.out / 'data.yaml'
     create_data_yaml(
         data_yaml,
-        args.out / 'train' / 'images',
-        args.out / 'val' / 'images',
-        args.out / 'test' / 'images',
-        args.classes
+        sources[train_name],
+        sources[val_name],
+        sources.get('test'),
+        args.classes,
+        dists[train_name],
+        packed_dir
     )
 
     # Summary
@@ -255,9 +475,8 @@ Custom split:
     logger.info("=" * 60)
     logger.info(f"Unique images: {len(unique_images)}")
     logger.info(f"Duplicates removed: {dup_count}")
-    logger.info(f"Train: {len(train_imgs)} ({ratios[0]*100:.0f}%)")
-    logger.info(f"Val:   {len(val_imgs)} ({ratios[1]*100:.0f}%)")
-    logger.info(f"Test:  {len(test_imgs)} ({ratios[2]*100:.0f}%)")
+    for name, ratio in zip(split_names, ratios):
+        logger.info(f"{name.capitalize() + ':':<6} {len(splits[name])} ({ratio*100:.0f}%)")
     logger.info(f"Config: {data_yaml}")
     logger.info("=" * 60)
 
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Detection Subscriber - reference consumer for `detect.py --publish`
+
+Receives the binary detection datagrams, prints them and reports latency
+(capture->publish, publish->receive, capture->receive).
+
+Simple usage:
+    python detect.py --publish udp://127.0.0.1:5555    # terminal 1
+    python subscriber.py                               # terminal 2
+
+Loopback latency test (no camera or model needed):
+    python subscriber.py --bench 5000
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from utils.label_mapper import TARGET_CLASSES
+from utils.publisher import (
+    DEFAULT_ENDPOINT,
+    DetectionPublisher,
+    DetectionSubscriber,
+    LatencyStats,
+)
+
+
+def run_publisher(endpoint: str, frames: int, rate: float, boxes: int, ready: threading.Event):
+    """Publish synthetic detections at a fixed rate (bench mode)."""
+    rng = np.random.default_rng(0)
+    xyxy = rng.uniform(0, 480, (boxes, 4)).astype(np.float32)
+    scores = rng.uniform(0.25, 1.0, boxes).astype(np.float32)
+    class_ids = rng.integers(0, len(TARGET_CLASSES), boxes)
+    track_ids = np.arange(boxes)
+
+    pub = DetectionPublisher(endpoint)
+    ready.wait()
+    period = 1.0 / rate if rate > 0 else 0.0
+    next_due = time.perf_counter()
+    for _ in range(frames):
+        pub.publish(time.monotonic_ns(), 640, 480, xyxy, scores, class_ids, track_ids)
+        if period:
+            next_due += period
+            time.sleep(max(0.0, next_due - time.perf_counter()))
+    pub.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Receive detections published by detect.py",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Simple usage:
+  python subscriber.py
+  python subscriber.py --endpoint unix:///tmp/waste_detections.sock
+
+Latency test on one machine:
+  python subscriber.py --bench 5000 --rate 200
+        """
+    )
+    parser.add_argument('--endpoint', default=DEFAULT_ENDPOINT,
+                        help=f'udp://host:port or unix:///path (default: {DEFAULT_ENDPOINT})')
+    parser.add_argument('--quiet', action='store_true',
+                        help='Only print the latency summary')
+    parser.add_argument('--bench', type=int, default=0, metavar='FRAMES',
+                        help='Publish N synthetic frames from this process and measure latency')
+    parser.add_argument('--rate', type=float, default=100.0,
+                        help='Bench publish rate in frames/second (default: 100)')
+    parser.add_argument('--boxes', type=int, default=10,
+                        help='Bench detections per frame (default: 10)')
+    args = parser.parse_args()
+
+    sub = DetectionSubscriber(args.endpoint)
+    stats = LatencyStats()
+    print(f"Listening on {args.endpoint}")
+
+    publisher = None
+    if args.bench:
+        ready = threading.Event()
+        publisher = threading.Thread(target=run_publisher, daemon=True,
+                                     args=(args.endpoint, args.bench, args.rate, args.boxes, ready))
+        publisher.start()
+        ready.set()
+
+    try:
+        while True:
+            received = sub.receive(timeout=1.0)
+            if received is None:
+                if publisher is not None and not publisher.is_alive():
+                    break
+                continue
+
+            frame, receive_ns = received
+            stats.add(frame, receive_ns)
+            if not args.quiet and not args.bench:
+                latency = (receive_ns - frame.capture_ns) / 1e6
+                items = ', '.join(
+                    f"{TARGET_CLASSES[d['class_id']] if d['class_id'] < len(TARGET_CLASSES) else d['class_id']}"
+                    f"{'#' + str(d['track_id']) if d['track_id'] >= 0 else ''}"
+                    f" {d['score']:.2f} {tuple(int(v) for v in d['box'])}"
+                    for d in frame.detections)
+                print(f"[{frame.seq}] {latency:.2f} ms | {items or '-'}")
+            if args.bench and len(stats.samples) + stats.lost >= args.bench:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sub.close()
+
+    print(stats.format())
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -8,6 +8,12 @@ Usage:
     python train.py --model yolov8n --epochs 100 --imgsz 640 --batch 16 --device 0
     python train.py --model yolov8s --epochs 50 --dry-run
     python train.py --model yolov8m --epochs 200 --patience 50 --resume
+
+When data.yaml lists a ``packed`` directory (split_and_prep.py --pack), the
+splits are read from packed shards instead of loose files (--no-packed to
+disable). When it lists a ``letterbox`` cache (prepare_cache.py) built for
+the requested --imgsz, images are read pre-decoded and resized from it
+(--no-letterbox to disable).
 """
 
 import argparse
@@ -15,8 +21,10 @@ from datetime import datetime
 from pathlib import Path
 
 import torch
+import yaml
 from ultralytics import YOLO
 
+from utils.letterbox_cache import cached_sizes
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -104,6 +112,10 @@ Training Parameters Explained:
                         help='Resume from checkpoint')
     parser.add_argument('--dry-run', action='store_true',
                         help='Test run (1 epoch only)')
+    parser.add_argument('--no-packed', action='store_true',
+                        help='Read loose image/label files even if data.yaml lists packed shards')
+    parser.add_argument('--no-letterbox', action='store_true',
+                        help='Decode images every epoch even if data.yaml lists a letterbox cache')
 
     args = parser.parse_args()
 
@@ -126,6 +138,29 @@ Training Parameters Explained:
     # Detect device
     device = get_device(args.device)
 
+    # Packed shards (split_and_prep.py --pack): a few large files instead of one per image
+    trainer = None
+    data_cfg = yaml.safe_load(data_yaml.read_text()) or {}
+    packed = data_cfg.get('packed') if not args.no_packed else None
+    if packed:
+        from utils.yolo_datasets import PackedDetectionTrainer
+        trainer = PackedDetectionTrainer
+
+    # Letterbox cache (prepare_cache.py): only valid for the size it was built at
+    letterbox = data_cfg.get('letterbox') if not args.no_letterbox else None
+    if letterbox:
+        sizes = cached_sizes(Path(letterbox), 'train')
+        if args.imgsz in sizes:
+            from utils.yolo_datasets import LetterboxDetectionTrainer
+            trainer = LetterboxDetectionTrainer
+            if not packed:
+                # Splits without a matching cache fall back to loose files, not packed shards
+                trainer = type('LetterboxDetectionTrainer', (LetterboxDetectionTrainer,), {'use_packed': False})
+        else:
+            logger.warning(f"Letterbox cache built for imgsz {sizes or 'none'}, not {args.imgsz}; "
+                           f"decoding images every epoch (prepare_cache.py --imgsz {args.imgsz})")
+            letterbox = None
+
     # Dry run mode
     if args.dry_run:
         logger.info("=" * 70)
@@ -173,6 +208,10 @@ Training Parameters Explained:
     logger.info(f"  Name:        {name}")
     logger.info(f"  Pretrained:  {pretrained}")
     logger.info(f"  Patience:    {args.patience}")
+    if packed:
+        logger.info(f"  Packed:      {packed}")
+    if letterbox:
+        logger.info(f"  Letterbox:   {letterbox} ({args.imgsz})")
     logger.info("")
 
     # Train model
@@ -181,6 +220,7 @@ Training Parameters Explained:
         logger.info("=" * 70)
 
         model.train(
+            trainer=trainer,
             data=str(data_yaml),
             epochs=args.epochs,
             imgsz=args.imgsz,
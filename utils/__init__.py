@@ -4,9 +4,24 @@ Klasifikasi Sampah - Utility Package
 This package contains helper modules for the waste classification pipeline:
 - logger: Logging configuration
 - image_utils: Image verification and hashing
-- label_mapper: Label standardization and mapping
+- label_mapper: Label standardization and mapping (memoized, batch cdist scoring, persisted decisions)
 - dataset_stats: Dataset statistics and reporting
 - annotation_parsers: Multi-format annotation parsing and conversion
+- json_stream: Incremental reader for very large JSON files (streaming COCO)
+- dataset_inventory: Single-pass os.scandir file inventory shared by detection and converters
+- image_index: One-pass filename index for annotation image lookups
+- file_cache: Persistent SQLite cache of per-file results (verification, hashes)
+- hashing: Buffered/mmap content hashing, parallel and cached (sha256, blake2b, xxhash)
+- near_duplicates: Perceptual hashes (dHash/pHash) and multi-index Hamming search for near-duplicate clusters
+- manifest: Conversion manifest for incremental re-conversion
+- output_layout: Collision-safe, dataset-prefixed and hash-sharded output names plus the source -> output map
+- annotation_store: Columnar (memory-mappable .npy) store of all processed labels
+- label_index: Stem -> class ids index of a labels/ folder (parallel, persisted, mtime-checked)
+- stratify: Vectorized multi-label iterative stratification and per-class split deviation report
+- packed_shards: Splits packed into a few large memory-mapped shard files (image + label records)
+- letterbox_cache: Decode-once, letterboxed uint8 image tensors (memory-mapped) for CPU training
+- yolo_datasets: Ultralytics datasets/trainers that read packed shards or the letterbox cache (train.py)
+- telemetry, overlay, recorder, publisher, multicam: Real-time loop helpers (detect.py)
 """
 
 __version__ = "1.0.0"
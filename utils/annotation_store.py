@@ -0,0 +1,283 @@
+"""
+Columnar annotation store for the processed dataset.
+
+Next to the per-image YOLO ``.txt`` files (which stay the training
+export), convert_datasets writes every annotation into a directory of
+typed ``.npy`` columns:
+
+    images.name.npy       <U   image path relative to images/ (sorted; the file name in the flat layout)
+    images.dataset.npy    int16 index into meta.json "datasets"
+    images.box_start.npy  int64 first row in the box table
+    images.box_count.npy  int32 number of boxes
+    boxes.image.npy       int32 row in the image table
+    boxes.class_id.npy    int16 class id
+    boxes.xywh.npy        float32 (N, 4) normalized x_center, y_center, width, height
+    meta.json             classes, datasets, counts
+
+Every column can be memory-mapped, so class distributions, per-image
+labels and box filters are answered without opening thousands of small
+files.
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+STORE_DIRNAME = 'annotations'
+STORE_VERSION = 1
+
+_COLUMNS = ('images.name', 'images.dataset', 'images.box_start', 'images.box_count',
+            'boxes.image', 'boxes.class_id', 'boxes.xywh')
+
+
+def read_yolo_label(label: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse YOLO label text into (class_ids int16, xywh float32 (N, 4)).
+
+    Example:
+        >>> class_ids, xywh = read_yolo_label("3 0.5 0.5 0.2 0.4\\n")
+    """
+    values = np.array(label.split(), dtype=np.float64).reshape(-1, 5)
+    return values[:, 0].astype(np.int16), values[:, 1:].astype(np.float32)
+
+
+class AnnotationStore:
+    """
+    Image table + box table held as numpy columns.
+
+    Example:
+        >>> store = AnnotationStore.load(Path("datasets/processed/annotations"))
+        >>> store.class_counts()
+        {0: 812, 1: 1503, ...}
+        >>> mask = store.filter(class_ids=[7], min_area=0.01)
+        >>> store.xywh[mask].shape
+        (4120, 4)
+    """
+
+    def __init__(self, names: np.ndarray, image_dataset: np.ndarray, box_start: np.ndarray,
+                 box_count: np.ndarray, box_image: np.ndarray, class_id: np.ndarray, xywh: np.ndarray,
+                 datasets: Sequence[str], classes: Sequence[str] = ()):
+        self.names = names
+        self.image_dataset = image_dataset
+        self.box_start = box_start
+        self.box_count = box_count
+        self.box_image = box_image
+        self.class_id = class_id
+        self.xywh = xywh
+        self.datasets = list(datasets)
+        self.classes = list(classes)
+
+    @property
+    def num_images(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_boxes(self) -> int:
+        return len(self.class_id)
+
+    # Construction ---------------------------------------------------------
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, np.ndarray, np.ndarray]],
+                  classes: Sequence[str] = ()) -> 'AnnotationStore':
+        """
+        Build a store from (image name, dataset, class_ids, xywh) rows.
+
+        Rows are sorted by image name; a later row for the same name wins.
+        """
+        by_name = {name: (dataset, class_ids, xywh) for name, dataset, class_ids, xywh in rows}
+        names = sorted(by_name)
+        datasets = sorted({by_name[n][0] for n in names})
+        dataset_code = {d: i for i, d in enumerate(datasets)}
+
+        counts = np.array([len(by_name[n][1]) for n in names], dtype=np.int32)
+        class_parts = [np.asarray(by_name[n][1], dtype=np.int16) for n in names]
+        xywh_parts = [np.asarray(by_name[n][2], dtype=np.float32).reshape(-1, 4) for n in names]
+        return cls(
+            names=np.array(names, dtype=str),
+            image_dataset=np.array([dataset_code[by_name[n][0]] for n in names], dtype=np.int16),
+            box_start=(np.cumsum(counts, dtype=np.int64) - counts),
+            box_count=counts,
+            box_image=np.repeat(np.arange(len(names), dtype=np.int32), counts),
+            class_id=np.concatenate(class_parts) if class_parts else np.zeros(0, np.int16),
+            xywh=np.concatenate(xywh_parts) if xywh_parts else np.zeros((0, 4), np.float32),
+            datasets=datasets,
+            classes=classes,
+        )
+
+    def rows(self) -> Iterable[Tuple[str, str, np.ndarray, np.ndarray]]:
+        """Iterate (image name, dataset, class_ids, xywh) rows."""
+        for i, name in enumerate(self.names.tolist()):
+            start, count = int(self.box_start[i]), int(self.box_count[i])
+            yield (name, self.datasets[self.image_dataset[i]],
+                   self.class_id[start:start + count], self.xywh[start:start + count])
+
+    def take(self, rows: np.ndarray) -> 'AnnotationStore':
+        """Store with the given image-table rows, in that order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        counts = self.box_count[rows]
+        new_start = np.cumsum(counts, dtype=np.int64) - counts
+        # Gather each selected image's box segment in one indexing operation
+        box_idx = np.repeat(self.box_start[rows] - new_start, counts) + np.arange(counts.sum())
+        return AnnotationStore(
+            names=self.names[rows],
+            image_dataset=self.image_dataset[rows],
+            box_start=new_start,
+            box_count=counts,
+            box_image=np.repeat(np.arange(len(rows), dtype=np.int32), counts),
+            class_id=self.class_id[box_idx],
+            xywh=self.xywh[box_idx],
+            datasets=self.datasets,
+            classes=self.classes,
+        )
+
+    def subset(self, image_mask: np.ndarray) -> 'AnnotationStore':
+        """Store with only the images selected by a boolean mask over the image table."""
+        return self.take(np.flatnonzero(image_mask))
+
+    def merged(self, rows: Iterable[Tuple[str, str, np.ndarray, np.ndarray]],
+               keep: Optional[Iterable[str]] = None) -> 'AnnotationStore':
+        """
+        Update the store for an incremental run.
+
+        Args:
+            rows: New or re-converted (image name, dataset, class_ids, xywh) rows
+            keep: Names of images that still exist; others are dropped
+                (default: keep all)
+        """
+        new = AnnotationStore.from_rows(rows, self.classes)
+        mask = np.ones(self.num_images, dtype=bool)
+        if keep is not None:
+            mask &= np.isin(self.names, np.array(list(keep), dtype=str))
+        if new.num_images:
+            mask &= ~np.isin(self.names, new.names)
+        old = self.subset(mask)
+
+        datasets = sorted(set(old.datasets) | set(new.datasets))
+
+        def codes(store):
+            lookup = np.array([datasets.index(d) for d in store.datasets] or [0], dtype=np.int16)
+            return lookup[store.image_dataset]
+
+        combined = AnnotationStore(
+            names=np.concatenate([old.names, new.names]),
+            image_dataset=np.concatenate([codes(old), codes(new)]),
+            box_start=np.concatenate([old.box_start, new.box_start + old.num_boxes]),
+            box_count=np.concatenate([old.box_count, new.box_count]),
+            box_image=np.zeros(0, np.int32),  # rebuilt by take()
+            class_id=np.concatenate([old.class_id, new.class_id]),
+            xywh=np.concatenate([old.xywh, new.xywh]),
+            datasets=datasets,
+            classes=self.classes,
+        )
+        return combined.take(np.argsort(combined.names, kind='stable'))
+
+    # Persistence ----------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> 'AnnotationStore':
+        """Load a store directory (memory-mapped by default)."""
+        path = Path(path)
+        meta = json.loads((path / 'meta.json').read_text())
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported annotation store version: {meta.get('version')}")
+        mode = 'r' if mmap else None
+        cols = {name: np.load(path / f'{name}.npy', mmap_mode=mode) for name in _COLUMNS}
+        return cls(cols['images.name'], cols['images.dataset'], cols['images.box_start'],
+                   cols['images.box_count'], cols['boxes.image'], cols['boxes.class_id'],
+                   cols['boxes.xywh'], meta['datasets'], meta.get('classes', []))
+
+    def save(self, path: Path):
+        """Write the store, replacing any previous one at ``path`` atomically."""
+        path = Path(path)
+        tmp = path.with_name(path.name + '.tmp')
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        for name, array in zip(_COLUMNS, (self.names, self.image_dataset, self.box_start, self.box_count,
+                                          self.box_image, self.class_id, self.xywh)):
+            np.save(tmp / f'{name}.npy', np.ascontiguousarray(array))
+        (tmp / 'meta.json').write_text(json.dumps({
+            'version': STORE_VERSION,
+            'classes': self.classes,
+            'datasets': self.datasets,
+            'num_images': self.num_images,
+            'num_boxes': self.num_boxes,
+        }, indent=2))
+
+        old = path.with_name(path.name + '.old')
+        if path.exists():
+            path.rename(old)
+        tmp.rename(path)
+        if old.exists():
+            shutil.rmtree(old)
+        logger.info(f"Saved annotation store: {path} ({self.num_images} images, {self.num_boxes} boxes)")
+
+    # Queries --------------------------------------------------------------
+
+    def index_of(self, name: str) -> Optional[int]:
+        """Row of an image in the image table (binary search on the sorted names)."""
+        i = int(np.searchsorted(self.names, name))
+        return i if i < self.num_images and self.names[i] == name else None
+
+    def boxes_for(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(class_ids, xywh) of one image; empty arrays if unknown."""
+        i = self.index_of(name)
+        if i is None:
+            return np.zeros(0, np.int16), np.zeros((0, 4), np.float32)
+        start, count = int(self.box_start[i]), int(self.box_count[i])
+        return self.class_id[start:start + count], self.xywh[start:start + count]
+
+    def image_labels(self) -> Dict[str, List[int]]:
+        """Image name -> list of class ids, in label-file order."""
+        class_ids = self.class_id.tolist()
+        ends = (self.box_start + self.box_count).tolist()
+        return {name: class_ids[start:end]
+                for name, start, end in zip(self.names.tolist(), self.box_start.tolist(), ends)}
+
+    def class_counts(self, box_mask: Optional[np.ndarray] = None) -> Dict[int, int]:
+        """Boxes per class (optionally only boxes selected by ``box_mask``)."""
+        class_id = self.class_id if box_mask is None else self.class_id[box_mask]
+        counts = np.bincount(class_id.astype(np.int64), minlength=len(self.classes))
+        return {i: int(c) for i, c in enumerate(counts) if c}
+
+    def images_per_class(self) -> Dict[int, int]:
+        """Number of images containing at least one box of each class."""
+        pairs = np.unique(np.stack([self.box_image.astype(np.int64), self.class_id.astype(np.int64)]), axis=1)
+        counts = np.bincount(pairs[1], minlength=len(self.classes)) if pairs.size else np.zeros(0, np.int64)
+        return {i: int(c) for i, c in enumerate(counts) if c}
+
+    def filter(self, class_ids: Optional[Iterable[int]] = None, datasets: Optional[Iterable[str]] = None,
+               min_area: Optional[float] = None, max_area: Optional[float] = None) -> np.ndarray:
+        """
+        Boolean mask over the box table.
+
+        Args:
+            class_ids: Keep boxes of these classes
+            datasets: Keep boxes from images of these source datasets
+            min_area, max_area: Keep boxes whose normalized area w*h is in range
+        """
+        mask = np.ones(self.num_boxes, dtype=bool)
+        if class_ids is not None:
+            mask &= np.isin(self.class_id, np.fromiter(class_ids, dtype=np.int64))
+        if datasets is not None:
+            codes = [i for i, d in enumerate(self.datasets) if d in set(datasets)]
+            mask &= np.isin(self.image_dataset[self.box_image], codes)
+        if min_area is not None or max_area is not None:
+            area = self.xywh[:, 2] * self.xywh[:, 3]
+            if min_area is not None:
+                mask &= area >= min_area
+            if max_area is not None:
+                mask &= area <= max_area
+        return mask
+
+    def images_with(self, box_mask: np.ndarray) -> np.ndarray:
+        """Names of images that have at least one box selected by ``box_mask``."""
+        return self.names[np.unique(self.box_image[box_mask])]
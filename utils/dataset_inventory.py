@@ -0,0 +1,246 @@
+"""
+Single-pass file inventory of a raw dataset directory.
+
+Format detection and the converters used to glob and rglob the same tree
+several times per dataset. Instead, each dataset is walked once with
+os.scandir and every file is recorded by directory, by extension and by
+the role of its top-level directory (images, labels, annotations, split,
+other). Detectors and converters query the inventory in memory.
+
+The inventory can be persisted between runs. A cached inventory is
+validated by the mtime of every directory (adding, removing or renaming
+a file changes its directory's mtime); only directories that changed are
+listed again.
+"""
+
+import csv
+import json
+import os
+from collections import defaultdict
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+INVENTORY_VERSION = 1
+
+# Role of a top-level directory, by (case-sensitive) name
+DIR_ROLES = {
+    'images': 'images',
+    'JPEGImages': 'images',
+    'labels': 'labels',
+    'Annotations': 'annotations',
+    'train': 'split', 'TRAIN': 'split',
+    'val': 'split', 'VAL': 'split',
+    'valid': 'split', 'validation': 'split', 'VALIDATION': 'split',
+    'test': 'split', 'TEST': 'split',
+}
+
+
+def _join(rel_dir: str, name: str) -> str:
+    return f'{rel_dir}/{name}' if rel_dir else name
+
+
+class DatasetInventory:
+    """
+    In-memory listing of every file and directory under a dataset root.
+
+    Directories are keyed by their posix path relative to the root
+    ('' is the root itself).
+
+    Example:
+        >>> inv = DatasetInventory.scan(Path("./datasets/raw/TACO"))
+        >>> inv.files_in('Annotations', ('.xml',))[:1]
+        [PosixPath('datasets/raw/TACO/Annotations/000001.xml')]
+        >>> inv.by_ext['.json']
+        ['data/annotations.json']
+    """
+
+    def __init__(self, root: Path, dirs: Dict[str, Tuple[int, List[str], List[str]]],
+                 cache_path: Optional[Path] = None):
+        self.root = Path(root)
+        self.cache_path = cache_path
+        # rel_dir -> (mtime_ns, sorted file names, sorted subdirectory names)
+        self.dirs = dirs
+        self.rescanned = 0
+        self._reindex()
+
+    def _reindex(self):
+        self.by_ext: Dict[str, List[str]] = defaultdict(list)
+        self.by_role: Dict[str, List[str]] = defaultdict(list)
+        for rel_dir in sorted(self.dirs):
+            role = self.role(rel_dir)
+            for name in self.dirs[rel_dir][1]:
+                rel = _join(rel_dir, name)
+                self.by_ext[os.path.splitext(name)[1].lower()].append(rel)
+                self.by_role[role].append(rel)
+
+    def __len__(self) -> int:
+        return sum(len(files) for _, files, _ in self.dirs.values())
+
+    # Construction ---------------------------------------------------------
+
+    @staticmethod
+    def _list_dir(path: str) -> Tuple[int, List[str], List[str]]:
+        # mtime is taken before listing, so a file added meanwhile invalidates the entry
+        mtime = os.stat(path).st_mtime_ns
+        files, subdirs = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    (subdirs if entry.is_dir() else files).append(entry.name)
+                except OSError:
+                    continue
+        return mtime, sorted(files), sorted(subdirs)
+
+    @classmethod
+    def _walk(cls, root: Path, rel_dir: str, dirs: Dict[str, Tuple[int, List[str], List[str]]]):
+        stack = [rel_dir]
+        while stack:
+            rel = stack.pop()
+            try:
+                dirs[rel] = cls._list_dir(os.path.join(root, rel) if rel else str(root))
+            except OSError as e:
+                logger.debug(f"Cannot list {root / rel}: {e}")
+                continue
+            stack.extend(_join(rel, name) for name in dirs[rel][2])
+
+    @classmethod
+    def scan(cls, root: Path) -> 'DatasetInventory':
+        """Walk ``root`` once with os.scandir."""
+        dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        cls._walk(Path(root), '', dirs)
+        return cls(root, dirs)
+
+    @classmethod
+    def cached(cls, root: Path, cache_path: Path) -> 'DatasetInventory':
+        """
+        Load a persisted inventory for ``root`` and refresh changed directories,
+        or scan and save a new one.
+        """
+        root, cache_path = Path(root), Path(cache_path)
+        inventory = None
+        if cache_path.exists():
+            try:
+                data = json.loads(cache_path.read_text())
+                if data.get('version') == INVENTORY_VERSION and data.get('root') == str(root.resolve()):
+                    dirs = {rel: (mtime, files, subdirs) for rel, (mtime, files, subdirs) in data['dirs'].items()}
+                    inventory = cls(root, dirs, cache_path)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable inventory {cache_path}: {e}")
+
+        if inventory is None:
+            inventory = cls.scan(root)
+            inventory.save(cache_path)
+        elif inventory.refresh():
+            logger.debug(f"Inventory {cache_path}: re-listed {inventory.rescanned} changed directories")
+            inventory.save(cache_path)
+        return inventory
+
+    def refresh(self) -> int:
+        """Re-list directories whose mtime changed; returns how many were listed."""
+        listed = 0
+        for rel in sorted(self.dirs):
+            if rel not in self.dirs:
+                continue  # parent was removed
+            path = os.path.join(self.root, rel) if rel else str(self.root)
+            try:
+                st_mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                st_mtime = None
+            if st_mtime == self.dirs[rel][0]:
+                continue
+
+            old_subdirs = set(self.dirs[rel][2])
+            try:
+                self.dirs[rel] = self._list_dir(path)
+                listed += 1
+            except OSError:
+                self._drop(rel)
+                continue
+            new_subdirs = set(self.dirs[rel][2])
+            for name in old_subdirs - new_subdirs:
+                self._drop(_join(rel, name))
+            for name in sorted(new_subdirs - old_subdirs):
+                before = len(self.dirs)
+                self._walk(self.root, _join(rel, name), self.dirs)
+                listed += len(self.dirs) - before
+        if listed:
+            self._reindex()
+        self.rescanned = listed
+        return listed
+
+    def _drop(self, rel_dir: str):
+        """Forget a directory and everything below it."""
+        prefix = rel_dir + '/'
+        for rel in [d for d in self.dirs if d == rel_dir or d.startswith(prefix)]:
+            del self.dirs[rel]
+
+    def save(self, cache_path: Path):
+        """Persist the inventory as JSON."""
+        cache_path = Path(cache_path)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'version': INVENTORY_VERSION, 'root': str(self.root.resolve()),
+                                   'dirs': self.dirs}))
+        tmp.replace(cache_path)
+        self.cache_path = cache_path
+
+    # Queries --------------------------------------------------------------
+
+    @staticmethod
+    def role(rel_dir: str) -> str:
+        """Role of the top-level directory containing ``rel_dir`` ('root' for the root)."""
+        if not rel_dir:
+            return 'root'
+        return DIR_ROLES.get(rel_dir.split('/', 1)[0], 'other')
+
+    def has_dir(self, rel_dir: str) -> bool:
+        return rel_dir in self.dirs
+
+    def subdirs(self, rel_dir: str = '') -> List[str]:
+        """Relative paths of the direct subdirectories of ``rel_dir``."""
+        entry = self.dirs.get(rel_dir)
+        return [_join(rel_dir, name) for name in entry[2]] if entry else []
+
+    def names_in(self, rel_dir: str, suffixes: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        File names directly inside ``rel_dir``.
+
+        Args:
+            rel_dir: Directory relative to the root
+            suffixes: Keep names ending with one of these (case-sensitive,
+                like ``glob('*.jpg')``)
+        """
+        entry = self.dirs.get(rel_dir)
+        if not entry:
+            return []
+        if suffixes is None:
+            return list(entry[1])
+        suffixes = tuple(suffixes)
+        return [name for name in entry[1] if name.endswith(suffixes)]
+
+    def files_in(self, rel_dir: str, suffixes: Optional[Iterable[str]] = None) -> List[Path]:
+        """Paths of the files directly inside ``rel_dir`` (see names_in)."""
+        base = self.root / rel_dir if rel_dir else self.root
+        return [base / name for name in self.names_in(rel_dir, suffixes)]
+
+    def find(self, pattern: str) -> List[Path]:
+        """Files anywhere in the tree whose name matches ``pattern`` (like ``rglob``)."""
+        return [self.root / rel for rel in self.rel_paths()
+                if fnmatchcase(rel.rsplit('/', 1)[-1], pattern)]
+
+    def rel_paths(self) -> List[str]:
+        """Every file path relative to the root (posix), sorted."""
+        return sorted(_join(rel_dir, name) for rel_dir, (_, files, _) in self.dirs.items() for name in files)
+
+    def csv_header(self, rel_path: str) -> List[str]:
+        """Column names of a CSV file, reading only its first line."""
+        try:
+            with open(self.root / rel_path, newline='', encoding='utf-8-sig', errors='replace') as f:
+                return next(csv.reader(f), [])
+        except OSError:
+            return []
@@ -2,22 +2,29 @@
 Dataset statistics and reporting utilities.
 
 Provides functions to calculate class distributions, count images,
-and detect dataset formats.
+and detect dataset formats (from a single-pass DatasetInventory).
 """
 
+import os
 from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+from .dataset_inventory import DatasetInventory
+from .file_cache import FileCache
 from .image_utils import verify_image
+from .output_layout import scan_files
 
 
-def count_images(directory: Path) -> int:
+def count_images(directory: Path, level: str = 'header', cache: Optional[FileCache] = None) -> int:
     """
     Count valid image files in a directory.
 
     Args:
-        directory: Path to directory containing images
+        directory: Path to directory containing images (searched recursively,
+            so sharded output folders are counted too)
+        level: Verification level, 'header' or 'full' (see verify_image)
+        cache: Optional FileCache shared with convert_datasets/split_and_prep
 
     Returns:
         Number of valid image files
@@ -32,9 +39,9 @@ def count_images(directory: Path) -> int:
     valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp'}
     count = 0
 
-    for file_path in directory.rglob('*'):
-        if file_path.suffix.lower() in valid_extensions:
-            is_valid, _ = verify_image(file_path)
+    for entry in scan_files(directory):
+        if os.path.splitext(entry.name)[1].lower() in valid_extensions:
+            is_valid, _ = verify_image(Path(entry.path), level, cache)
             if is_valid:
                 count += 1
 
@@ -61,47 +68,44 @@ def get_class_distribution(annotations: List[Tuple[str, str]]) -> Dict[str, int]
     return dict(Counter(class_names))
 
 
-def detect_coco_format(dataset_path: Path) -> bool:
+COCO_JSON_PATTERNS = ('annotations.json', 'instances_*.json')
+
+
+def _inventory(dataset_path: Path, inventory: Optional[DatasetInventory]) -> DatasetInventory:
+    return inventory if inventory is not None else DatasetInventory.scan(dataset_path)
+
+
+def find_coco_json(dataset_path: Path, inventory: Optional[DatasetInventory] = None) -> List[Path]:
+    """All COCO annotation files in a dataset (every split file), sorted."""
+    inventory = _inventory(dataset_path, inventory)
+    return sorted({path for pattern in COCO_JSON_PATTERNS for path in inventory.find(pattern)})
+
+
+def detect_coco_format(dataset_path: Path, inventory: Optional[DatasetInventory] = None) -> bool:
     """
     Detect if dataset is in COCO JSON format.
 
     Args:
         dataset_path: Path to dataset root directory
+        inventory: Pre-scanned inventory of the dataset (scanned if omitted)
 
     Returns:
         True if COCO format detected, False otherwise
 
     Detection pattern:
         - File named 'annotations.json' or matching 'instances_*.json'
-        - Contains 'images' and 'annotations' keys
+          anywhere in the dataset
     """
-    # Check for common COCO annotation file names
-    coco_files = [
-        dataset_path / 'annotations.json',
-        dataset_path / 'instances_train.json',
-        dataset_path / 'instances_val.json',
-    ]
-
-    for coco_file in coco_files:
-        if coco_file.exists():
-            return True
-
-    # Check for any annotations.json in subdirectories
-    for json_file in dataset_path.rglob('annotations.json'):
-        return True
+    return bool(find_coco_json(dataset_path, inventory))
 
-    for json_file in dataset_path.rglob('instances_*.json'):
-        return True
 
-    return False
-
-
-def detect_voc_format(dataset_path: Path) -> bool:
+def detect_voc_format(dataset_path: Path, inventory: Optional[DatasetInventory] = None) -> bool:
     """
     Detect if dataset is in Pascal VOC XML format.
 
     Args:
         dataset_path: Path to dataset root directory
+        inventory: Pre-scanned inventory of the dataset (scanned if omitted)
 
     Returns:
         True if VOC format detected, False otherwise
@@ -110,60 +114,40 @@ def detect_voc_format(dataset_path: Path) -> bool:
         - 'Annotations' folder containing .xml files
         - 'JPEGImages' or 'images' folder containing images
     """
-    annotations_dir = dataset_path / 'Annotations'
-    
-    if not annotations_dir.exists():
+    inventory = _inventory(dataset_path, inventory)
+    if not inventory.names_in('Annotations', ('.xml',)):
         return False
-
-    # Check for XML files in Annotations directory
-    xml_files = list(annotations_dir.glob('*.xml'))
-    if not xml_files:
-        return False
-
-    # Check for images directory
-    images_dir = dataset_path / 'JPEGImages'
-    if not images_dir.exists():
-        images_dir = dataset_path / 'images'
-        if not images_dir.exists():
-            return False
-
-    return True
+    return inventory.has_dir('JPEGImages') or inventory.has_dir('images')
 
 
-def detect_yolo_format(dataset_path: Path) -> bool:
+def detect_yolo_format(dataset_path: Path, inventory: Optional[DatasetInventory] = None) -> bool:
     """
     Detect if dataset is in YOLO format.
 
     Args:
         dataset_path: Path to dataset root directory
+        inventory: Pre-scanned inventory of the dataset (scanned if omitted)
 
     Returns:
         True if YOLO format detected, False otherwise
 
     Detection pattern:
         - 'images' and 'labels' folders exist
-        - .txt files in labels folder with matching image names
+        - .txt files in labels folder
     """
-    images_dir = dataset_path / 'images'
-    labels_dir = dataset_path / 'labels'
-
-    if not (images_dir.exists() and labels_dir.exists()):
-        return False
-
-    # Check for matching .txt files
-    txt_files = list(labels_dir.glob('*.txt'))
-    if not txt_files:
+    inventory = _inventory(dataset_path, inventory)
+    if not (inventory.has_dir('images') and inventory.has_dir('labels')):
         return False
-
-    return True
+    return bool(inventory.names_in('labels', ('.txt',)))
 
 
-def detect_class_folders(dataset_path: Path) -> bool:
+def detect_class_folders(dataset_path: Path, inventory: Optional[DatasetInventory] = None) -> bool:
     """
     Detect if dataset uses class-based folder structure.
 
     Args:
         dataset_path: Path to dataset root directory
+        inventory: Pre-scanned inventory of the dataset (scanned if omitted)
 
     Returns:
         True if class folders detected, False otherwise
@@ -172,36 +156,38 @@ def detect_class_folders(dataset_path: Path) -> bool:
         - Multiple subdirectories
         - Each subdirectory contains only images (no annotations)
     """
-    subdirs = [d for d in dataset_path.iterdir() if d.is_dir()]
-    
+    inventory = _inventory(dataset_path, inventory)
+    subdirs = inventory.subdirs()
+
     if len(subdirs) < 2:
         return False
 
     # Check if subdirectories contain only images
     for subdir in subdirs:
         # Skip common annotation directories
-        if subdir.name in ['Annotations', 'labels', 'images', 'JPEGImages']:
+        if inventory.role(subdir) in ('images', 'labels', 'annotations'):
             return False
 
         # Check for image files
-        image_files = list(subdir.glob('*.jpg')) + list(subdir.glob('*.png'))
-        if not image_files:
+        if not inventory.names_in(subdir, ('.jpg', '.png')):
             return False
 
         # Check for annotation files (should not exist in class folders)
-        annotation_files = list(subdir.glob('*.xml')) + list(subdir.glob('*.txt')) + list(subdir.glob('*.json'))
-        if annotation_files:
+        if inventory.names_in(subdir, ('.xml', '.txt', '.json')):
             return False
 
     return True
 
 
-def detect_csv_format(dataset_path: Path) -> bool:
+def detect_csv_format(dataset_path: Path, inventory: Optional[DatasetInventory] = None) -> bool:
     """
     Detect if dataset uses CSV annotations.
 
+    Only the header line of the first CSV file is read.
+
     Args:
         dataset_path: Path to dataset root directory
+        inventory: Pre-scanned inventory of the dataset (scanned if omitted)
 
     Returns:
         True if CSV format detected, False otherwise
@@ -210,31 +196,28 @@ def detect_csv_format(dataset_path: Path) -> bool:
         - .csv file exists
         - Contains columns: filename, xmin, ymin, xmax, ymax, class
     """
-    csv_files = list(dataset_path.glob('*.csv'))
-    
+    inventory = _inventory(dataset_path, inventory)
+    csv_files = inventory.names_in('', ('.csv',))
+
     if not csv_files:
         return False
 
-    # Check first CSV file for expected columns
-    import pandas as pd
-    try:
-        df = pd.read_csv(csv_files[0], nrows=1)
-        required_columns = {'filename', 'xmin', 'ymin', 'xmax', 'ymax', 'class'}
-        
-        # Check if all required columns are present (case-insensitive)
-        df_columns = set(col.lower() for col in df.columns)
-        
-        return required_columns.issubset(df_columns)
-    except Exception:
-        return False
+    required_columns = {'filename', 'xmin', 'ymin', 'xmax', 'ymax', 'class'}
+    # Check if all required columns are present (case-insensitive)
+    columns = set(col.lower() for col in inventory.csv_header(csv_files[0]))
+    return required_columns.issubset(columns)
 
 
-def detect_dataset_format(dataset_path: Path) -> str:
+def detect_dataset_format(dataset_path: Path, inventory: Optional[DatasetInventory] = None) -> str:
     """
     Auto-detect dataset format using heuristics.
 
+    The dataset is walked once and every detector queries the same
+    inventory.
+
     Args:
         dataset_path: Path to dataset root directory
+        inventory: Pre-scanned inventory of the dataset (scanned if omitted)
 
     Returns:
         Format string: 'coco', 'voc', 'yolo', 'class_folders', 'csv', or 'unknown'
@@ -244,19 +227,21 @@ def detect_dataset_format(dataset_path: Path) -> str:
         >>> print(f"Detected format: {format_type}")
         Detected format: coco
     """
-    if detect_coco_format(dataset_path):
+    inventory = _inventory(dataset_path, inventory)
+
+    if detect_coco_format(dataset_path, inventory):
         return 'coco'
     
-    if detect_voc_format(dataset_path):
+    if detect_voc_format(dataset_path, inventory):
         return 'voc'
     
-    if detect_yolo_format(dataset_path):
+    if detect_yolo_format(dataset_path, inventory):
         return 'yolo'
     
-    if detect_csv_format(dataset_path):
+    if detect_csv_format(dataset_path, inventory):
         return 'csv'
     
-    if detect_class_folders(dataset_path):
+    if detect_class_folders(dataset_path, inventory):
         return 'class_folders'
     
     return 'unknown'
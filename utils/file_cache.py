@@ -0,0 +1,135 @@
+"""
+Persistent per-file result cache shared by the dataset tools.
+
+Results computed from a file's content (image verification, content
+hashes) are stored in a small SQLite database keyed by kind, absolute path,
+size and mtime. convert_datasets, split_and_prep and dataset_stats use the
+same database (./runs/cache/file_cache.sqlite by default), so a file that
+was already checked by one tool is not read again by another. A changed
+size or mtime invalidates the entry.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_CACHE_PATH = Path('./runs/cache/file_cache.sqlite')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (kind, path)
+)
+"""
+
+
+class FileCache:
+    """
+    (kind, path, size, mtime) -> JSON value store.
+
+    Safe to share between threads (one connection per thread) and to pass
+    to process-pool workers (each process reconnects).
+
+    Example:
+        >>> cache = FileCache(Path("runs/cache/file_cache.sqlite"))
+        >>> cache.get("verify", Path("a.jpg"))           # None on first use
+        >>> cache.put("verify", Path("a.jpg"), ["full", None])
+        >>> cache.get("verify", Path("a.jpg"))
+        ['full', None]
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            # The cache can always be rebuilt, so trade durability for speed
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[os.stat_result]:
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    def get(self, kind: str, path: Path, st: Optional[os.stat_result] = None) -> Optional[Any]:
+        """Cached value for ``path`` if its size and mtime are unchanged, else None."""
+        st = st or self._stat(path)
+        row = None
+        if st is not None:
+            row = self._conn().execute(
+                'SELECT value FROM entries WHERE kind = ? AND path = ? AND size = ? AND mtime_ns = ?',
+                (kind, os.path.abspath(path), st.st_size, st.st_mtime_ns)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, kind: str, path: Path, value: Any, st: Optional[os.stat_result] = None):
+        """Store ``value`` for the current size and mtime of ``path`` (ignored if it is gone)."""
+        st = st or self._stat(path)
+        if st is None:
+            return
+        self._conn().execute(
+            'INSERT OR REPLACE INTO entries (kind, path, size, mtime_ns, value) VALUES (?, ?, ?, ?, ?)',
+            (kind, os.path.abspath(path), st.st_size, st.st_mtime_ns, json.dumps(value)))
+
+    def copy(self, kind: str, src: Path, dst: Path):
+        """
+        Give ``dst`` the entry of ``src`` (same content, e.g. after a copy2 or link).
+
+        Nothing is stored unless ``src`` has a current entry and ``dst`` has
+        the same size.
+        """
+        src_st, dst_st = self._stat(src), self._stat(dst)
+        if src_st is None or dst_st is None or src_st.st_size != dst_st.st_size:
+            return
+        row = self._conn().execute(
+            'SELECT value FROM entries WHERE kind = ? AND path = ? AND size = ? AND mtime_ns = ?',
+            (kind, os.path.abspath(src), src_st.st_size, src_st.st_mtime_ns)).fetchone()
+        if row is not None:
+            self._conn().execute(
+                'INSERT OR REPLACE INTO entries (kind, path, size, mtime_ns, value) VALUES (?, ?, ?, ?, ?)',
+                (kind, os.path.abspath(dst), dst_st.st_size, dst_st.st_mtime_ns, row[0]))
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return f"File cache {self.path}: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,112 @@
+"""
+File materialization helpers for the dataset pipeline.
+
+Places a source file at a destination by copying or by linking
+(hardlink, reflink/copy-on-write clone, symlink). Linking avoids writing a
+second copy of every image into processed/all and train/val/test. When a
+link is not possible (different filesystem, unsupported filesystem, no
+symlink permission) it falls back to a normal copy automatically.
+"""
+
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+LINK_MODES = ('copy', 'hardlink', 'reflink', 'symlink')
+
+# ioctl request for a copy-on-write clone on Linux (btrfs, XFS, bcachefs, ...)
+_FICLONE = 0x40049409
+
+
+def _reflink(src: Path, dst: Path):
+    """Clone src into dst sharing data blocks (copy-on-write)."""
+    if not sys.platform.startswith('linux'):
+        raise OSError("reflink is only implemented for Linux (FICLONE)")
+    import fcntl
+
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            dst.unlink()
+            raise
+    shutil.copystat(src, dst)
+
+
+def materialize(src: Path, dst: Path, mode: str = 'copy') -> Tuple[str, int]:
+    """
+    Place ``src`` at ``dst`` using the requested link mode.
+
+    Args:
+        src: Existing source file
+        dst: Destination path (replaced if it exists)
+        mode: 'copy', 'hardlink', 'reflink' or 'symlink'
+
+    Returns:
+        Tuple of (mode actually used, bytes not written thanks to linking)
+        - mode is 'copy' when linking was not possible
+
+    Example:
+        >>> used, saved = materialize(Path("raw/a.jpg"), Path("all/images/a.jpg"), "hardlink")
+        >>> print(used, saved)
+        hardlink 48213
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode: {mode} (choose from {', '.join(LINK_MODES)})")
+
+    if mode != 'copy':
+        if os.path.lexists(dst):
+            if mode == 'hardlink' and os.path.samefile(src, dst):
+                return mode, os.path.getsize(src)
+            os.unlink(dst)
+        try:
+            if mode == 'hardlink':
+                os.link(src, dst)
+            elif mode == 'symlink':
+                os.symlink(Path(src).resolve(), dst)
+            else:
+                _reflink(Path(src), Path(dst))
+            return mode, os.path.getsize(src)
+        except (OSError, NotImplementedError) as e:
+            logger.debug(f"{mode} failed for {src} -> {dst} ({e}), copying instead")
+
+    # A link left by an earlier run may point at src itself (copy2 would raise SameFileError)
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    shutil.copy2(src, dst)
+    return 'copy', 0
+
+
+class LinkStats:
+    """Thread-safe tally of materialize() outcomes."""
+
+    def __init__(self, requested: str = 'copy'):
+        self.requested = requested
+        self.counts: Dict[str, int] = {}
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def add(self, used: str, saved: int):
+        with self._lock:
+            self.counts[used] = self.counts.get(used, 0) + 1
+            self.bytes_saved += saved
+
+    @property
+    def fallbacks(self) -> int:
+        """Files copied although a link mode was requested."""
+        return self.counts.get('copy', 0) if self.requested != 'copy' else 0
+
+    def summary(self) -> str:
+        parts = ', '.join(f"{mode}: {count}" for mode, count in sorted(self.counts.items()))
+        text = f"Link mode '{self.requested}' -> {parts or 'no files'}; avoided writing {self.bytes_saved / 1e6:.1f} MB"
+        if self.fallbacks:
+            text += f" ({self.fallbacks} fell back to copy)"
+        return text
@@ -0,0 +1,181 @@
+"""
+Content hashing for deduplication and the conversion manifest.
+
+Files are read with a reusable 1 MB buffer (readinto, no per-chunk
+allocation) or memory-mapped when large, hashed on a thread pool (hashlib
+releases the GIL while digesting) and cached in the shared FileCache keyed
+by path, size and mtime, so repeated runs only hash new or changed files.
+
+Supported digests: sha256 (default; fastest on CPUs with SHA extensions),
+blake2b, sha1, md5 and, when the optional ``xxhash`` package is
+installed, xxh3_128 / xxh64.
+"""
+
+import hashlib
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from tqdm import tqdm
+
+from .file_cache import FileCache
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+HASH_ALGORITHMS = ('sha256', 'blake2b', 'sha1', 'md5', 'xxh3_128', 'xxh64')
+CHUNK_SIZE = 1 << 20
+# Files at least this large are memory-mapped and digested in one call
+MMAP_THRESHOLD = 64 << 20
+
+_buffers = threading.local()
+
+
+def _new_hasher(algorithm: str):
+    if algorithm.startswith('xxh'):
+        try:
+            import xxhash
+        except ImportError:
+            raise ImportError(f"'{algorithm}' needs the xxhash package: pip install xxhash")
+        return getattr(xxhash, algorithm)()
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f"Unknown hash algorithm: {algorithm} (choose from {', '.join(HASH_ALGORITHMS)})")
+    return hashlib.new(algorithm)
+
+
+def hash_file(path: Path, algorithm: str = 'sha256', chunk_size: int = CHUNK_SIZE) -> str:
+    """
+    Hex digest of a file's content.
+
+    Args:
+        path: File to hash
+        algorithm: One of HASH_ALGORITHMS
+        chunk_size: Read buffer size for files below MMAP_THRESHOLD
+
+    Example:
+        >>> hash_file(Path("img.jpg"), "blake2b")
+        '9f2c...'
+    """
+    hasher = _new_hasher(algorithm)
+    with open(path, 'rb', buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher.update(mapped)
+            return hasher.hexdigest()
+
+        buf = getattr(_buffers, 'buf', None)
+        if buf is None or len(buf) != chunk_size:
+            buf = _buffers.buf = bytearray(chunk_size)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            hasher.update(view[:n])
+    return hasher.hexdigest()
+
+
+def cached_hash(path: Path, algorithm: str = 'sha256', cache: Optional[FileCache] = None) -> str:
+    """hash_file() through ``cache`` (computed and stored on a miss)."""
+    if cache is None:
+        return hash_file(path, algorithm)
+    kind = f'hash:{algorithm}'
+    st = os.stat(path)
+    digest = cache.get(kind, path, st)
+    if digest is None:
+        digest = hash_file(path, algorithm)
+        cache.put(kind, path, digest, st)
+    return digest
+
+
+class HashStats:
+    """Counts and throughput of a hash_files() run."""
+
+    def __init__(self, algorithm: str):
+        self.algorithm = algorithm
+        self.hashed = 0
+        self.cached = 0
+        self.failed = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        text = (f"Hashed {self.hashed} files ({self.bytes / 1e6:.1f} MB, {self.algorithm}) "
+                f"in {self.seconds:.2f}s = {self.mb_per_s:.0f} MB/s; {self.cached} from cache")
+        if self.failed:
+            text += f"; {self.failed} unreadable"
+        return text
+
+
+def hash_files(paths: Iterable[Path], algorithm: str = 'sha256', workers: Optional[int] = None,
+               cache: Optional[FileCache] = None, desc: str = "Hashing") -> Tuple[Dict[Path, str], HashStats]:
+    """
+    Hash many files in parallel, reusing cached digests.
+
+    Args:
+        paths: Files to hash
+        algorithm: One of HASH_ALGORITHMS
+        workers: Hashing threads (default: CPU count)
+        cache: Optional FileCache; hits are not read, new digests are stored
+        desc: Progress bar label
+
+    Returns:
+        Tuple of (path -> hex digest, HashStats). Unreadable files are
+        logged and left out.
+
+    Example:
+        >>> digests, stats = hash_files(sorted(Path("images").glob("*.jpg")), "blake2b", cache=FileCache())
+        >>> print(stats.summary())
+        Hashed 1200 files (310.4 MB, blake2b) in 0.41s = 757 MB/s; 8800 from cache
+    """
+    _new_hasher(algorithm)  # fail fast on an unknown/unavailable algorithm
+    kind = f'hash:{algorithm}'
+    stats = HashStats(algorithm)
+    digests: Dict[Path, str] = {}
+    todo = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Cannot hash {path}: {e}")
+            stats.failed += 1
+            continue
+        digest = cache.get(kind, path, st) if cache is not None else None
+        if digest is not None:
+            digests[path] = digest
+            stats.cached += 1
+        else:
+            todo.append((path, st))
+
+    def work(item):
+        path, _ = item
+        try:
+            return hash_file(path, algorithm)
+        except OSError as e:
+            logger.warning(f"Cannot hash {path}: {e}")
+            return None
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool, tqdm(total=len(todo), desc=desc) as bar:
+        for (path, st), digest in zip(todo, pool.map(work, todo)):
+            bar.update()
+            if digest is None:
+                stats.failed += 1
+                continue
+            digests[path] = digest
+            stats.hashed += 1
+            stats.bytes += st.st_size
+            if cache is not None:
+                cache.put(kind, path, digest, st)
+    stats.seconds = time.perf_counter() - start
+    return digests, stats
@@ -0,0 +1,108 @@
+"""
+Filename index for locating images referenced by annotation files.
+
+COCO and CSV annotations name images by file name (sometimes with a
+relative directory). Instead of walking the dataset tree once per image,
+the tree is walked once and every file is indexed by basename, giving
+constant-time lookups. Persisting between runs is done one level down, by
+the DatasetInventory the index is built from (see from_inventory).
+"""
+
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _normalize(filename: str) -> str:
+    name = filename.replace('\\', '/')
+    while name.startswith('./'):
+        name = name[2:]
+    return name.lstrip('/')
+
+
+class ImageIndex:
+    """
+    One-pass filename -> path index of a dataset directory.
+
+    Lookup order matches the old per-image search: ``root/filename``,
+    ``root/images/filename``, then any file whose relative path ends with
+    ``filename``. When several files share a basename, the first one in
+    sorted order is used and the lookup is counted as ambiguous.
+
+    Example:
+        >>> index = ImageIndex.build(Path("./datasets/raw/TACO"))
+        >>> index.find("batch_1/000006.jpg")
+        PosixPath('datasets/raw/TACO/data/batch_1/000006.jpg')
+    """
+
+    def __init__(self, root: Path, rel_paths: Iterable[str]):
+        self.root = Path(root)
+        self.ambiguous_lookups = 0
+        self.rel_paths = sorted(rel_paths)
+        self._all = set(self.rel_paths)
+        self._by_name: Dict[str, List[str]] = defaultdict(list)
+        for rel in self.rel_paths:
+            self._by_name[rel.rsplit('/', 1)[-1]].append(rel)
+
+    def __len__(self) -> int:
+        return len(self.rel_paths)
+
+    @staticmethod
+    def scan(root: Path) -> List[str]:
+        """Walk ``root`` once and return all file paths relative to it (posix)."""
+        rel_paths = []
+        root_str = str(root)
+        for dirpath, _, filenames in os.walk(root_str):
+            rel_dir = os.path.relpath(dirpath, root_str).replace(os.sep, '/')
+            prefix = '' if rel_dir == '.' else rel_dir + '/'
+            rel_paths.extend(prefix + name for name in filenames)
+        return rel_paths
+
+    @classmethod
+    def build(cls, root: Path) -> 'ImageIndex':
+        """Build the index with a single directory walk."""
+        return cls(root, cls.scan(root))
+
+    @classmethod
+    def from_inventory(cls, inventory) -> 'ImageIndex':
+        """Index the files of an already scanned DatasetInventory (no extra walk)."""
+        return cls(inventory.root, inventory.rel_paths())
+
+    def duplicates(self) -> Dict[str, List[str]]:
+        """Basenames that occur more than once, mapped to their relative paths."""
+        return {name: paths for name, paths in self._by_name.items() if len(paths) > 1}
+
+    def _lookup(self, name: str) -> Optional[str]:
+        for candidate in (name, f'images/{name}'):
+            if candidate in self._all:
+                return candidate
+
+        basename = name.rsplit('/', 1)[-1]
+        matches = self._by_name.get(basename, [])
+        if '/' in name:
+            matches = [rel for rel in matches if rel.endswith('/' + name)]
+        if not matches:
+            return None
+        if len(matches) > 1:
+            self.ambiguous_lookups += 1
+            logger.debug(f"Ambiguous image name '{name}': {len(matches)} matches, using {matches[0]}")
+        return matches[0]
+
+    def find(self, filename: str) -> Optional[Path]:
+        """
+        Resolve an annotation file name to an existing path.
+
+        Args:
+            filename: File name as written in the annotation (may contain directories)
+
+        Returns:
+            Path to the image, or None if not found
+        """
+        name = _normalize(filename)
+        rel = self._lookup(name)
+        return self.root / rel if rel is not None else None
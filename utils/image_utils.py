@@ -4,19 +4,53 @@ Image utility functions for the waste classification pipeline.
 Provides image verification, hashing for deduplication, and validation.
 """
 
-import hashlib
+import os
+import stat
 from pathlib import Path
 from typing import Optional, Tuple
 
 from PIL import Image
 
+from .file_cache import FileCache
+from .hashing import hash_file
 
-def verify_image(image_path: Path) -> Tuple[bool, Optional[str]]:
+
+# 'header' reads only the file header (format, dimensions); 'full' also decodes every pixel
+VERIFY_LEVELS = ('header', 'full')
+SUPPORTED_FORMATS = ('JPEG', 'PNG', 'BMP', 'JPG')
+
+
+def _verify_uncached(image_path: Path, level: str) -> Optional[str]:
+    try:
+        with Image.open(image_path) as img:
+            width, height = img.size
+            if width <= 0 or height <= 0:
+                return f"Invalid dimensions: {width}x{height}"
+
+            if img.format not in SUPPORTED_FORMATS:
+                return f"Unsupported format: {img.format}"
+
+            if level == 'full':
+                img.load()  # Decode all pixel data (catches truncated/corrupt files)
+        return None
+
+    except Exception as e:
+        return f"Failed to open image: {str(e)}"
+
+
+def verify_image(image_path: Path, level: str = 'header',
+                 cache: Optional[FileCache] = None) -> Tuple[bool, Optional[str]]:
     """
     Verify that an image file is valid and readable.
 
+    The file is opened once. With a cache, a result for the same path,
+    size and mtime is reused: a 'full' result answers both levels, a
+    'header' result answers only 'header' (and any failure answers both).
+
     Args:
         image_path: Path to image file
+        level: 'header' (format and dimensions only) or 'full' (decode pixels)
+        cache: Optional FileCache shared between tools
 
     Returns:
         Tuple of (is_valid, error_message)
@@ -24,44 +58,44 @@ def verify_image(image_path: Path) -> Tuple[bool, Optional[str]]:
         - error_message: None if valid, error description if invalid
 
     Example:
-        >>> is_valid, error = verify_image(Path("image.jpg"))
+        >>> is_valid, error = verify_image(Path("image.jpg"), level="full")
         >>> if not is_valid:
         >>>     print(f"Invalid image: {error}")
     """
-    if not image_path.exists():
+    if level not in VERIFY_LEVELS:
+        raise ValueError(f"Unknown verify level: {level} (choose from {', '.join(VERIFY_LEVELS)})")
+
+    try:
+        st = os.stat(image_path)
+    except OSError:
         return False, f"File does not exist: {image_path}"
 
-    if not image_path.is_file():
+    if not stat.S_ISREG(st.st_mode):
         return False, f"Path is not a file: {image_path}"
 
-    try:
-        with Image.open(image_path) as img:
-            img.verify()  # Verify image integrity
-        
-        # Re-open to check format and dimensions (verify() closes the file)
-        with Image.open(image_path) as img:
-            width, height = img.size
-            if width <= 0 or height <= 0:
-                return False, f"Invalid dimensions: {width}x{height}"
-            
-            if img.format not in ['JPEG', 'PNG', 'BMP', 'JPG']:
-                return False, f"Unsupported format: {img.format}"
-        
-        return True, None
+    if cache is not None:
+        cached = cache.get('verify', image_path, st)
+        if cached is not None:
+            cached_level, error = cached
+            if error is not None or VERIFY_LEVELS.index(cached_level) >= VERIFY_LEVELS.index(level):
+                return error is None, error
 
-    except Exception as e:
-        return False, f"Failed to open image: {str(e)}"
+    error = _verify_uncached(image_path, level)
+    if cache is not None:
+        cache.put('verify', image_path, [level, error], st)
+    return error is None, error
 
 
-def hash_image(image_path: Path) -> str:
+def hash_image(image_path: Path, algorithm: str = 'sha256') -> str:
     """
-    Compute SHA-256 hash of image file content for deduplication.
+    Compute a content hash of an image file for deduplication.
 
     Args:
         image_path: Path to image file
+        algorithm: Digest name (see utils.hashing.HASH_ALGORITHMS)
 
     Returns:
-        Hexadecimal SHA-256 hash string
+        Hexadecimal hash string
 
     Example:
         >>> hash1 = hash_image(Path("img1.jpg"))
@@ -69,14 +103,7 @@ def hash_image(image_path: Path) -> str:
         >>> if hash1 == hash2:
         >>>     print("Duplicate images detected")
     """
-    sha256_hash = hashlib.sha256()
-    
-    with open(image_path, "rb") as f:
-        # Read in chunks to handle large files efficiently
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    
-    return sha256_hash.hexdigest()
+    return hash_file(image_path, algorithm)
 
 
 def get_image_info(image_path: Path) -> dict:
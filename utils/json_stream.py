@@ -0,0 +1,129 @@
+"""
+Incremental reader for large JSON documents.
+
+Reads a top-level JSON object in fixed-size chunks and yields the elements
+of its top-level arrays one at a time with json.JSONDecoder.raw_decode,
+so memory is bounded by the largest single element instead of the file
+size. Pure Python, no extra dependency.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence, TextIO, Tuple
+
+_WHITESPACE = ' \t\n\r'
+# Characters that can follow a complete value inside an object or array
+_DELIMITERS = frozenset(',:]}' + _WHITESPACE)
+
+
+class _ChunkReader:
+    """Character buffer over a text file with raw_decode-based value parsing."""
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        if self.eof:
+            return False
+        if self.pos > self.chunk_size:
+            # Drop the consumed prefix so the buffer does not grow with the file
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf += data
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(self.chunk_size):
+                return ''
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found {found!r} in JSON stream")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number cut at the buffer edge ("1." | "5") decodes as a shorter
+                # value: only accept it once a delimiter follows, or at end of file
+                if self.eof or (end < len(self.buf) and self.buf[end] in _DELIMITERS):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Value spans past the buffer: read more (doubling, so huge values stay linear)
+            self._fill(size)
+            size *= 2
+
+
+def iter_json_arrays(path: Path, keys: Optional[Sequence[str]] = None,
+                     chunk_size: int = 1 << 20) -> Iterator[Tuple[str, Any]]:
+    """
+    Stream the elements of the top-level arrays of a JSON object.
+
+    Args:
+        path: JSON file whose top level is an object
+        keys: Only yield elements of these arrays (default: all arrays);
+            other values are decoded one element at a time and discarded
+        chunk_size: Characters read per chunk
+
+    Yields:
+        (array key, element) in file order
+
+    Example:
+        >>> for key, item in iter_json_arrays(Path("instances_train.json"), ["images", "annotations"]):
+        ...     print(key, item["id"])
+    """
+    wanted = None if keys is None else set(keys)
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _ChunkReader(f, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            keep = wanted is None or key in wanted
+            if reader.peek() == '[':
+                reader.pos += 1
+                if reader.peek() == ']':
+                    reader.pos += 1
+                else:
+                    while True:
+                        item = reader.value()
+                        if keep:
+                            yield key, item
+                        if reader.peek() == ',':
+                            reader.pos += 1
+                            continue
+                        reader.expect(']')
+                        break
+            else:
+                reader.value()
+
+            if reader.peek() == ',':
+                reader.pos += 1
+                continue
+            reader.expect('}')
+            break
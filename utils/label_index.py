@@ -0,0 +1,236 @@
+"""
+Label index for the split step.
+
+Maps every label file stem to its class ids (and so its box count) with
+one parallel pass over labels/**/*.txt (flat or sharded, see
+utils.output_layout), held as flat numpy arrays. The
+splitter, the distribution report and data.yaml validation all query it
+instead of re-reading label files. The index can be persisted as .npz;
+on load only files whose size or mtime changed (or that are new) are read
+again.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .logger import setup_logger
+from .output_layout import scan_files
+
+logger = setup_logger(__name__)
+
+INDEX_VERSION = 1
+# Label files parsed per worker task
+_CHUNK = 512
+
+
+def parse_class_ids(text: str) -> np.ndarray:
+    """Class ids (first column) of YOLO label text, int16."""
+    try:
+        return np.array(text.split(), dtype=np.float64).reshape(-1, 5)[:, 0].astype(np.int16)
+    except ValueError:
+        # Ragged lines (e.g. segment labels): take the first token of each line
+        return np.array([int(float(line.split()[0])) for line in text.splitlines() if line.strip()],
+                        dtype=np.int16)
+
+
+def _read_chunk(paths: List[str]) -> List[np.ndarray]:
+    out = []
+    for path in paths:
+        try:
+            with open(path, 'r') as f:
+                out.append(parse_class_ids(f.read()))
+        except (OSError, ValueError, IndexError) as e:
+            logger.warning(f"Unreadable label {path}: {e}")
+            out.append(np.zeros(0, np.int16))
+    return out
+
+
+class LabelIndex:
+    """
+    Stem -> class ids for every label file of a dataset split source.
+
+    Example:
+        >>> index = LabelIndex.build(Path("datasets/processed/all/labels"), cache_path=Path("label_index.npz"))
+        >>> index.class_ids("img_001")
+        array([7, 7, 2], dtype=int16)
+        >>> index.distribution(["img_001", "img_002"])
+        {2: 1, 7: 3}
+    """
+
+    def __init__(self, stems: np.ndarray, class_id: np.ndarray, box_count: np.ndarray,
+                 sizes: Optional[np.ndarray] = None, mtimes: Optional[np.ndarray] = None):
+        self.stems = stems
+        self.class_id = class_id
+        self.box_count = box_count
+        self.box_start = np.cumsum(box_count, dtype=np.int64) - box_count
+        self.sizes = sizes if sizes is not None else np.zeros(len(stems), np.int64)
+        self.mtimes = mtimes if mtimes is not None else np.zeros(len(stems), np.int64)
+        self._row = {stem: i for i, stem in enumerate(stems.tolist())}
+        self.reread = 0
+
+    def __len__(self) -> int:
+        return len(self.stems)
+
+    def __contains__(self, stem: str) -> bool:
+        return stem in self._row
+
+    # Construction ---------------------------------------------------------
+
+    @classmethod
+    def from_parts(cls, parts: Dict[str, Tuple[np.ndarray, int, int]]) -> 'LabelIndex':
+        """Build from stem -> (class ids, size, mtime_ns)."""
+        stems = sorted(parts)
+        counts = np.array([len(parts[s][0]) for s in stems], dtype=np.int32)
+        class_parts = [np.asarray(parts[s][0], dtype=np.int16) for s in stems]
+        return cls(
+            stems=np.array(stems, dtype=str),
+            class_id=np.concatenate(class_parts) if class_parts else np.zeros(0, np.int16),
+            box_count=counts,
+            sizes=np.array([parts[s][1] for s in stems], dtype=np.int64),
+            mtimes=np.array([parts[s][2] for s in stems], dtype=np.int64),
+        )
+
+    @classmethod
+    def from_store(cls, store, saved_ns: int, labels_dir: Path, workers: Optional[int] = None,
+                   cache_path: Optional[Path] = None) -> 'LabelIndex':
+        """
+        Index ``labels_dir`` using an AnnotationStore (keyed by image name -> stem)
+        instead of reading label files that are older than the store.
+
+        Label files modified after the store was saved (``saved_ns``) or
+        missing from it are read again; files deleted since are dropped.
+        """
+        labels = {Path(name).stem: ids for name, ids in store.image_labels().items()}
+        return cls.build(labels_dir, workers, cache_path, store_labels=labels, store_ns=saved_ns)
+
+    @classmethod
+    def build(cls, labels_dir: Path, workers: Optional[int] = None,
+              cache_path: Optional[Path] = None, store_labels: Optional[Dict[str, List[int]]] = None,
+              store_ns: int = 0) -> 'LabelIndex':
+        """
+        Index every .txt under ``labels_dir`` (including shard subfolders) in one parallel pass.
+
+        Args:
+            labels_dir: Directory of YOLO label files
+            workers: Reader threads (default: CPU count)
+            cache_path: Optional .npz to reuse and update; files with an
+                unchanged size and mtime are not read
+            store_labels: Optional stem -> class ids known as of ``store_ns``
+                (see from_store); files not modified since are not read
+        """
+        labels_dir = Path(labels_dir)
+        listing = {}
+        for entry in scan_files(labels_dir, ('.txt',)):
+            st = entry.stat()
+            listing[entry.name[:-4]] = (entry.path, st.st_size, st.st_mtime_ns)
+
+        previous = cls.load(cache_path) if cache_path is not None and Path(cache_path).exists() else None
+        parts: Dict[str, Tuple[np.ndarray, int, int]] = {}
+        todo = []
+        for stem, (path, size, mtime) in listing.items():
+            row = previous._row.get(stem) if previous is not None else None
+            if row is not None and previous.sizes[row] == size and previous.mtimes[row] == mtime:
+                parts[stem] = (previous.class_ids(stem), size, mtime)
+            elif store_labels is not None and stem in store_labels and mtime <= store_ns:
+                parts[stem] = (np.array(store_labels[stem], np.int16), size, mtime)
+            else:
+                todo.append(stem)
+
+        if todo:
+            chunks = [todo[i:i + _CHUNK] for i in range(0, len(todo), _CHUNK)]
+            workers = max(1, workers or os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(_read_chunk, [[listing[s][0] for s in chunk] for chunk in chunks])
+                for chunk, class_ids in zip(chunks, results):
+                    for stem, ids in zip(chunk, class_ids):
+                        parts[stem] = (ids, listing[stem][1], listing[stem][2])
+
+        index = cls.from_parts(parts)
+        index.reread = len(todo)
+        logger.info(f"Label index: {len(index)} files, {index.num_boxes} boxes "
+                    f"({len(todo)} read, {len(index) - len(todo)} reused)")
+        if cache_path is not None and (todo or previous is None or len(previous) != len(index)):
+            index.save(cache_path)
+        return index
+
+    # Persistence ----------------------------------------------------------
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp.npz')
+        np.savez(tmp, version=INDEX_VERSION, stems=self.stems, class_id=self.class_id,
+                 box_count=self.box_count, sizes=self.sizes, mtimes=self.mtimes)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['LabelIndex']:
+        """Load a persisted index (None if unreadable or from another version)."""
+        try:
+            with np.load(path) as data:
+                if int(data['version']) != INDEX_VERSION:
+                    return None
+                return cls(data['stems'], data['class_id'], data['box_count'], data['sizes'], data['mtimes'])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable label index {path}: {e}")
+            return None
+
+    # Queries --------------------------------------------------------------
+
+    @property
+    def num_boxes(self) -> int:
+        return len(self.class_id)
+
+    def class_ids(self, stem: str) -> np.ndarray:
+        """Class ids of one label file, in file order (empty if unknown)."""
+        row = self._row.get(stem)
+        if row is None:
+            return np.zeros(0, np.int16)
+        start = int(self.box_start[row])
+        return self.class_id[start:start + int(self.box_count[row])]
+
+    def rows(self, stems: Iterable[str]) -> np.ndarray:
+        """Rows of the given stems (unknown stems are skipped)."""
+        return np.array([self._row[s] for s in stems if s in self._row], dtype=np.int64)
+
+    def first_class(self, stems: Iterable[str]) -> np.ndarray:
+        """First class id of each stem, -1 when it has no boxes."""
+        stems = list(stems)
+        out = np.full(len(stems), -1, dtype=np.int64)
+        for i, stem in enumerate(stems):
+            row = self._row.get(stem)
+            if row is not None and self.box_count[row]:
+                out[i] = self.class_id[self.box_start[row]]
+        return out
+
+    def count_matrix(self, stems: Iterable[str], num_classes: int = 0) -> np.ndarray:
+        """
+        (len(stems), C) boxes per class per stem; unknown stems give zero rows.
+
+        C is ``num_classes`` or, if larger, the highest class id seen + 1.
+        """
+        stems = list(stems)
+        rows = np.array([self._row.get(s, -1) for s in stems], dtype=np.int64)
+        known = np.flatnonzero(rows >= 0)
+        counts = self.box_count[rows[known]].astype(np.int64)
+        starts = np.repeat(self.box_start[rows[known]] - (np.cumsum(counts) - counts), counts)
+        class_id = self.class_id[starts + np.arange(int(counts.sum()))].astype(np.int64)
+        width = max(num_classes, int(class_id.max()) + 1 if len(class_id) else 0)
+        flat = np.repeat(known, counts) * width + class_id
+        return np.bincount(flat, minlength=len(stems) * width).astype(np.int32).reshape(len(stems), width)
+
+    def distribution(self, stems: Optional[Iterable[str]] = None) -> Dict[int, int]:
+        """Boxes per class over the given stems (default: all)."""
+        if stems is None:
+            class_id = self.class_id
+        else:
+            rows = self.rows(stems)
+            counts = self.box_count[rows]
+            starts = np.repeat(self.box_start[rows] - (np.cumsum(counts) - counts), counts)
+            class_id = self.class_id[starts + np.arange(int(counts.sum()))]
+        values, counts = np.unique(class_id.astype(np.int64), return_counts=True)
+        return {int(v): int(c) for v, c in zip(values, counts)}
@@ -3,12 +3,32 @@ Label mapping and standardization for waste classification.
 
 Provides fuzzy matching, keyword extraction, and fallback strategies
 to map heterogeneous class names to standardized target classes.
+
+map_label is memoized per normalized label. The keyword and substring
+stages use one precompiled regex each instead of looping over every
+keyword. LabelMapper maps a whole vocabulary at once (one rapidfuzz cdist
+call for all labels that need fuzzy scoring) and persists its decisions to
+a reviewable CSV, so later runs reuse them instead of scoring again.
 """
 
-from typing import Dict, List, Tuple
+import csv
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
 from rapidfuzz import fuzz, process
 
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+LABEL_DECISIONS_NAME = 'label_decisions.csv'
+FUZZY_THRESHOLD = 80
+# Distinct (label, classes, overrides) results kept by map_label
+MEMO_SIZE = 65536
+
 
 # Target classes for waste classification (10 classes from garbage-classification-v2)
 TARGET_CLASSES = [
@@ -64,6 +84,7 @@ MANUAL_CLASS_MAPPINGS = {
 }
 
 
+@lru_cache(maxsize=MEMO_SIZE)
 def normalize_label(label: str) -> str:
     """
     Normalize a label string for comparison.
@@ -81,6 +102,86 @@ def normalize_label(label: str) -> str:
     return label.lower().strip().replace('_', ' ').replace('-', ' ')
 
 
+_KEYWORD_GROUPS = tuple((target, tuple(words)) for target, words in MATERIAL_KEYWORDS.items())
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex matching the longest of ``words`` at a position (alternatives factored into a trie)."""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Greedy: try the longer words first, stop here if a word ends at this node
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+@lru_cache(maxsize=None)
+def _compile_matcher(target_classes: Tuple[str, ...]) -> Tuple[re.Pattern, Dict[str, int]]:
+    """
+    One keyword automaton for the substring and keyword stages, and word -> rank.
+
+    Ranks 0..T-1 are the target classes (substring match), T.. the
+    MATERIAL_KEYWORDS classes in order (keyword match). The pattern is a
+    trie inside a lookahead, so it reports the longest word starting at
+    every position; a word's rank is the lowest rank of it and of the words
+    that are its prefixes (they match at the same position). The lowest
+    rank over all matches is what the nested "for class: for word: if word
+    in label" loops would return.
+    """
+    rank: Dict[str, int] = {}
+    groups = [(target,) for target in target_classes] + [words for _, words in _KEYWORD_GROUPS]
+    for i, words in enumerate(groups):
+        for word in words:
+            if word:
+                rank.setdefault(word, i)
+    best = {word: min(r for other, r in rank.items() if word.startswith(other)) for word in rank}
+    if not best:
+        return re.compile(r'(?!)'), best
+    return re.compile('(?=(' + _trie_pattern(best) + '))'), best
+
+
+def _best_ranks(texts: Sequence[str], target_classes: Tuple[str, ...]) -> np.ndarray:
+    """Lowest matching rank per normalized label (-1: no match), one regex pass over all labels."""
+    pattern, rank = _compile_matcher(target_classes)
+    none = len(target_classes) + len(_KEYWORD_GROUPS)
+    best = np.full(len(texts), none, dtype=np.int64)
+    if texts:
+        lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=len(texts))
+        starts = np.cumsum(lengths) - lengths
+        # Words never contain "\n", so no match spans two labels
+        hits = [(m.start(), rank[m.group(1)]) for m in pattern.finditer('\n'.join(texts))]
+        if hits:
+            pos, ranks = np.array(hits, dtype=np.int64).T
+            np.minimum.at(best, np.searchsorted(starts, pos, side='right') - 1, ranks)
+    best[best == none] = -1
+    return best
+
+
+def _best_rank(text: str, target_classes: Tuple[str, ...]) -> int:
+    """_best_ranks for a single label (no numpy overhead)."""
+    pattern, rank = _compile_matcher(target_classes)
+    return min((rank[word] for word in pattern.findall(text)), default=-1)
+
+
+def _from_rank(rank: int, target_classes: Tuple[str, ...]) -> Optional[Tuple[str, str, float]]:
+    """(target, 'substring' | 'keyword', confidence) for a _best_ranks value, None for -1."""
+    if rank < 0:
+        return None
+    if rank < len(target_classes):
+        return target_classes[rank], "substring", 0.95
+    return _KEYWORD_GROUPS[rank - len(target_classes)][0], "keyword", 0.90
+
+
 def map_label_exact(source_label: str, target_classes: List[str] = None) -> Tuple[str, str, float]:
     """
     Attempt exact case-insensitive match.
@@ -112,7 +213,8 @@ def map_label_exact(source_label: str, target_classes: List[str] = None) -> Tupl
     return None, "exact", 0.0
 
 
-def map_label_fuzzy(source_label: str, target_classes: List[str] = None, threshold: int = 80) -> Tuple[str, str, float]:
+def map_label_fuzzy(source_label: str, target_classes: List[str] = None,
+                    threshold: int = FUZZY_THRESHOLD) -> Tuple[str, str, float]:
     """
     Attempt fuzzy string matching using Levenshtein distance.
 
@@ -127,7 +229,7 @@ def map_label_fuzzy(source_label: str, target_classes: List[str] = None, thresho
     Example:
         >>> target, method, conf = map_label_fuzzy("platic")  # typo
         >>> print(f"{target} via {method} ({conf:.2f})")
-        plastic via fuzzy (0.83)
+        plastic via fuzzy (0.92)
     """
     if target_classes is None:
         target_classes = TARGET_CLASSES
@@ -168,11 +270,10 @@ def map_label_substring(source_label: str, target_classes: List[str] = None) ->
     if target_classes is None:
         target_classes = TARGET_CLASSES
 
-    normalized = normalize_label(source_label)
-    
-    for target in target_classes:
-        if target in normalized:
-            return target, "substring", 0.95
+    targets = tuple(target_classes)
+    mapped = _from_rank(_best_rank(normalize_label(source_label), targets), targets)
+    if mapped and mapped[1] == "substring":
+        return mapped
     
     return None, "substring", 0.0
 
@@ -181,6 +282,9 @@ def map_label_keyword(source_label: str) -> Tuple[str, str, float]:
     """
     Map using material keywords (e.g., "aluminum_can" -> "metal").
 
+    Classes are tried in MATERIAL_KEYWORDS order, so a keyword listed
+    under two classes ("bottle") maps to the first one.
+
     Args:
         source_label: Label to map
 
@@ -190,18 +294,43 @@ def map_label_keyword(source_label: str) -> Tuple[str, str, float]:
     Example:
         >>> target, method, conf = map_label_keyword("aluminum_foil")
         >>> print(f"{target} via {method} ({conf})")
-        metal via keyword (0.90)
+        metal via keyword (0.9)
     """
-    normalized = normalize_label(source_label)
-    
-    for target_class, keywords in MATERIAL_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in normalized:
-                return target_class, "keyword", 0.90
+    mapped = _from_rank(_best_rank(normalize_label(source_label), ()), ())
+    if mapped:
+        return mapped
     
     return None, "keyword", 0.0
 
 
+@lru_cache(maxsize=MEMO_SIZE)
+def _map_normalized(normalized: str, target_classes: Tuple[str, ...],
+                    manual: Tuple[Tuple[str, str], ...]) -> Tuple[str, str, float]:
+    # 1. Manual override - provided mappings first, then MANUAL_CLASS_MAPPINGS
+    overrides = dict(manual)
+    if normalized in overrides:
+        return overrides[normalized], "manual", 1.0
+    if normalized in MANUAL_CLASS_MAPPINGS:
+        return MANUAL_CLASS_MAPPINGS[normalized], "manual", 1.0
+
+    # 2. Exact match
+    if normalized in target_classes:
+        return normalized, "exact", 1.0
+
+    # 3. Fuzzy match
+    result = process.extractOne(normalized, target_classes, scorer=fuzz.ratio, score_cutoff=FUZZY_THRESHOLD)
+    if result:
+        return result[0], "fuzzy", result[1] / 100.0
+
+    # 4.-5. Substring and keyword match (one regex pass)
+    mapped = _from_rank(_best_rank(normalized, target_classes), target_classes)
+    if mapped:
+        return mapped
+
+    # 6. Fallback to "trash" (general/mixed waste)
+    return "trash", "fallback", 0.50
+
+
 def map_label(
     source_label: str,
     target_classes: List[str] = None,
@@ -216,7 +345,10 @@ def map_label(
     3. Fuzzy match (Levenshtein distance)
     4. Substring match
     5. Keyword match
-    6. Fallback to "other"
+    6. Fallback to "trash"
+
+    Results are memoized per normalized label (see clear_label_cache).
+    For a whole vocabulary, LabelMapper.map_batch is faster.
 
     Args:
         source_label: Label to map
@@ -227,42 +359,153 @@ def map_label(
         Tuple of (target_class, method, confidence)
 
     Example:
-        >>> target, method, conf = map_label("PET_bottle")
+        >>> target, method, conf = map_label("aluminium_can")
         >>> print(f"Mapped '{target}' via {method} ({conf:.2f})")
-        Mapped 'plastic' via keyword (0.90)
+        Mapped 'metal' via keyword (0.90)
     """
-    if target_classes is None:
-        target_classes = TARGET_CLASSES
+    targets = tuple(target_classes) if target_classes is not None else tuple(TARGET_CLASSES)
+    manual = tuple(sorted(manual_mappings.items())) if manual_mappings else ()
+    return _map_normalized(normalize_label(source_label), targets, manual)
 
-    normalized = normalize_label(source_label)
 
-    # 1. Manual override - check both provided mappings and default MANUAL_CLASS_MAPPINGS
-    if manual_mappings and normalized in manual_mappings:
-        return manual_mappings[normalized], "manual", 1.0
-    
-    # Check default manual mappings
-    if normalized in MANUAL_CLASS_MAPPINGS:
-        return MANUAL_CLASS_MAPPINGS[normalized], "manual", 1.0
+def clear_label_cache():
+    """Forget memoized results (needed after editing MANUAL_CLASS_MAPPINGS or MATERIAL_KEYWORDS at runtime)."""
+    global _KEYWORD_GROUPS
+    _KEYWORD_GROUPS = tuple((target, tuple(words)) for target, words in MATERIAL_KEYWORDS.items())
+    _compile_matcher.cache_clear()
+    _map_normalized.cache_clear()
+    normalize_label.cache_clear()
 
-    # 2. Exact match
-    target, method, conf = map_label_exact(source_label, target_classes)
-    if target:
-        return target, method, conf
 
-    # 3. Fuzzy match
-    target, method, conf = map_label_fuzzy(source_label, target_classes)
-    if target:
-        return target, method, conf
+class LabelMapper:
+    """
+    Batch label mapping with persisted, reviewable decisions.
 
-    # 4. Substring match
-    target, method, conf = map_label_substring(source_label, target_classes)
-    if target:
-        return target, method, conf
+    Gives the same results as map_label. Labels without a manual or exact
+    match are fuzzy-scored together in one rapidfuzz ``cdist`` call over
+    the target classes. Every decision is kept in memory, and ``save``
+    writes them all to a CSV (label, target, method, confidence). A later
+    mapper loaded from that file reuses the decisions instead of scoring
+    again. To override one, edit its target (and set its method to e.g.
+    'reviewed'); manual and exact rows are always recomputed from the
+    current configuration.
 
-    # 5. Keyword match
-    target, method, conf = map_label_keyword(source_label)
-    if target:
-        return target, method, conf
+    Example:
+        >>> mapper = LabelMapper(decisions_path=Path("datasets/processed/label_decisions.csv"))
+        >>> mapper.map_batch(["aluminium_can", "platic", "Cardboard"])
+        [('metal', 'keyword', 0.9), ('plastic', 'fuzzy', 0.923...), ('cardboard', 'manual', 1.0)]
+        >>> mapper.save()
+    """
 
-    # 6. Fallback to "trash" (general/mixed waste)
-    return "trash", "fallback", 0.50
+    def __init__(self, target_classes: Optional[List[str]] = None, manual_mappings: Optional[Dict[str, str]] = None,
+                 threshold: int = FUZZY_THRESHOLD, decisions_path: Optional[Path] = None, reuse: bool = True):
+        self.target_classes = tuple(target_classes) if target_classes is not None else tuple(TARGET_CLASSES)
+        # Provided overrides win over MANUAL_CLASS_MAPPINGS, as in map_label
+        self.manual = {**MANUAL_CLASS_MAPPINGS, **(manual_mappings or {})}
+        self.threshold = threshold
+        self.decisions_path = Path(decisions_path) if decisions_path is not None else None
+        self.decisions: Dict[str, Tuple[str, str, float]] = {}
+        # Rows as read from the decisions file, to tell whether saving would change it
+        self._saved: Dict[str, Tuple[str, str, float]] = {}
+        # Loaded rows that are decided again when seen (manual/exact, or target no longer a class)
+        self._recheck = set()
+        self.reused = 0
+        self.scored = 0
+        self._dirty = False
+        if self.decisions_path is not None and reuse and self.decisions_path.exists():
+            self.load(self.decisions_path)
+
+    def __len__(self) -> int:
+        return len(self.decisions)
+
+    def load(self, path: Path) -> int:
+        """Reuse decisions from a CSV written by save (returns rows taken)."""
+        count = 0
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                label, target, method = row['label'], row['target'], row['method']
+                self.decisions[label] = self._saved[label] = (target, method, float(row['confidence']))
+                if method in ('manual', 'exact') or target not in self.target_classes and target != 'trash':
+                    self._recheck.add(label)
+                else:
+                    count += 1
+        logger.info(f"Label decisions: reusing {count} from {path}")
+        return count
+
+    def save(self, path: Optional[Path] = None) -> Optional[Path]:
+        """Write all decisions (sorted by label) if anything changed since loading."""
+        path = Path(path) if path is not None else self.decisions_path
+        if path is None or (path.exists() and not self._dirty):
+            return None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['label', 'target', 'method', 'confidence'])
+            for label in sorted(self.decisions):
+                target, method, conf = self.decisions[label]
+                writer.writerow([label, target, method, repr(conf)])
+        tmp.replace(path)
+        self._dirty = False
+        self._saved = dict(self.decisions)
+        logger.info(f"Saved label decisions: {path} ({len(self.decisions)} labels)")
+        return path
+
+    def map(self, source_label: str) -> Tuple[str, str, float]:
+        """Map one label (see map_label)."""
+        return self.map_batch([source_label])[0]
+
+    def map_batch(self, labels: Iterable[str]) -> List[Tuple[str, str, float]]:
+        """
+        Map many labels; each distinct label is decided once.
+
+        Returns:
+            (target_class, method, confidence) per input label, in order
+        """
+        normalized = [normalize_label(label) for label in labels]
+        todo = [n for n in dict.fromkeys(normalized) if n not in self.decisions or n in self._recheck]
+        self.reused += len(normalized) - len(todo)
+        if todo:
+            self._decide(todo)
+            self._recheck.difference_update(todo)
+        return [self._lookup(n) for n in normalized]
+
+    def _lookup(self, normalized: str) -> Tuple[str, str, float]:
+        target = self.manual.get(normalized)
+        if target is not None:
+            return target, "manual", 1.0
+        return self.decisions[normalized]
+
+    def _decide(self, todo: List[str]):
+        targets = self.target_classes
+        # Rows loaded for recheck are decided from scratch, not kept from the file
+        for n in todo:
+            self.decisions.pop(n, None)
+        rest = []
+        for n in todo:
+            if n in self.manual:
+                self.decisions[n] = (self.manual[n], "manual", 1.0)
+            elif n in targets:
+                self.decisions[n] = (n, "exact", 1.0)
+            else:
+                rest.append(n)
+
+        if rest and targets:
+            # One (labels x classes) score matrix; argmax keeps the first best, like extractOne
+            scores = process.cdist(rest, list(targets), scorer=fuzz.ratio, dtype=np.float64, workers=-1)
+            best = scores.argmax(axis=1)
+            best_score = scores[np.arange(len(rest)), best]
+            self.scored += len(rest)
+            for n, j, score in zip(rest, best.tolist(), best_score.tolist()):
+                if score >= self.threshold:
+                    self.decisions[n] = (targets[j], "fuzzy", score / 100.0)
+            rest = [n for n in rest if n not in self.decisions]
+
+        # Substring and keyword stages for everything else, one regex pass
+        for n, rank in zip(rest, _best_ranks(rest, targets).tolist()):
+            self.decisions[n] = _from_rank(rank, targets) or ("trash", "fallback", 0.50)
+        self._dirty = self._dirty or any(self.decisions[n] != self._saved.get(n) for n in todo)
+
+    def summary(self) -> str:
+        return (f"Label mapper: {len(self.decisions)} labels, {self.scored} fuzzy-scored, "
+                f"{self.reused} lookups answered from memo/decisions")
@@ -0,0 +1,362 @@
+"""
+Pre-letterboxed image cache for CPU training.
+
+Every epoch the YOLO dataloader decodes each JPEG and resizes it to
+``imgsz`` again; on CPU that is most of the epoch. The cache does it once
+per split and image size:
+
+    letterbox/train_640.npy          (N, 640, 640, 3) uint8, memory-mappable
+    letterbox/train_640.meta.npz     per image: source and label file
+                                     size/mtime, original (h, w), resized
+                                     (h, w), pad, labels in letterbox
+                                     coordinates
+
+Images are resized with the rule of the YOLO dataloader's load_image (long
+side to ``imgsz``; INTER_LINEAR when augmenting or upscaling, INTER_AREA
+when downscaling without augmentation), so a split must be cached for the
+mode it is loaded in: ``augment=True`` for train, False for val/test. They
+are then padded to a centred square with gray (114). Because the resized
+region and its padding are recorded, the trainer hands out the resized
+image instead of decoding again, and the letterboxed tensor can still be
+used as-is (with the letterbox labels) by other consumers. Ultralytics
+versions that resize differently give slightly different pixels.
+
+Disk cost is N * imgsz * imgsz * 3 bytes (1.2 MB per image at 640).
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .annotation_store import read_yolo_label
+from .logger import setup_logger
+from .output_layout import list_images
+
+logger = setup_logger(__name__)
+
+CACHE_VERSION = 2
+LETTERBOX_DIRNAME = 'letterbox'
+PAD_VALUE = 114
+# Images per worker task
+_CHUNK = 64
+
+
+def cache_paths(cache_dir: Path, split: str, imgsz: int) -> Tuple[Path, Path]:
+    """(image tensor .npy, metadata .npz) of one split at one size."""
+    stem = f'{split}_{imgsz}'
+    return Path(cache_dir) / f'{stem}.npy', Path(cache_dir) / f'{stem}.meta.npz'
+
+
+def cached_sizes(cache_dir: Path, split: str) -> List[int]:
+    """Image sizes a split has been cached at."""
+    sizes = []
+    for meta in Path(cache_dir).glob(f'{split}_*.meta.npz'):
+        size = meta.name[len(split) + 1:-len('.meta.npz')]
+        if size.isdigit():
+            sizes.append(int(size))
+    return sorted(sizes)
+
+
+def split_images(entry: str, root: Optional[Path] = None) -> List[Path]:
+    """
+    Images of a data.yaml split entry: an images folder or an image list (.txt).
+
+    Relative paths are resolved against ``root`` (the data.yaml folder).
+    """
+    path = Path(entry)
+    if not path.is_absolute() and root is not None:
+        path = root / path
+    if path.suffix == '.txt':
+        lines = [line.strip() for line in path.read_text().splitlines() if line.strip()]
+        return [Path(line) if Path(line).is_absolute() else path.parent / line for line in lines]
+    return list_images(path)
+
+
+def yolo_label_path(image: Path) -> Path:
+    """Label file YOLO uses for an image (last ``images`` folder -> ``labels``, suffix .txt)."""
+    sa, sb = f'{os.sep}images{os.sep}', f'{os.sep}labels{os.sep}'
+    return Path(sb.join(str(image).rsplit(sa, 1))).with_suffix('.txt')
+
+
+def letterbox_geometry(h0: int, w0: int, imgsz: int) -> Tuple[int, int, int, int]:
+    """
+    (resized h, resized w, pad top, pad left) for an h0 x w0 image.
+
+    The resize matches the YOLO dataloader (long side to ``imgsz``,
+    ceil-rounded); the padding centres it in an ``imgsz`` square.
+    """
+    r = imgsz / max(h0, w0)
+    h, w = min(math.ceil(h0 * r), imgsz), min(math.ceil(w0 * r), imgsz)
+    return h, w, (imgsz - h) // 2, (imgsz - w) // 2
+
+
+def resize_interpolation(h0: int, w0: int, imgsz: int, augment: bool) -> int:
+    """cv2 interpolation the YOLO dataloader uses to resize an h0 x w0 image."""
+    return cv2.INTER_LINEAR if augment or imgsz > max(h0, w0) else cv2.INTER_AREA
+
+
+def _file_stat(path: Path) -> Tuple[int, int]:
+    """(size, mtime_ns) of a file, (-1, -1) if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return -1, -1
+    return st.st_size, st.st_mtime_ns
+
+
+def letterbox_labels(xywh: np.ndarray, hw0: Tuple[int, int], imgsz: int) -> np.ndarray:
+    """Normalized xywh of the original image -> normalized xywh of its letterbox."""
+    h, w, top, left = letterbox_geometry(hw0[0], hw0[1], imgsz)
+    out = np.empty_like(xywh, dtype=np.float32)
+    out[:, 0] = (xywh[:, 0] * w + left) / imgsz
+    out[:, 1] = (xywh[:, 1] * h + top) / imgsz
+    out[:, 2] = xywh[:, 2] * w / imgsz
+    out[:, 3] = xywh[:, 3] * h / imgsz
+    return out
+
+
+def _fill_chunk(tensor: np.ndarray, images: List[Path], start: int, imgsz: int, augment: bool,
+                hw0: np.ndarray, hw: np.ndarray, pad: np.ndarray) -> List[str]:
+    failed = []
+    for i, img_path in enumerate(images, start):
+        img = cv2.imread(str(img_path), cv2.IMREAD_COLOR)
+        if img is None:
+            failed.append(str(img_path))
+            continue
+        h0, w0 = img.shape[:2]
+        h, w, top, left = letterbox_geometry(h0, w0, imgsz)
+        if (h, w) != (h0, w0):
+            img = cv2.resize(img, (w, h), interpolation=resize_interpolation(h0, w0, imgsz, augment))
+        out = tensor[i]
+        out[:] = PAD_VALUE
+        out[top:top + h, left:left + w] = img
+        hw0[i], hw[i], pad[i] = (h0, w0), (h, w), (top, left)
+    return failed
+
+
+def build_cache(images: List[Path], cache_dir: Path, split: str, imgsz: int,
+                workers: Optional[int] = None, augment: bool = True) -> Dict:
+    """
+    Decode and letterbox every image of a split into a memory-mapped tensor.
+
+    Args:
+        images: Split images (labels found the YOLO way, see yolo_label_path)
+        cache_dir: Output directory
+        split: Split name (file prefix)
+        imgsz: Square output size
+        workers: Decode threads (default: CPU count)
+        augment: Resize like the augmenting (train) loader, see resize_interpolation
+
+    Returns:
+        Dict with images, bytes (cache size) and source_bytes (JPEG size)
+
+    Example:
+        >>> build_cache(split_images("datasets/processed/train/images"), Path("letterbox"), "train", 640, augment=True)
+        {'images': 8000, 'bytes': 9830400000, 'source_bytes': 1503442102, 'seconds': 212.4}
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tensor_path, meta_path = cache_paths(cache_dir, split, imgsz)
+    n = len(images)
+    stats = [os.stat(img) for img in images]
+
+    start_time = time.perf_counter()
+    tmp_tensor = tensor_path.with_name(tensor_path.name + '.tmp')
+    tensor = np.lib.format.open_memmap(tmp_tensor, mode='w+', dtype=np.uint8, shape=(n, imgsz, imgsz, 3))
+    hw0 = np.zeros((n, 2), dtype=np.int32)
+    hw = np.zeros((n, 2), dtype=np.int32)
+    pad = np.zeros((n, 2), dtype=np.int32)
+    try:
+        workers = max(1, workers or os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            starts = range(0, n, _CHUNK)
+            failed = [path for chunk in pool.map(
+                lambda s: _fill_chunk(tensor, images[s:s + _CHUNK], s, imgsz, augment, hw0, hw, pad), starts)
+                for path in chunk]
+        tensor.flush()
+    finally:
+        del tensor
+    if failed:
+        tmp_tensor.unlink()
+        raise ValueError(f"Cannot decode {len(failed)} images, e.g. {failed[0]}")
+
+    # Labels in letterbox coordinates, one flat box table
+    class_parts, xywh_parts = [], []
+    box_count = np.zeros(n, dtype=np.int32)
+    label_stats = np.full((n, 2), -1, dtype=np.int64)
+    for i, img in enumerate(images):
+        lbl = yolo_label_path(img)
+        label_stats[i] = _file_stat(lbl)
+        if label_stats[i, 0] < 0:
+            continue
+        class_ids, xywh = read_yolo_label(lbl.read_text())
+        box_count[i] = len(class_ids)
+        class_parts.append(class_ids)
+        xywh_parts.append(letterbox_labels(xywh, (int(hw0[i, 0]), int(hw0[i, 1])), imgsz))
+
+    tmp_meta = meta_path.with_name(meta_path.name + '.tmp.npz')
+    np.savez(tmp_meta, version=CACHE_VERSION, imgsz=imgsz, augment=augment,
+             names=np.array([str(Path(img).resolve()) for img in images], dtype=str),
+             sizes=np.array([st.st_size for st in stats], dtype=np.int64),
+             mtimes=np.array([st.st_mtime_ns for st in stats], dtype=np.int64),
+             label_sizes=label_stats[:, 0], label_mtimes=label_stats[:, 1],
+             hw0=hw0, hw=hw, pad=pad, box_count=box_count,
+             class_id=np.concatenate(class_parts) if class_parts else np.zeros(0, np.int16),
+             xywh=np.concatenate(xywh_parts) if xywh_parts else np.zeros((0, 4), np.float32))
+    tmp_tensor.replace(tensor_path)
+    tmp_meta.replace(meta_path)
+
+    seconds = time.perf_counter() - start_time
+    size = tensor_path.stat().st_size
+    source = sum(st.st_size for st in stats)
+    logger.info(f"Letterbox {split}@{imgsz}: {n} images in {seconds:.1f}s -> {tensor_path} "
+                f"({size / 1e6:.1f} MB, {size / max(source, 1):.1f}x the {source / 1e6:.1f} MB of source images)")
+    return {'images': n, 'bytes': size, 'source_bytes': source, 'seconds': round(seconds, 1)}
+
+
+class LetterboxCache:
+    """
+    Memory-mapped letterboxed images of one split at one size.
+
+    Example:
+        >>> cache = LetterboxCache.open(Path("datasets/processed/letterbox"), "train", 640)
+        >>> cache.letterboxed(0).shape         # (640, 640, 3) uint8 view, labels: cache.labels(0)
+        >>> cache.resized(0)                   # what load_image gets from cv2.imread + resize
+    """
+
+    def __init__(self, tensor_path: Path, meta_path: Path):
+        self.tensor_path = Path(tensor_path)
+        with np.load(meta_path) as data:
+            if int(data['version']) != CACHE_VERSION:
+                raise ValueError(f"{meta_path}: cache version {int(data['version'])}, expected {CACHE_VERSION}")
+            self.imgsz = int(data['imgsz'])
+            self.augment = bool(data['augment'])
+            self.names = data['names']
+            self.sizes = data['sizes']
+            self.mtimes = data['mtimes']
+            self.label_sizes = data['label_sizes']
+            self.label_mtimes = data['label_mtimes']
+            self.hw0 = data['hw0']
+            self.hw = data['hw']
+            self.pad = data['pad']
+            self.box_count = data['box_count']
+            self.class_id = data['class_id']
+            self.xywh = data['xywh']
+        self.box_start = np.cumsum(self.box_count, dtype=np.int64) - self.box_count
+        self._tensor: Optional[np.ndarray] = None
+
+    @classmethod
+    def open(cls, cache_dir: Path, split: str, imgsz: int) -> Optional['LetterboxCache']:
+        """The cached split at ``imgsz``, or None if it was not built at that size."""
+        tensor_path, meta_path = cache_paths(cache_dir, split, imgsz)
+        if not (tensor_path.exists() and meta_path.exists()):
+            return None
+        return cls(tensor_path, meta_path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_tensor'] = None
+        return state
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def tensor(self) -> np.ndarray:
+        """(N, imgsz, imgsz, 3) uint8, memory-mapped read-only (opened lazily per process)."""
+        if self._tensor is None:
+            self._tensor = np.load(self.tensor_path, mmap_mode='r')
+        return self._tensor
+
+    @property
+    def num_bytes(self) -> int:
+        return self.tensor_path.stat().st_size
+
+    def is_current(self, images: List[Path]) -> bool:
+        """
+        True if ``images`` are the cached files and neither they nor their
+        label files changed (same order, size and mtime; a label file that
+        appeared or disappeared also counts as a change).
+        """
+        if len(images) != len(self):
+            return False
+        for i, img in enumerate(images):
+            size, mtime = _file_stat(img)
+            if (size < 0 or size != self.sizes[i] or mtime != self.mtimes[i]
+                    or str(Path(img).resolve()) != self.names[i]):
+                return False
+            if _file_stat(yolo_label_path(img)) != (self.label_sizes[i], self.label_mtimes[i]):
+                return False
+        return True
+
+    def letterboxed(self, i: int) -> np.ndarray:
+        """Letterboxed image ``i`` (read-only view, BGR)."""
+        return self.tensor[i]
+
+    def resized(self, i: int) -> np.ndarray:
+        """Image ``i`` resized without padding (writable copy, BGR)."""
+        (h, w), (top, left) = self.hw[i].tolist(), self.pad[i].tolist()
+        return np.array(self.tensor[i, top:top + h, left:left + w])
+
+    def labels(self, i: int, letterboxed: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (class_ids int16, xywh float32 (N, 4)) of image ``i``.
+
+        Normalized to the letterbox, or to the original image with
+        ``letterboxed=False``.
+        """
+        start, count = int(self.box_start[i]), int(self.box_count[i])
+        class_ids, xywh = self.class_id[start:start + count], self.xywh[start:start + count]
+        if letterboxed:
+            return class_ids, xywh
+        (h, w), (top, left) = self.hw[i].tolist(), self.pad[i].tolist()
+        out = np.empty_like(xywh)
+        out[:, 0] = (xywh[:, 0] * self.imgsz - left) / w
+        out[:, 1] = (xywh[:, 1] * self.imgsz - top) / h
+        out[:, 2] = xywh[:, 2] * self.imgsz / w
+        out[:, 3] = xywh[:, 3] * self.imgsz / h
+        return class_ids, out
+
+    def close(self):
+        self._tensor = None
+
+
+def measure_epoch(cache: LetterboxCache, images: List[Path], sample: int = 200, seed: int = 0) -> Dict:
+    """
+    Time loading a random sample the dataloader way (imread + resize) and from the cache.
+
+    Returns:
+        Dict with per-image milliseconds and the estimated seconds per epoch
+        (all images of the split, one worker) for both, plus the speedup
+    """
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(images))[:sample].tolist()
+    if not order:
+        return {}
+
+    start = time.perf_counter()
+    for i in order:
+        img = cv2.imread(str(images[i]), cv2.IMREAD_COLOR)
+        h, w, _, _ = letterbox_geometry(img.shape[0], img.shape[1], cache.imgsz)
+        if (h, w) != img.shape[:2]:
+            cv2.resize(img, (w, h), interpolation=resize_interpolation(*img.shape[:2], cache.imgsz, cache.augment))
+    decode = (time.perf_counter() - start) / len(order)
+
+    start = time.perf_counter()
+    for i in order:
+        cache.resized(i)
+    cached = (time.perf_counter() - start) / len(order)
+
+    return {
+        'decode_ms': round(decode * 1e3, 3),
+        'cache_ms': round(cached * 1e3, 3),
+        'decode_epoch_s': round(decode * len(images), 1),
+        'cache_epoch_s': round(cached * len(images), 1),
+        'speedup': round(decode / max(cached, 1e-9), 1),
+    }
@@ -0,0 +1,175 @@
+"""
+Conversion manifest for incremental dataset conversion.
+
+Records, for every converted source image, its size, mtime and content
+hash, a digest of the YOLO label produced from its annotations, the
+dataset it came from and the output files written. A later run converts
+only new or changed inputs, removes outputs whose sources disappeared and
+reports what it skipped. Any change to the class mapping or converter
+version invalidates the whole manifest.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .image_utils import hash_image
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MANIFEST_NAME = 'conversion_manifest.json'
+
+
+def mapping_digest(**parts) -> str:
+    """Stable digest of everything that changes how labels are produced."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class ConversionManifest:
+    """
+    Per-source record of what was converted and what it produced.
+
+    Example:
+        >>> manifest = ConversionManifest.load(Path("datasets/processed/conversion_manifest.json"),
+        ...                                    converter_version="2", mapping="ab12...")
+        >>> if not manifest.is_current(img_path, label_digest):
+        ...     convert(img_path)
+        ...     manifest.record(img_path, "TACO", label_digest, ["images/a.jpg", "labels/a.txt"])
+        >>> manifest.prune(out_dir, finished_datasets={"TACO"}, existing_datasets={"TACO"})
+        >>> manifest.save()
+    """
+
+    def __init__(self, path: Path, converter_version: str, mapping: str,
+                 entries: Optional[Dict[str, dict]] = None):
+        self.path = Path(path)
+        self.converter_version = converter_version
+        self.mapping = mapping
+        self.entries: Dict[str, dict] = entries or {}
+        self.seen: Set[str] = set()
+        self.skipped = 0
+        self.removed = 0
+        self.stale_outputs: List[str] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path, converter_version: str, mapping: str) -> 'ConversionManifest':
+        """Load the manifest, starting fresh if missing or produced by another mapping/version."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path, converter_version, mapping)
+        try:
+            data = json.loads(path.read_text())
+        except ValueError as e:
+            logger.warning(f"Unreadable manifest {path}, reconverting everything: {e}")
+            return cls(path, converter_version, mapping)
+
+        if data.get('converter_version') != converter_version or data.get('mapping') != mapping:
+            logger.info("Class mapping or converter version changed, reconverting everything")
+            # Keep the old entries' outputs so prune() can clean them up
+            manifest = cls(path, converter_version, mapping)
+            manifest.stale_outputs = [o for e in data.get('entries', {}).values() for o in e.get('outputs', [])]
+            return manifest
+        return cls(path, converter_version, mapping, data.get('entries', {}))
+
+    @staticmethod
+    def key(src: Path) -> str:
+        return str(Path(src).resolve())
+
+    def is_current(self, src: Path, label_digest: str, out_dir: Optional[Path] = None) -> bool:
+        """
+        Check whether ``src`` is unchanged since it was last converted.
+
+        Size and mtime are compared first; the content hash is only
+        computed when the mtime changed but the size did not (e.g. a copy
+        or touch), so unchanged files are never read. With ``out_dir`` the
+        recorded outputs must also still exist.
+        """
+        key = self.key(src)
+        self.seen.add(key)
+        entry = self.entries.get(key)
+        if entry is None or entry['label'] != label_digest:
+            return False
+        if out_dir is not None and not all((out_dir / rel).exists() for rel in entry['outputs']):
+            return False
+        try:
+            st = os.stat(src)
+        except OSError:
+            return False
+        if st.st_size != entry['size']:
+            return False
+        if st.st_mtime_ns != entry['mtime_ns']:
+            if hash_image(Path(src)) != entry['sha256']:
+                return False
+            entry['mtime_ns'] = st.st_mtime_ns
+        self.skipped += 1
+        return True
+
+    def record(self, src: Path, dataset: str, label_digest: str, outputs: List[str],
+               sha256: Optional[str] = None, out_dir: Optional[Path] = None):
+        """
+        Record a successful conversion.
+
+        Outputs written by a previous conversion of the same source that are
+        no longer produced (e.g. a label file for an image that lost all its
+        annotations) are deleted from ``out_dir``.
+        """
+        key = self.key(src)
+        st = os.stat(src)
+        with self._lock:
+            old = self.entries.get(key)
+            if old is not None and out_dir is not None:
+                for rel in set(old['outputs']) - set(outputs):
+                    (out_dir / rel).unlink(missing_ok=True)
+            self.seen.add(key)
+            self.entries[key] = {
+                'dataset': dataset,
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+                'sha256': sha256 or hash_image(Path(src)),
+                'label': label_digest,
+                'outputs': outputs,
+            }
+
+    def prune(self, out_dir: Path, finished_datasets: Iterable[str], existing_datasets: Iterable[str]):
+        """
+        Remove entries (and their outputs) whose sources disappeared.
+
+        Only datasets that were fully processed this run, or that no longer
+        exist at all, are pruned, so a dataset that failed to convert keeps
+        its previous outputs.
+        """
+        finished, existing = set(finished_datasets), set(existing_datasets)
+        live_outputs = set()
+        doomed = []
+        for key, entry in self.entries.items():
+            if key not in self.seen and (entry['dataset'] in finished or entry['dataset'] not in existing):
+                doomed.append(key)
+            else:
+                live_outputs.update(entry['outputs'])
+
+        for key in doomed:
+            for rel in self.entries.pop(key)['outputs']:
+                if rel not in live_outputs:
+                    (out_dir / rel).unlink(missing_ok=True)
+            self.removed += 1
+
+        for rel in self.stale_outputs:
+            if rel not in live_outputs:
+                (out_dir / rel).unlink(missing_ok=True)
+        self.stale_outputs = []
+
+    def save(self):
+        """Write the manifest atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({
+            'converter_version': self.converter_version,
+            'mapping': self.mapping,
+            'entries': self.entries,
+        }))
+        tmp.replace(self.path)
+        logger.info(f"Saved manifest: {self.path} ({len(self.entries)} sources)")
@@ -0,0 +1,262 @@
+"""
+Multi-camera capture and cross-camera batching for real-time detection.
+
+One reader thread per source keeps only the newest frame (stale frames are
+dropped, never queued). A scheduler picks which cameras go into the next
+model call so that a single process can share one set of weights and batch
+frames from N cameras without letting a busy camera starve the others.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+Source = Union[int, str]
+
+
+def parse_source(value: str) -> Source:
+    """Turn a CLI source into a camera index (digits) or a path/URL."""
+    return int(value) if value.isdigit() else value
+
+
+class CameraStats:
+    """Per-camera counters: captured/processed frames, drops, FPS and latency."""
+
+    def __init__(self, window: int = 120):
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.latency_ms = deque(maxlen=window)
+        self._served = deque(maxlen=window)
+
+    def on_processed(self, capture_time: float, now: float, skipped: int):
+        self.processed += 1
+        self.dropped += skipped
+        self.latency_ms.append((now - capture_time) * 1000.0)
+        self._served.append(now)
+
+    @property
+    def fps(self) -> float:
+        """Processed frames per second over the recent window."""
+        if len(self._served) < 2:
+            return 0.0
+        span = self._served[-1] - self._served[0]
+        return (len(self._served) - 1) / span if span > 0 else 0.0
+
+    def latency(self, q: float) -> float:
+        """Capture-to-result latency percentile (ms) over the recent window."""
+        return float(np.percentile(self.latency_ms, q)) if self.latency_ms else 0.0
+
+
+class CameraReader(threading.Thread):
+    """
+    Background capture thread that keeps only the latest frame of a source.
+
+    Example:
+        >>> reader = CameraReader("cam0", 0)
+        >>> reader.start()
+        >>> seq, frame, ts = reader.latest()
+    """
+
+    def __init__(self, name: str, source: Source, width: int = 640, height: int = 480,
+                 reconnect_delay: float = 1.0):
+        super().__init__(name=f"camera-{name}", daemon=True)
+        self.cam_name = name
+        self.source = source
+        self.width = width
+        self.height = height
+        self.reconnect_delay = reconnect_delay
+        self.stats = CameraStats()
+        self.finished = False
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._frame: Optional[np.ndarray] = None
+        self._seq = 0
+        self._ts = 0.0
+
+    def _open(self) -> Optional[cv2.VideoCapture]:
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            return None
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        # Keep the driver queue short so reads return the newest frame
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def run(self):
+        is_file = isinstance(self.source, str) and '://' not in self.source
+        cap = self._open()
+        if cap is None:
+            logger.error(f"[{self.cam_name}] Could not open source: {self.source}")
+            self.finished = True
+            return
+
+        # Files are paced at their native FPS so they behave like a live camera
+        file_fps = cap.get(cv2.CAP_PROP_FPS) if is_file else 0.0
+        period = 1.0 / file_fps if file_fps and file_fps > 0 else 0.0
+        next_due = time.perf_counter()
+
+        try:
+            while not self._stop_event.is_set():
+                if period:
+                    next_due += period
+                    self._stop_event.wait(max(0.0, next_due - time.perf_counter()))
+                ret, frame = cap.read()
+                if not ret:
+                    if is_file:
+                        break
+                    # Stream/camera hiccup: reconnect instead of dying
+                    logger.warning(f"[{self.cam_name}] Read failed, reconnecting...")
+                    cap.release()
+                    self._stop_event.wait(self.reconnect_delay)
+                    cap = self._open() or cv2.VideoCapture()
+                    continue
+                with self._lock:
+                    self._frame = frame
+                    self._seq += 1
+                    self._ts = time.perf_counter()
+                self.stats.captured += 1
+        finally:
+            cap.release()
+            self.finished = True
+
+    def latest(self) -> Tuple[int, Optional[np.ndarray], float]:
+        """Return (sequence number, newest frame, capture perf_counter time)."""
+        with self._lock:
+            return self._seq, self._frame, self._ts
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class BatchScheduler:
+    """
+    Choose which cameras contribute a frame to the next batch.
+
+    Fairness rules:
+    - each camera contributes at most one (its newest) frame per batch;
+    - cameras are ordered least-recently-served first, so with more ready
+      cameras than ``max_batch`` every camera is served within a few rounds;
+    - ``max_fps`` caps how often a single camera is served, leaving batch
+      slots and compute for the others.
+    """
+
+    def __init__(self, max_batch: int = 8, max_fps: Optional[float] = None):
+        self.max_batch = max(1, max_batch)
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self._last_seq: Dict[str, int] = {}
+        self._last_served: Dict[str, float] = {}
+
+    def select(self, readers: Sequence[CameraReader], now: Optional[float] = None) -> List[Tuple[CameraReader, int, np.ndarray, float]]:
+        """
+        Pick up to ``max_batch`` cameras that have a new frame.
+
+        Returns:
+            List of (reader, seq, frame, capture_time)
+        """
+        now = time.perf_counter() if now is None else now
+        ready = []
+        for reader in readers:
+            seq, frame, ts = reader.latest()
+            name = reader.cam_name
+            if frame is None or seq <= self._last_seq.get(name, 0):
+                continue
+            if now - self._last_served.get(name, 0.0) < self.min_interval:
+                continue
+            ready.append((self._last_served.get(name, 0.0), reader, seq, frame, ts))
+
+        ready.sort(key=lambda item: item[0])
+        batch = []
+        for _, reader, seq, frame, ts in ready[:self.max_batch]:
+            self._last_seq[reader.cam_name] = seq
+            self._last_served[reader.cam_name] = now
+            batch.append((reader, seq, frame, ts))
+        return batch
+
+
+class MultiCameraServer:
+    """
+    Read N sources and run one batched model call over their latest frames.
+
+    Example:
+        >>> server = MultiCameraServer([0, 1, "rtsp://cam3/stream"], max_batch=4)
+        >>> server.run(lambda frames: model(frames, verbose=False), on_result)
+    """
+
+    def __init__(self, sources: Sequence[Source], max_batch: int = 8, max_fps: Optional[float] = None,
+                 width: int = 640, height: int = 480):
+        self.readers = [CameraReader(f"cam{i}", src, width, height) for i, src in enumerate(sources)]
+        self.scheduler = BatchScheduler(max_batch=max_batch, max_fps=max_fps)
+        self.batches = 0
+        self.batched_frames = 0
+        self._running = False
+
+    def start(self):
+        for reader in self.readers:
+            reader.start()
+        self._running = True
+        logger.info(f"Started {len(self.readers)} camera readers")
+
+    def stop(self):
+        self._running = False
+        for reader in self.readers:
+            reader.stop()
+        for reader in self.readers:
+            reader.join(timeout=2.0)
+
+    def run(self, infer: Callable[[List[np.ndarray]], list],
+            on_result: Callable[[CameraReader, np.ndarray, object], bool],
+            idle_sleep: float = 0.001):
+        """
+        Serve batches until ``on_result`` returns False or all sources end.
+
+        Args:
+            infer: Called with a list of frames, returns one result per frame
+            on_result: Called per camera with (reader, frame, result); return
+                False to stop the server
+            idle_sleep: Sleep when no camera has a new frame (seconds)
+        """
+        if not self._running:
+            self.start()
+
+        last_seq: Dict[str, int] = {}
+        while self._running:
+            batch = self.scheduler.select(self.readers)
+            if not batch:
+                if all(reader.finished for reader in self.readers):
+                    break
+                time.sleep(idle_sleep)
+                continue
+
+            results = infer([frame for _, _, frame, _ in batch])
+            now = time.perf_counter()
+            self.batches += 1
+            self.batched_frames += len(batch)
+
+            for (reader, seq, frame, ts), result in zip(batch, results):
+                skipped = max(0, seq - last_seq.get(reader.cam_name, 0) - 1)
+                last_seq[reader.cam_name] = seq
+                reader.stats.on_processed(ts, now, skipped)
+                if on_result(reader, frame, result) is False:
+                    self._running = False
+
+    def format_stats(self) -> str:
+        """Per-camera FPS/latency/drop summary."""
+        avg_batch = self.batched_frames / self.batches if self.batches else 0.0
+        lines = [f"Batches: {self.batches} (avg {avg_batch:.2f} frames/batch)",
+                 f"{'camera':<8}{'fps':>8}{'p50 ms':>9}{'p99 ms':>9}{'processed':>11}{'dropped':>9}  source"]
+        for reader in self.readers:
+            s = reader.stats
+            lines.append(f"{reader.cam_name:<8}{s.fps:>8.1f}{s.latency(50):>9.1f}{s.latency(99):>9.1f}"
+                         f"{s.processed:>11}{s.dropped:>9}  {reader.source}")
+        return '\n'.join(lines)
@@ -0,0 +1,258 @@
+"""
+Perceptual near-duplicate detection.
+
+Byte-level deduplication misses re-encoded, resized or recompressed copies
+of the same photo, which are common when several public datasets are
+merged, and such copies leak between train, val and test. This module
+computes 64-bit perceptual hashes (dHash or pHash), finds pairs within a
+Hamming distance with multi-index hashing (no all-pairs comparison) and
+groups them into clusters that the splitter keeps in a single split.
+
+Images are decoded on a thread pool (JPEGs are decoded at reduced scale
+via PIL's draft mode) and hashed in vectorized numpy batches. Hashes are
+cached in the shared FileCache.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+
+from .file_cache import FileCache
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PHASH_METHODS = ('dhash', 'phash')
+DEFAULT_THRESHOLD = 4
+BATCH_SIZE = 1024
+# Thumbnails flatter than this (pixel std) carry no perceptual signal: blank
+# or single-colour images would all hash alike, so they are not clustered
+FLAT_STD = 2.0
+
+_INPUT_SIZE = {'dhash': (9, 8), 'phash': (32, 32)}  # (width, height) fed to the hash
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    m[0] /= np.sqrt(2.0)
+    return m.astype(np.float32)
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def _load_gray(path: Path, size: Tuple[int, int]) -> Optional[np.ndarray]:
+    try:
+        with Image.open(path) as img:
+            img.draft('L', (size[0] * 8, size[1] * 8))  # JPEG: decode at 1/2..1/8 scale
+            return np.asarray(img.convert('L').resize(size, Image.BOX), dtype=np.float32)
+    except Exception as e:
+        logger.debug(f"Cannot hash {path}: {e}")
+        return None
+
+
+def hash_pixels(pixels: np.ndarray, method: str = 'dhash') -> np.ndarray:
+    """
+    Vectorized perceptual hash of a batch of grayscale thumbnails.
+
+    Args:
+        pixels: (B, 8, 9) for dHash or (B, 32, 32) for pHash, float32
+        method: 'dhash' or 'phash'
+
+    Returns:
+        (B,) uint64 hashes
+    """
+    if method == 'dhash':
+        bits = pixels[:, :, 1:] > pixels[:, :, :-1]
+    elif method == 'phash':
+        coeffs = np.einsum('ij,bjk,lk->bil', _DCT32, pixels, _DCT32)[:, :8, :8].reshape(len(pixels), 64)
+        bits = coeffs > np.median(coeffs[:, 1:], axis=1, keepdims=True)
+    else:
+        raise ValueError(f"Unknown perceptual hash: {method} (choose from {', '.join(PHASH_METHODS)})")
+    return np.packbits(bits.reshape(len(pixels), 64), axis=1).view('>u8').ravel().astype(np.uint64)
+
+
+def perceptual_hashes(paths: Iterable[Path], method: str = 'dhash', workers: Optional[int] = None,
+                      cache: Optional[FileCache] = None) -> Dict[Path, int]:
+    """
+    Perceptual hash of every readable image.
+
+    Args:
+        paths: Image files
+        method: 'dhash' (gradient, fastest) or 'phash' (DCT, more robust)
+        workers: Decode threads (default: CPU count)
+        cache: Optional FileCache for computed hashes
+
+    Returns:
+        Path -> 64-bit hash (unreadable and flat images are left out)
+
+    Example:
+        >>> hashes = perceptual_hashes(sorted(Path("images").glob("*.jpg")), "dhash")
+    """
+    if method not in PHASH_METHODS:
+        raise ValueError(f"Unknown perceptual hash: {method} (choose from {', '.join(PHASH_METHODS)})")
+    kind = f'phash:{method}'
+    size = _INPUT_SIZE[method]
+    paths = list(paths)
+    hashes: Dict[Path, int] = {}
+    todo = []
+    for path in paths:
+        cached = cache.get(kind, path) if cache is not None else None
+        if cached is not None:
+            if cached:  # '' marks a flat image
+                hashes[path] = int(cached, 16)
+        else:
+            todo.append(path)
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool, tqdm(total=len(todo), desc=f"{method}") as bar:
+        for start in range(0, len(todo), BATCH_SIZE):
+            batch = todo[start:start + BATCH_SIZE]
+            loaded = [(p, px) for p, px in zip(batch, pool.map(lambda p: _load_gray(p, size), batch))
+                      if px is not None]
+            if loaded:
+                pixels = np.stack([px for _, px in loaded])
+                values = hash_pixels(pixels, method).tolist()
+                flat = (pixels.reshape(len(pixels), -1).std(axis=1) < FLAT_STD).tolist()
+                for (path, _), value, is_flat in zip(loaded, values, flat):
+                    if not is_flat:
+                        hashes[path] = value
+                    if cache is not None:
+                        cache.put(kind, path, '' if is_flat else f'{value:016x}')
+            bar.update(len(batch))
+    # Keep the input order (cache hits were collected first)
+    return {path: hashes[path] for path in paths if path in hashes}
+
+
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount64(x: np.ndarray) -> np.ndarray:
+    if hasattr(np, 'bitwise_count'):  # numpy >= 2.0
+        return np.bitwise_count(x)
+    return _POPCOUNT8[x.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+# Blocks up to this width use a dense offset table (2**bits int64 entries)
+_MAX_TABLE_BITS = 24
+
+
+def _block_count(n: int, threshold: int) -> int:
+    # Blocks of ~log2(N) bits keep buckets near one entry on average
+    return int(np.clip(round(64 / max(1.0, np.log2(max(n, 2)))), 1, threshold + 1))
+
+
+def hamming_pairs(values: np.ndarray, threshold: int, chunk: int = 1 << 16) -> np.ndarray:
+    """
+    All index pairs (i, j), i < j, whose 64-bit hashes differ in at most ``threshold`` bits.
+
+    Multi-index hashing: the hash is cut into m blocks of about log2(N)
+    bits. By the pigeonhole principle two hashes within ``threshold`` bits
+    differ in at most ``threshold // m`` bits in at least one block, so for
+    every block each hash only probes the block values within that radius
+    (bucket lookup in the block-sorted order, vectorized) and the
+    candidates are verified with a popcount. Work grows with N times the
+    number of probes instead of N^2.
+
+    Args:
+        values: (N,) uint64 hashes
+        threshold: Maximum Hamming distance (0-63)
+        chunk: Hashes probed per vectorized step (bounds memory)
+
+    Returns:
+        (P, 2) int64 array of unique pairs
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    n = len(values)
+    n_blocks = _block_count(n, threshold)
+    radius = threshold // n_blocks
+    bounds = np.linspace(0, 64, n_blocks + 1).astype(int)
+    found = []
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        width = int(hi - lo)
+        keys = (values >> np.uint64(lo)) & np.uint64((1 << width) - 1)
+        order = np.argsort(keys, kind='stable')
+        if width <= _MAX_TABLE_BITS:
+            # Dense bucket offsets: O(1) lookup of every probed block value
+            starts = np.zeros((1 << width) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(keys.astype(np.int64), minlength=1 << width), out=starts[1:])
+        else:
+            sorted_keys = keys[order]
+        flips = [np.uint64(sum(1 << b for b in bits))
+                 for r in range(radius + 1) for bits in combinations(range(width), r)]
+        for start in range(0, n, chunk):
+            query = np.arange(start, min(start + chunk, n))
+            for flip in flips:
+                probe = keys[query] ^ flip
+                if width <= _MAX_TABLE_BITS:
+                    probe = probe.astype(np.int64)
+                    left = starts[probe]
+                    count = starts[probe + 1] - left
+                else:
+                    left = np.searchsorted(sorted_keys, probe, 'left')
+                    count = np.searchsorted(sorted_keys, probe, 'right') - left
+                total = int(count.sum())
+                if not total:
+                    continue
+                # Expand every (query, bucket) into its candidate pairs
+                a = np.repeat(query, count)
+                within = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+                b = order[np.repeat(left, count) + within]
+                keep = (a < b) & (_popcount64(values[a] ^ values[b]) <= threshold)
+                found.append(np.stack([a[keep], b[keep]], axis=1))
+    if not found:
+        return np.zeros((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(found).astype(np.int64), axis=0)
+
+
+def near_duplicate_clusters(hashes: Dict[Path, int], threshold: int = DEFAULT_THRESHOLD) -> List[List[Path]]:
+    """
+    Group images whose hashes are within ``threshold`` bits (transitively).
+
+    Args:
+        hashes: Path -> perceptual hash, in the caller's preferred order
+            (the first path of each cluster is its representative)
+        threshold: Maximum Hamming distance (0-63)
+
+    Returns:
+        Clusters with at least two images, largest first; paths keep the
+        input order
+
+    Example:
+        >>> clusters = near_duplicate_clusters(perceptual_hashes(images), threshold=4)
+        >>> clusters[0]
+        [PosixPath('images/img_001.jpg'), PosixPath('images/img_001_small.jpg')]
+    """
+    paths = list(hashes)
+    if not paths:
+        return []
+    values = np.fromiter(hashes.values(), dtype=np.uint64, count=len(paths))
+    pairs = hamming_pairs(values, threshold)
+
+    # Union-find over the matching pairs; the smaller index (earlier path) is the root
+    parent = np.arange(len(paths))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in pairs.tolist():
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    groups: Dict[int, List[Path]] = {}
+    for i in np.unique(pairs).tolist():
+        groups.setdefault(find(i), []).append(i)
+    ordered = sorted((sorted(members) for members in groups.values()), key=lambda m: (-len(m), m[0]))
+    return [[paths[i] for i in members] for members in ordered]
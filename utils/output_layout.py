@@ -0,0 +1,131 @@
+"""
+Output layout of converted images and labels.
+
+With the flat layout every image is written to ``images/<source name>``,
+so two datasets that both ship ``img_0001.jpg`` collide and one directory
+ends up holding millions of files. The sharded layout (default) names each
+output after its dataset and a hash of its path inside that dataset, and
+places it in a subdirectory given by the first hash characters:
+
+    images/3f/TACO_3fa9c2d1_img_0001.jpg
+    labels/3f/TACO_3fa9c2d1_img_0001.txt
+
+Names are unique across datasets and stable across runs (the same source
+always maps to the same output), stems stay unique (so labels can still be
+looked up by stem), and labels mirror the image tree, which is the YOLO
+convention for nested image folders. ``image_map.csv`` records which source
+each output came from.
+"""
+
+import csv
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+LAYOUTS = ('sharded', 'flat')
+IMAGE_MAP_NAME = 'image_map.csv'
+# Hex characters of the path hash used as shard directory (16**2 = 256 shards)
+SHARD_CHARS = 2
+# Hex characters of the path hash kept in the file name
+NAME_HASH_CHARS = 8
+IMAGE_SUFFIXES = ('.jpg', '.png')
+
+
+def dataset_slug(dataset: str) -> str:
+    """File-name-safe form of a dataset name ('TACO v2' -> 'TACO-v2')."""
+    return re.sub(r'[^A-Za-z0-9]+', '-', dataset).strip('-') or 'data'
+
+
+def output_name(src: Path, dataset: str = '', dataset_root: Optional[Path] = None,
+                layout: str = 'sharded') -> str:
+    """
+    Path of a converted image relative to ``images/``.
+
+    Args:
+        src: Source image
+        dataset: Dataset the image belongs to
+        dataset_root: Dataset directory; the hash covers the path inside it
+            (absolute path when omitted)
+        layout: 'sharded' or 'flat'
+
+    Example:
+        >>> output_name(Path("raw/TACO/batch_1/000006.jpg"), "TACO", Path("raw/TACO"))
+        'c1/TACO_c1703c0b_000006.jpg'
+    """
+    if layout == 'flat':
+        return src.name
+    if layout != 'sharded':
+        raise ValueError(f"Unknown layout: {layout} (choose from {', '.join(LAYOUTS)})")
+    try:
+        rel = src.relative_to(dataset_root).as_posix() if dataset_root is not None else None
+    except ValueError:
+        rel = None
+    key = f'{dataset}/{rel if rel is not None else Path(src).resolve().as_posix()}'
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return f'{digest[:SHARD_CHARS]}/{dataset_slug(dataset)}_{digest[:NAME_HASH_CHARS]}_{src.name}'
+
+
+def label_name(image_name: str) -> str:
+    """Label path relative to ``labels/`` for an image path relative to ``images/``."""
+    return str(Path(image_name).with_suffix('.txt').as_posix())
+
+
+def label_path(image_path: Path, images_dir: Path, labels_dir: Path) -> Path:
+    """Label file of an image under ``images_dir`` (same subdirectories under ``labels_dir``)."""
+    return labels_dir / label_name(image_path.relative_to(images_dir).as_posix())
+
+
+def scan_files(root: Path, suffixes: Optional[Tuple[str, ...]] = None) -> Iterator[os.DirEntry]:
+    """Files ending in ``suffixes`` (all files if None) anywhere under ``root`` (os.scandir, no per-file stat)."""
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif suffixes is None or entry.name.endswith(suffixes):
+                        yield entry
+        except FileNotFoundError:
+            continue
+
+
+def list_images(images_dir: Path, suffixes: Tuple[str, ...] = IMAGE_SUFFIXES) -> List[Path]:
+    """All images under ``images_dir`` (flat or sharded), sorted."""
+    return sorted(Path(entry.path) for entry in scan_files(images_dir, suffixes))
+
+
+def is_nested(images: Iterable[Path], images_dir: Path) -> bool:
+    """True if any image lives in a subdirectory of ``images_dir``."""
+    return any(img.parent != images_dir for img in images)
+
+
+def save_image_map(path: Path, rows: Iterable[Tuple[str, str, str, str]]) -> int:
+    """
+    Write the source -> output mapping table.
+
+    Args:
+        path: CSV file to write (replaced atomically)
+        rows: (dataset, source path, image output, label output or '')
+
+    Returns:
+        Number of rows written
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    count = 0
+    with open(tmp, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['dataset', 'source', 'image', 'label'])
+        for row in sorted(rows, key=lambda r: r[2]):
+            writer.writerow(row)
+            count += 1
+    tmp.replace(path)
+    logger.info(f"Saved image map: {path} ({count} images)")
+    return count
@@ -0,0 +1,139 @@
+"""
+Allocation-free overlay rendering for the real-time loop.
+
+Draws detection boxes and the status header directly into the frame:
+only the header rows are darkened (in place, no full-frame copy/blend),
+label strings and text metrics are cached per class, and box arrays are
+read once per frame instead of once per box.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+# Header bar: rows [0, HEADER_HEIGHT] are darkened to (1 - HEADER_ALPHA) brightness
+HEADER_HEIGHT = 100
+HEADER_ALPHA = 0.6
+
+DEFAULT_COLOR = (255, 255, 255)
+CONTROLS = "Q:Quit|S:Save|C:Confidence|P:Profile"
+
+
+class OverlayRenderer:
+    """
+    Render detections and the status header with cached text metrics.
+
+    Produces the same image as the original detect.draw()/detect.info()
+    pair. Text sizes only depend on the string, and Hershey digits share
+    one width, so a "NAME: 0.87" label has the same size for every score
+    and can be measured once per class.
+
+    Example:
+        >>> renderer = OverlayRenderer(COLORS)
+        >>> names = renderer.draw_boxes(frame, xyxy, conf, cls, model.names, show_conf=True)
+        >>> renderer.draw_header(frame, fps, "cuda:0", names)
+    """
+
+    def __init__(self, colors: Dict[str, Tuple[int, int, int]], controls: str = CONTROLS):
+        self.colors = colors
+        self.controls = controls
+        self._labels: Dict[Tuple[str, bool], Tuple[str, Tuple[int, int, int], int, int]] = {}
+        self._list_items: Dict[Tuple[int, str], str] = {}
+        self._index_tags: Dict[int, str] = {}
+
+    def _label(self, name: str, show_conf: bool) -> Tuple[str, Tuple[int, int, int], int, int]:
+        """Return (label prefix, color, text width, text height) for a class, cached."""
+        key = (name, show_conf)
+        cached = self._labels.get(key)
+        if cached is None:
+            text = f"{name.upper()}: " if show_conf else name.upper()
+            sample = f"{text}0.00" if show_conf else text
+            (w, h), _ = cv2.getTextSize(sample, FONT, 0.7, 2)
+            cached = (text, self.colors.get(name, DEFAULT_COLOR), w, h)
+            self._labels[key] = cached
+        return cached
+
+    def _index_tag(self, idx: int) -> str:
+        tag = self._index_tags.get(idx)
+        if tag is None:
+            tag = self._index_tags[idx] = f"#{idx}"
+        return tag
+
+    def _list_item(self, idx: int, name: str) -> str:
+        key = (idx, name)
+        item = self._list_items.get(key)
+        if item is None:
+            item = self._list_items[key] = f"#{idx}:{name.upper()}"
+        return item
+
+    def draw_boxes(
+        self,
+        frame: np.ndarray,
+        xyxy: np.ndarray,
+        confs: Sequence[float],
+        class_ids: Sequence[int],
+        names: Dict[int, str],
+        show_conf: bool = True,
+    ) -> List[str]:
+        """
+        Draw all boxes of one frame in place.
+
+        Args:
+            frame: BGR image (modified in place)
+            xyxy: (N, 4) box corners in pixels
+            confs: N confidence scores
+            class_ids: N class indices
+            names: Model class index -> name mapping
+            show_conf: Append the confidence to the label
+
+        Returns:
+            Class names of the drawn boxes, in order
+        """
+        drawn = []
+        boxes = np.asarray(xyxy).astype(np.int32, copy=False).tolist()
+        for idx, ((x1, y1, x2, y2), conf, cls) in enumerate(zip(boxes, confs, class_ids), 1):
+            name = names[int(cls)]
+            text, color, w, h = self._label(name, show_conf)
+            label = f"{text}{float(conf):.2f}" if show_conf else text
+
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+            cv2.circle(frame, (x1 + 15, y1 + 15), 15, color, -1)
+            cv2.putText(frame, self._index_tag(idx), (x1 + 7, y1 + 20), FONT, 0.5, (0, 0, 0), 2)
+
+            cv2.rectangle(frame, (x1, y1 - h - 15), (x1 + w + 15, y1), color, -1)
+            cv2.putText(frame, label, (x1 + 7, y1 - 7), FONT, 0.7, (0, 0, 0), 2)
+            drawn.append(name)
+        return drawn
+
+    def darken_header(self, frame: np.ndarray):
+        """Blend the header rows toward black in place (no frame copy)."""
+        header = frame[:HEADER_HEIGHT + 1]
+        cv2.convertScaleAbs(header, dst=header, alpha=1.0 - HEADER_ALPHA)
+
+    def draw_header(self, frame: np.ndarray, fps: float, device: str, dets: List[str], extra: str = ""):
+        """
+        Draw the status header and detection list in place.
+
+        Args:
+            frame: BGR image (modified in place)
+            fps: Frames per second to display
+            device: Inference device name
+            dets: Class names of the current detections
+            extra: Optional text appended to the status line
+        """
+        w = frame.shape[1]
+        self.darken_header(frame)
+
+        cv2.putText(frame, "WASTE CLASSIFICATION", (10, 25), FONT, 0.7, (0, 255, 0), 2)
+        cv2.putText(frame, f"FPS:{fps:.1f}|{device.upper()}|Objects:{len(dets)}{extra}", (10, 50),
+                    FONT, 0.5, (255, 255, 255), 1)
+        cv2.putText(frame, self.controls, (10, 75), FONT, 0.4, (200, 200, 200), 1)
+
+        y = 30
+        for i, name in enumerate(dets, 1):
+            cv2.putText(frame, self._list_item(i, name), (w - 180, y), FONT, 0.5,
+                        self.colors.get(name, DEFAULT_COLOR), 2)
+            y += 25
@@ -0,0 +1,213 @@
+"""
+Packed dataset shards.
+
+On network storage, training is bound by opening thousands of small JPEG
+and .txt files. A packed split stores the same data in a few large files:
+
+    packed/train-00000.pack     image bytes + label text, back to back
+    packed/train-00001.pack
+    packed/train.index.npz      per image: shard, offset, sizes, (h, w), name
+
+Images are kept encoded (no size increase) and each label follows its
+image, so one contiguous read returns both. PackedShards memory-maps the
+shards for random access; utils.yolo_datasets feeds it to the YOLO trainer.
+"""
+
+import mmap
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+from tqdm import tqdm
+
+from .annotation_store import read_yolo_label
+from .logger import setup_logger
+from .output_layout import label_path
+
+logger = setup_logger(__name__)
+
+PACK_VERSION = 2
+PACKED_DIRNAME = 'packed'
+DEFAULT_SHARD_BYTES = 1 << 30
+_MADV_WILLNEED = getattr(mmap, 'MADV_WILLNEED', None)
+# EXIF orientations that swap width and height (transpose, 90/270 rotations)
+_EXIF_ORIENTATION = 0x0112
+_SWAPPED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def index_path(pack_dir: Path, split: str) -> Path:
+    return Path(pack_dir) / f'{split}.index.npz'
+
+
+def decoded_hw(im: Image.Image) -> Tuple[int, int]:
+    """(h, w) of an opened image after EXIF rotation, as cv2.imread/imdecode return it."""
+    if im.getexif().get(_EXIF_ORIENTATION) in _SWAPPED_ORIENTATIONS:
+        return im.width, im.height
+    return im.height, im.width
+
+
+def write_shards(images: List[Path], images_dir: Path, labels_dir: Path, pack_dir: Path, split: str,
+                 shard_bytes: int = DEFAULT_SHARD_BYTES, image_root: Optional[Path] = None) -> Dict:
+    """
+    Pack the images of one split (and their labels) into shard files.
+
+    Args:
+        images: Image files under ``images_dir``
+        images_dir: Root the index names are relative to
+        labels_dir: Label tree mirroring ``images_dir``
+        pack_dir: Output directory
+        split: Split name (file prefix)
+        shard_bytes: Start a new shard once this size is reached
+        image_root: Where the loose copies of these images live (e.g. the
+            split's images/ folder); reported as each image's file name.
+            Defaults to ``images_dir``
+
+    Returns:
+        Dict with images, shards and bytes written
+
+    Example:
+        >>> write_shards(train_imgs, Path("all/images"), Path("all/labels"), Path("processed/packed"), "train")
+        {'images': 8000, 'shards': 2, 'bytes': 1503442102}
+    """
+    pack_dir.mkdir(parents=True, exist_ok=True)
+    n = len(images)
+    shard = np.zeros(n, dtype=np.uint16)
+    offset = np.zeros(n, dtype=np.int64)
+    image_size = np.zeros(n, dtype=np.int64)
+    label_size = np.zeros(n, dtype=np.int32)
+    hw = np.zeros((n, 2), dtype=np.int32)
+    names = []
+    shard_names: List[str] = []
+    out, written, total = None, 0, 0
+
+    try:
+        for i, img in enumerate(tqdm(images, desc=f"Packing {split}")):
+            if out is None or written >= shard_bytes:
+                if out is not None:
+                    out.close()
+                shard_names.append(f'{split}-{len(shard_names):05d}.pack')
+                out = open(pack_dir / shard_names[-1], 'wb')
+                written = 0
+            data = img.read_bytes()
+            lbl = label_path(img, images_dir, labels_dir)
+            label = lbl.read_bytes() if lbl.exists() else b''
+            with Image.open(img) as im:
+                hw[i] = decoded_hw(im)
+            shard[i], offset[i] = len(shard_names) - 1, written
+            image_size[i], label_size[i] = len(data), len(label)
+            out.write(data)
+            out.write(label)
+            written += len(data) + len(label)
+            total += len(data) + len(label)
+            names.append(img.relative_to(images_dir).as_posix())
+    finally:
+        if out is not None:
+            out.close()
+
+    # Shards left over from an earlier, larger pack of this split
+    for stale in pack_dir.glob(f'{split}-*.pack'):
+        if stale.name not in shard_names:
+            stale.unlink()
+
+    index = index_path(pack_dir, split)
+    tmp = index.with_name(index.name + '.tmp.npz')
+    np.savez(tmp, version=PACK_VERSION, shards=np.array(shard_names, dtype=str), shard=shard, offset=offset,
+             image_size=image_size, label_size=label_size, hw=hw, names=np.array(names, dtype=str),
+             image_root=str(Path(image_root or images_dir).resolve()))
+    tmp.replace(index)
+    logger.info(f"Packed {split}: {n} images in {len(shard_names)} shards ({total / 1e6:.1f} MB) -> {index}")
+    return {'images': n, 'shards': len(shard_names), 'bytes': total}
+
+
+class PackedShards:
+    """
+    Random access to a packed split through memory-mapped shards.
+
+    Safe to pass to DataLoader workers: maps are opened lazily per process.
+
+    Example:
+        >>> pack = PackedShards(Path("datasets/processed/packed/train.index.npz"))
+        >>> img = pack.image(0)                # BGR uint8, like cv2.imread
+        >>> class_ids, xywh = pack.labels(0)
+    """
+
+    def __init__(self, index: Path):
+        self.index = Path(index)
+        with np.load(self.index) as data:
+            if int(data['version']) != PACK_VERSION:
+                raise ValueError(f"{self.index}: pack version {int(data['version'])}, expected {PACK_VERSION}")
+            self.shards = data['shards'].tolist()
+            self.shard = data['shard']
+            self.offset = data['offset']
+            self.image_size = data['image_size']
+            self.label_size = data['label_size']
+            self.hw = data['hw']
+            self.names = data['names']
+            self.image_root = Path(str(data['image_root']))
+        self._maps: Dict[int, mmap.mmap] = {}
+
+    @classmethod
+    def open(cls, pack_dir: Path, split: str) -> Optional['PackedShards']:
+        """The packed split, or None if it was not packed."""
+        path = index_path(pack_dir, split)
+        return cls(path) if path.exists() else None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_maps'] = {}
+        return state
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _map(self, shard: int) -> mmap.mmap:
+        mapped = self._maps.get(shard)
+        if mapped is None:
+            with open(self.index.parent / self.shards[shard], 'rb') as f:
+                mapped = self._maps[shard] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapped
+
+    def image_file(self, i: int) -> str:
+        """Loose-file path of image ``i`` (for logs and plots; not read)."""
+        return str(self.image_root / str(self.names[i]))
+
+    def raw(self, i: int) -> Tuple[np.ndarray, bytes]:
+        """(encoded image bytes as a uint8 view, label text bytes) of image ``i``."""
+        start = int(self.offset[i])
+        end = start + int(self.image_size[i])
+        stop = end + int(self.label_size[i])
+        mapped = self._map(int(self.shard[i]))
+        if _MADV_WILLNEED is not None:
+            # One readahead request for the whole record instead of a fault per page
+            aligned = start - start % mmap.PAGESIZE
+            mapped.madvise(_MADV_WILLNEED, aligned, stop - aligned)
+        view = np.frombuffer(mapped, dtype=np.uint8, count=stop - start, offset=start)
+        return view[:end - start], view[end - start:].tobytes()
+
+    def image(self, i: int) -> np.ndarray:
+        """Decoded image ``i`` (BGR uint8)."""
+        data, _ = self.raw(i)
+        img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError(f"Cannot decode {self.names[i]} from {self.shards[int(self.shard[i])]}")
+        return img
+
+    def labels(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(class_ids int16, xywh float32 (N, 4)) of image ``i``."""
+        _, label = self.raw(i)
+        return read_yolo_label(label.decode())
+
+    @property
+    def num_bytes(self) -> int:
+        return int(self.image_size.sum() + self.label_size.sum())
+
+    def close(self):
+        for mapped in self._maps.values():
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # a returned view is still alive; the map closes when it is freed
+        self._maps.clear()
+
@@ -0,0 +1,225 @@
+"""
+Low-latency detection event publishing for downstream actuators.
+
+Each frame's detections are sent as one datagram over local UDP or a
+Unix-domain datagram socket using a compact little-endian binary layout:
+
+    header  (30 bytes)  magic "WD", version, flags, seq,
+                        capture_ns, publish_ns, frame width/height, count
+    record  (18 bytes)  track_id (int32, -1 = untracked), class_id (uint16),
+                        score (float32), x1, y1, x2, y2 (uint16 pixels)
+
+Timestamps come from time.monotonic_ns(), which is shared by all processes
+on the same host, so a subscriber can measure capture->publish and
+publish->receive latency directly.
+
+Endpoints:
+    udp://127.0.0.1:5555
+    unix:///tmp/waste_detections.sock   (POSIX only)
+"""
+
+import os
+import socket
+import struct
+import time
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+MAGIC = b'WD'
+VERSION = 1
+
+HEADER = struct.Struct('<2sBBIqqHHH')
+RECORD = struct.Struct('<iHf4H')
+RECORD_DTYPE = np.dtype([('track_id', '<i4'), ('class_id', '<u2'), ('score', '<f4'),
+                         ('box', '<u2', (4,))])
+
+# Largest payload that fits in one UDP datagram
+MAX_DATAGRAM = 65507
+MAX_DETECTIONS = (MAX_DATAGRAM - HEADER.size) // RECORD.size
+
+DEFAULT_ENDPOINT = 'udp://127.0.0.1:5555'
+
+
+class DetectionFrame(NamedTuple):
+    """One decoded datagram."""
+    seq: int
+    capture_ns: int
+    publish_ns: int
+    width: int
+    height: int
+    detections: np.ndarray  # structured array with RECORD_DTYPE fields
+
+
+def parse_endpoint(endpoint: str) -> Tuple[int, object]:
+    """
+    Parse an endpoint URL into (socket family, address).
+
+    Example:
+        >>> parse_endpoint("udp://127.0.0.1:5555")
+        (<AddressFamily.AF_INET: 2>, ('127.0.0.1', 5555))
+    """
+    if endpoint.startswith('udp://'):
+        host, _, port = endpoint[len('udp://'):].rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    if endpoint.startswith('unix://'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix-domain sockets are not supported on this platform")
+        return socket.AF_UNIX, endpoint[len('unix://'):]
+    raise ValueError(f"Unsupported endpoint (use udp://host:port or unix:///path): {endpoint}")
+
+
+def encode_frame(seq: int, capture_ns: int, width: int, height: int,
+                 xyxy: np.ndarray, scores: np.ndarray, class_ids: np.ndarray,
+                 track_ids: Optional[np.ndarray] = None, publish_ns: Optional[int] = None) -> bytes:
+    """
+    Encode one frame of detections.
+
+    Args:
+        seq: Frame sequence number
+        capture_ns: time.monotonic_ns() when the frame was captured
+        width, height: Frame size in pixels
+        xyxy: (N, 4) boxes in pixels
+        scores: N confidence scores
+        class_ids: N class indices
+        track_ids: Optional N tracker ids (-1 when untracked)
+        publish_ns: Publish timestamp (default: now)
+
+    Returns:
+        Datagram payload
+    """
+    n = min(len(scores), MAX_DETECTIONS)
+    records = np.empty(n, dtype=RECORD_DTYPE)
+    records['track_id'] = -1 if track_ids is None else np.asarray(track_ids[:n], dtype=np.int32)
+    records['class_id'] = np.asarray(class_ids[:n], dtype=np.uint16)
+    records['score'] = np.asarray(scores[:n], dtype=np.float32)
+    limits = np.array([width, height, width, height], dtype=np.float32)
+    records['box'] = np.clip(np.asarray(xyxy[:n], dtype=np.float32), 0, limits).round()
+
+    if publish_ns is None:
+        publish_ns = time.monotonic_ns()
+    header = HEADER.pack(MAGIC, VERSION, 0, seq & 0xFFFFFFFF, capture_ns, publish_ns, width, height, n)
+    return header + records.tobytes()
+
+
+def decode_frame(payload: bytes) -> DetectionFrame:
+    """Decode a datagram produced by encode_frame()."""
+    magic, version, _flags, seq, capture_ns, publish_ns, width, height, n = HEADER.unpack_from(payload)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a detection datagram (magic={magic!r}, version={version})")
+    records = np.frombuffer(payload, dtype=RECORD_DTYPE, count=n, offset=HEADER.size)
+    return DetectionFrame(seq, capture_ns, publish_ns, width, height, records)
+
+
+class DetectionPublisher:
+    """
+    Fire-and-forget datagram publisher.
+
+    Sending never blocks the detection loop: the socket is non-blocking
+    and errors (no subscriber yet, full buffer) are counted, not raised.
+
+    Example:
+        >>> pub = DetectionPublisher("udp://127.0.0.1:5555")
+        >>> pub.publish(capture_ns, 640, 480, xyxy, scores, class_ids)
+    """
+
+    def __init__(self, endpoint: str = DEFAULT_ENDPOINT):
+        self.endpoint = endpoint
+        family, self.address = parse_endpoint(endpoint)
+        self.sock = socket.socket(family, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.seq = 0
+        self.sent = 0
+        self.errors = 0
+        self.last_latency_ns = 0
+
+    def publish(self, capture_ns: int, width: int, height: int, xyxy: np.ndarray,
+                scores: np.ndarray, class_ids: np.ndarray, track_ids: Optional[np.ndarray] = None) -> bool:
+        """Encode and send one frame. Returns True if the datagram was sent."""
+        self.seq += 1
+        payload = encode_frame(self.seq, capture_ns, width, height, xyxy, scores, class_ids, track_ids)
+        try:
+            self.sock.sendto(payload, self.address)
+        except OSError:
+            self.errors += 1
+            return False
+        self.sent += 1
+        self.last_latency_ns = time.monotonic_ns() - capture_ns
+        return True
+
+    def close(self):
+        self.sock.close()
+
+
+class DetectionSubscriber:
+    """
+    Reference subscriber: bind the endpoint and decode incoming frames.
+
+    Example:
+        >>> sub = DetectionSubscriber("udp://127.0.0.1:5555")
+        >>> frame = sub.receive(timeout=1.0)
+        >>> for det in frame.detections:
+        ...     print(det['class_id'], det['score'], det['box'])
+    """
+
+    def __init__(self, endpoint: str = DEFAULT_ENDPOINT, rcvbuf: int = 4 * 1024 * 1024):
+        self.endpoint = endpoint
+        family, self.address = parse_endpoint(endpoint)
+        if family == getattr(socket, 'AF_UNIX', None) and os.path.exists(self.address):
+            os.unlink(self.address)
+        self.sock = socket.socket(family, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        self.sock.bind(self.address)
+        self._buffer = bytearray(MAX_DATAGRAM)
+
+    def receive(self, timeout: Optional[float] = None) -> Optional[Tuple[DetectionFrame, int]]:
+        """
+        Wait for the next frame.
+
+        Returns:
+            (frame, receive_ns) or None on timeout
+        """
+        self.sock.settimeout(timeout)
+        try:
+            n = self.sock.recv_into(self._buffer)
+        except socket.timeout:
+            return None
+        receive_ns = time.monotonic_ns()
+        return decode_frame(bytes(self._buffer[:n])), receive_ns
+
+    def close(self):
+        self.sock.close()
+        if self.sock.family == getattr(socket, 'AF_UNIX', None) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class LatencyStats:
+    """Accumulate capture->publish, publish->receive and capture->receive latency."""
+
+    def __init__(self):
+        self.samples: List[Tuple[int, int, int]] = []
+        self.last_seq: Optional[int] = None
+        self.lost = 0
+
+    def add(self, frame: DetectionFrame, receive_ns: int):
+        if self.last_seq is not None and frame.seq > self.last_seq + 1:
+            self.lost += frame.seq - self.last_seq - 1
+        self.last_seq = frame.seq
+        self.samples.append((frame.publish_ns - frame.capture_ns,
+                             receive_ns - frame.publish_ns,
+                             receive_ns - frame.capture_ns))
+
+    def format(self, percentiles: Sequence[float] = (50, 90, 99)) -> str:
+        if not self.samples:
+            return "No frames received"
+        data = np.asarray(self.samples, dtype=np.float64) / 1e6
+        lines = [f"{len(self.samples)} frames, {self.lost} lost (ms)",
+                 f"{'':<20}" + ''.join(f"{f'p{p:g}':>9}" for p in percentiles) + f"{'max':>9}"]
+        for i, name in enumerate(('capture->publish', 'publish->receive', 'capture->receive')):
+            cells = ''.join(f"{v:>9.3f}" for v in np.percentile(data[:, i], percentiles))
+            lines.append(f"{name:<20}{cells}{data[:, i].max():>9.3f}")
+        return '\n'.join(lines)
@@ -0,0 +1,285 @@
+"""
+Non-blocking recording for the real-time loop.
+
+A background thread owns every disk write (continuous video, snapshots and
+event clips). The capture/inference loop only appends frame references to
+a ring buffer and does ``put_nowait`` on a queue, so it never waits on the
+encoder or the disk. The ring buffer and the queue share one memory budget
+in bytes: when the writer falls behind, frames are dropped and counted
+instead.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import cv2
+import numpy as np
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_STOP = object()
+
+# Submit times kept to measure the loop rate
+RATE_WINDOW = 120
+# Seconds of frames measured before the session video is opened
+WARMUP_SECONDS = 1.0
+# Only used for an event triggered by the very first frame
+FALLBACK_FPS = 30.0
+# Writer FPS range (mp4v rejects very high rates)
+MIN_FPS, MAX_FPS = 1.0, 120.0
+# Write errors logged individually (the rest are only counted)
+MAX_LOGGED_ERRORS = 10
+
+
+class AsyncRecorder:
+    """
+    Record the annotated stream and hazardous-class events without blocking.
+
+    - ``record=True`` writes every submitted frame to a session video.
+    - The last ``pre_event`` seconds are kept in memory. When a class in
+      ``event_classes`` is detected, the buffer is flushed to an event clip
+      that continues for ``post_event`` seconds after the last trigger.
+    - ``snapshot()`` saves a single image from the writer thread.
+
+    Videos are written at the rate frames are actually submitted (measured
+    over the last frames), not the camera's nominal FPS, so clips play back
+    in real time when inference is slower than capture.
+
+    Frames in the pre-event buffer and frames waiting for the writer
+    together stay under ``max_buffer_mb``. With ``record`` the pre-event
+    buffer may use at most half of it, leaving the rest for the queue.
+
+    Example:
+        >>> recorder = AsyncRecorder(Path("runs/record"), event_classes=["battery"])
+        >>> recorder.submit(frame, ["battery", "plastic"])
+        >>> recorder.snapshot(frame, Path("capture_1.jpg"))
+        >>> recorder.close()
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        record: bool = False,
+        event_classes: Iterable[str] = (),
+        pre_event: float = 5.0,
+        post_event: float = 5.0,
+        max_buffer_mb: float = 256.0,
+        fourcc: str = 'mp4v',
+        suffix: str = '.mp4',
+    ):
+        self.out_dir = Path(out_dir)
+        self.record = record
+        self.event_classes = {c.lower() for c in event_classes}
+        self.pre_event = pre_event
+        self.post_event = post_event
+        self.max_buffer_bytes = int(max_buffer_mb * 1024 * 1024)
+        self.ring_budget = self.max_buffer_bytes // 2 if record else self.max_buffer_bytes
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.suffix = suffix
+
+        self.dropped = 0
+        self.errors = 0
+        self.events = 0
+        self._times: deque = deque(maxlen=RATE_WINDOW)
+        self._first: Optional[float] = None
+        self._ring: deque = deque()
+        self._ring_bytes = 0
+        self._warmup: List[np.ndarray] = []
+        self._warmup_bytes = 0
+        self._video_open = False
+        self._event_open = False
+        self._event_until = 0.0
+        self._queued_bytes = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    @property
+    def fps(self) -> Optional[float]:
+        """Measured submit rate, or None before two frames."""
+        if len(self._times) < 2 or self._times[-1] <= self._times[0]:
+            return None
+        return (len(self._times) - 1) / (self._times[-1] - self._times[0])
+
+    @property
+    def buffered_frames(self) -> int:
+        return len(self._ring)
+
+    @property
+    def held_bytes(self) -> int:
+        """Bytes of frames in the pre-event buffer, warm-up and writer queue."""
+        return self._queued_bytes + self._ring_bytes + self._warmup_bytes
+
+    def _put(self, item, nbytes: int = 0, moved: bool = False) -> bool:
+        """
+        Queue an item for the writer unless it would exceed the memory budget.
+
+        ``moved`` items carry frames already counted in the ring or warm-up
+        buffer, which the caller releases once the item is queued.
+        """
+        with self._lock:
+            if nbytes and not moved and self.held_bytes + nbytes > self.max_buffer_bytes:
+                self.dropped += 1
+                return False
+            self._queued_bytes += nbytes
+        self._queue.put_nowait((nbytes, item))
+        return True
+
+    def _buffer(self, now: float, frame: np.ndarray):
+        """Append to the pre-event ring, trimmed by age and by the memory budget."""
+        self._ring.append((now, frame))
+        self._ring_bytes += frame.nbytes
+        while self._ring and (self._ring[0][0] < now - self.pre_event
+                              or self._ring_bytes > self.ring_budget
+                              or self.held_bytes > self.max_buffer_bytes):
+            self._ring_bytes -= self._ring.popleft()[1].nbytes
+
+    def _submit_video(self, now: float, frame: np.ndarray):
+        if self._video_open:
+            self._put(('video', frame), frame.nbytes)
+            return
+        # Hold the first frames until the loop rate is known
+        if self.held_bytes + frame.nbytes > self.max_buffer_bytes:
+            self.dropped += 1
+        else:
+            self._warmup.append(frame)
+            self._warmup_bytes += frame.nbytes
+        if now - self._first >= WARMUP_SECONDS and self._warmup:
+            name = f"session_{datetime.now():%Y%m%d_%H%M%S}{self.suffix}"
+            self._put(('video_start', name, self._warmup, self.fps), self._warmup_bytes, moved=True)
+            self._video_open = True
+            self._warmup, self._warmup_bytes = [], 0
+
+    def submit(self, frame: np.ndarray, detections: Iterable[str] = ()):
+        """
+        Hand one annotated frame to the recorder (never blocks).
+
+        The frame is stored by reference, so the caller must not modify it
+        afterwards (detect.py gets a fresh array from every cap.read()).
+
+        Args:
+            frame: Annotated BGR frame
+            detections: Class names detected in this frame
+        """
+        now = time.monotonic()
+        if self._first is None:
+            self._first = now
+        self._times.append(now)
+        if self.record:
+            self._submit_video(now, frame)
+
+        if not self.event_classes:
+            return
+
+        triggered = [name for name in detections if name.lower() in self.event_classes]
+        if self._event_open:
+            if now < self._event_until:
+                # Event clip in progress: stream frames, extend on new triggers
+                self._put(('event', frame), frame.nbytes)
+                if triggered:
+                    self._event_until = now + self.post_event
+                return
+            self._put(('event_end',))
+            self._event_open = False
+
+        self._buffer(now, frame)
+        if triggered and self._ring:
+            name = f"event_{datetime.now():%Y%m%d_%H%M%S}_{triggered[0].lower()}{self.suffix}"
+            frames = [f for _, f in self._ring]
+            self._put(('event_start', name, frames, self.fps or FALLBACK_FPS), self._ring_bytes, moved=True)
+            logger.info(f"Event '{triggered[0]}' detected, flushing {len(frames)} buffered frames to {name}")
+            self.events += 1
+            self._event_open = True
+            self._event_until = now + self.post_event
+            self._ring.clear()
+            self._ring_bytes = 0
+
+    def snapshot(self, frame: np.ndarray, path: Path) -> bool:
+        """Queue a single image write. Returns False if the memory budget is full."""
+        return self._put(('image', Path(path), frame), frame.nbytes)
+
+    def close(self, timeout: float = 10.0):
+        """Finish pending writes and stop the writer thread."""
+        if self._warmup:
+            # Stopped during warm-up: write what was measured so far
+            name = f"session_{datetime.now():%Y%m%d_%H%M%S}{self.suffix}"
+            self._put(('video_start', name, self._warmup, self.fps or FALLBACK_FPS),
+                      self._warmup_bytes, moved=True)
+            self._warmup, self._warmup_bytes = [], 0
+        self._queue.put((0, _STOP))
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Recorder still writing after {timeout:g}s, {self._queued_bytes / 1e6:.0f} MB pending")
+        if self.dropped:
+            logger.warning(f"Recorder dropped {self.dropped} frames (writer could not keep up)")
+        if self.errors:
+            logger.error(f"Recorder had {self.errors} failed writes")
+
+    # ---------------------------------------------------------------- writer
+
+    def _open_writer(self, path: Path, frame: np.ndarray, fps: float) -> cv2.VideoWriter:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        h, w = frame.shape[:2]
+        fps = min(max(fps, MIN_FPS), MAX_FPS)
+        writer = cv2.VideoWriter(str(path), self.fourcc, fps, (w, h))
+        if not writer.isOpened():
+            raise OSError(f"cannot open video writer for {path}")
+        logger.info(f"Writing {path} at {fps:.1f} FPS (measured)")
+        return writer
+
+    def _write(self, item, writers: dict):
+        """Handle one queue item; ``writers`` holds the open 'video' and 'event' writers."""
+        kind = item[0]
+        if kind in ('video', 'event'):
+            if writers[kind] is not None:
+                writers[kind].write(item[1])
+        elif kind in ('video_start', 'event_start'):
+            _, name, frames, fps = item
+            key = kind[:-len('_start')]
+            if writers[key] is not None:
+                writers[key].release()
+                writers[key] = None
+            writers[key] = self._open_writer(self.out_dir / name, frames[-1], fps)
+            for frame in frames:
+                writers[key].write(frame)
+        elif kind == 'event_end':
+            if writers['event'] is not None:
+                writers['event'].release()
+                writers['event'] = None
+        elif kind == 'image':
+            _, path, frame = item
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if cv2.imwrite(str(path), frame):
+                logger.info(f"Saved {path}")
+            else:
+                raise OSError(f"cannot write {path}")
+
+    def _run(self):
+        writers = {'video': None, 'event': None}
+        try:
+            while True:
+                nbytes, item = self._queue.get()
+                if item is _STOP:
+                    break
+                try:
+                    self._write(item, writers)
+                except Exception as e:
+                    # Keep the thread alive: one bad write must not stop later recordings
+                    self.errors += 1
+                    if self.errors <= MAX_LOGGED_ERRORS:
+                        logger.error(f"Recorder {item[0]} failed: {e}")
+                finally:
+                    with self._lock:
+                        self._queued_bytes -= nbytes
+        finally:
+            for writer in writers.values():
+                if writer is not None:
+                    writer.release()
@@ -0,0 +1,144 @@
+"""
+Multi-label iterative stratification.
+
+Splits images into any number of named parts so that every class keeps
+(as closely as possible) the target ratios, using the full per-image
+class-count matrix instead of one class per image. Follows Sechidis et
+al. (2011): classes are handled from rarest to most common, and the
+not-yet-assigned images of the current class are distributed to the parts
+that still need that class the most. Each class is handled in a single
+vectorized step, so the whole split is O(images x classes).
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _largest_remainder(total: int, weights: np.ndarray) -> np.ndarray:
+    """Integer quotas summing to ``total``, proportional to ``weights``."""
+    exact = total * weights / weights.sum()
+    quota = np.floor(exact).astype(np.int64)
+    short = total - int(quota.sum())
+    if short:
+        # Largest fractional part first; ties go to the larger weight
+        order = np.lexsort((-weights, -(exact - quota)))
+        quota[order[:short]] += 1
+    return quota
+
+
+def iterative_stratification(counts: np.ndarray, ratios: Sequence[float], seed: int = 42) -> np.ndarray:
+    """
+    Assign each row of a class-count matrix to a split.
+
+    Args:
+        counts: (N, C) non-negative counts (boxes of class c in image n);
+            rows without any count are assigned by size alone
+        ratios: Target fraction of each split (normalized to sum to 1)
+        seed: Random seed for the order of images within a class
+
+    Returns:
+        (N,) int64 split index per row
+
+    Example:
+        >>> counts = np.array([[1, 0], [0, 2], [1, 1], [3, 0]])
+        >>> iterative_stratification(counts, [0.5, 0.5])
+        array([1, 1, 0, 0])
+    """
+    counts = np.asarray(counts)
+    ratios = np.asarray(ratios, dtype=np.float64)
+    ratios = ratios / ratios.sum()
+    n, c = counts.shape
+    k = len(ratios)
+    rng = np.random.default_rng(seed)
+
+    # Images of each class, in one shuffled order: (row, class) of the
+    # non-zero counts sorted by class, then by random rank
+    rows, cols = np.nonzero(counts)
+    rank = np.empty(n, dtype=np.int64)
+    rank[rng.permutation(n)] = np.arange(n)
+    rows = rows[np.argsort(cols * n + rank[rows])]
+    class_start = np.concatenate(([0], np.cumsum(np.bincount(cols, minlength=c))))
+
+    assign = np.full(n, -1, dtype=np.int64)
+    class_desire = ratios[:, None] * counts.sum(axis=0, dtype=np.float64)[None, :]  # (k, C) boxes still wanted
+    size_desire = ratios * n                                                       # (k,) images still wanted
+    remaining = np.diff(class_start)                                               # unassigned images per class
+
+    def place(members: np.ndarray, weights: np.ndarray):
+        if weights.sum() <= 0:
+            weights = np.maximum(size_desire, 0)
+        if weights.sum() <= 0:
+            weights = ratios
+        split_ids = np.repeat(np.arange(k), _largest_remainder(len(members), weights))
+        assign[members] = split_ids
+        for j in range(k):
+            chosen = members[split_ids == j]
+            class_desire[j] -= counts[chosen].sum(axis=0)
+            size_desire[j] -= len(chosen)
+        remaining[:] -= (counts[members] > 0).sum(axis=0)
+
+    while True:
+        active = np.flatnonzero(remaining > 0)
+        if not len(active):
+            break
+        # Rarest class first: its few images decide the most
+        label = active[np.argmin(remaining[active])]
+        members = rows[class_start[label]:class_start[label + 1]]
+        members = members[assign[members] < 0]
+        place(members, np.maximum(class_desire[:, label], 0))
+
+    unlabeled = np.flatnonzero(assign < 0)
+    if len(unlabeled):
+        place(unlabeled[np.argsort(rank[unlabeled])], np.maximum(size_desire, 0))
+    return assign
+
+
+def split_deviation(counts: np.ndarray, assign: np.ndarray, ratios: Sequence[float]) -> np.ndarray:
+    """
+    Per-split, per-class share of boxes minus the target ratio.
+
+    Returns:
+        (k, C) array; 0.0 is a perfect split, +0.02 means the split got two
+        percentage points more of that class than its ratio
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    ratios = np.asarray(ratios, dtype=np.float64)
+    ratios = ratios / ratios.sum()
+    per_split = np.stack([counts[assign == j].sum(axis=0) for j in range(len(ratios))])
+    totals = per_split.sum(axis=0)
+    share = np.divide(per_split, totals, out=np.zeros_like(per_split), where=totals > 0)
+    return np.where(totals > 0, share - ratios[:, None], 0.0)
+
+
+def log_split_report(counts: np.ndarray, assign: np.ndarray, ratios: Sequence[float],
+                     split_names: Sequence[str], class_names: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Log per-class deviation from the target ratios and return it as a dict.
+
+    Returns:
+        {'max_abs_deviation': float, 'classes': {name: {split: deviation}}}
+    """
+    deviation = split_deviation(counts, assign, ratios)
+    num_classes = deviation.shape[1]
+    names: List[str] = [class_names[c] if class_names is not None and c < len(class_names) else str(c)
+                        for c in range(num_classes)]
+    totals = np.asarray(counts).sum(axis=0)
+
+    logger.info("Per-class deviation from target ratios (percentage points):")
+    logger.info("  " + f"{'class':<14}{'boxes':>8}" + ''.join(f"{s:>9}" for s in split_names))
+    for c in range(num_classes):
+        if totals[c]:
+            logger.info("  " + f"{names[c]:<14}{int(totals[c]):>8}" +
+                        ''.join(f"{100 * deviation[j, c]:>+9.2f}" for j in range(len(split_names))))
+    worst = float(np.abs(deviation).max()) if deviation.size else 0.0
+    logger.info(f"  Max |deviation|: {100 * worst:.2f} pp")
+    return {
+        'max_abs_deviation': worst,
+        'classes': {names[c]: {s: float(deviation[j, c]) for j, s in enumerate(split_names)}
+                    for c in range(num_classes) if totals[c]},
+    }
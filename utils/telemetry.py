@@ -0,0 +1,301 @@
+"""
+Per-frame telemetry and runtime profiling for the real-time loop.
+
+Provides stage timers, a rolling CSV/JSONL telemetry log with percentile
+summaries, and a cProfile toggle that can be driven by a key press or signal.
+"""
+
+import cProfile
+import csv
+import io
+import json
+import pstats
+import signal
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Stages measured for every frame of detect.py
+STAGES = ('capture', 'preprocess', 'inference', 'postprocess', 'draw', 'display')
+
+# Percentiles reported in the exit summary
+PERCENTILES = (50, 90, 99)
+
+
+class StageTimer:
+    """Measure consecutive stages of one loop iteration with perf_counter."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def reset(self):
+        """Start timing a new frame."""
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str) -> float:
+        """
+        Close the current stage and start the next one.
+
+        Args:
+            stage: Name of the stage that just finished
+
+        Returns:
+            Duration of the stage in milliseconds
+        """
+        now = time.perf_counter()
+        elapsed = (now - self._last) * 1000.0
+        self.timings[stage] = elapsed
+        self._last = now
+        return elapsed
+
+    def set(self, stage: str, ms: float):
+        """Record a stage duration measured elsewhere (e.g. YOLO result.speed)."""
+        self.timings[stage] = float(ms)
+
+
+class Telemetry:
+    """
+    Collect per-frame stage timings, log them to a rolling file and
+    summarize them as percentiles.
+
+    The log format follows the file suffix: ``.csv`` or ``.jsonl``. When the
+    active file reaches ``max_rows`` rows it is rotated to ``<name>.1``,
+    ``<name>.2``, ... keeping at most ``backups`` old files.
+
+    Memory does not grow with the run: mean and max cover every frame
+    (running totals), percentiles cover the last ``window`` frames.
+
+    Example:
+        >>> telemetry = Telemetry(Path("runs/telemetry/detect.jsonl"))
+        >>> telemetry.record({"capture": 3.1, "inference": 18.4})
+        >>> telemetry.close()
+        >>> print(telemetry.format_summary())
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        stages: Iterable[str] = STAGES,
+        max_rows: int = 100_000,
+        backups: int = 3,
+        flush_every: int = 30,
+        window: int = 10_000,
+    ):
+        self.path = Path(path) if path else None
+        self.stages = tuple(stages)
+        self.columns = ('frame', 'timestamp', 'frame_interval') + self.stages + ('total',)
+        self.max_rows = max_rows
+        self.backups = backups
+        self.flush_every = flush_every
+
+        self.frames = 0
+        self.window = window
+        names = self.columns[2:]
+        self.samples: Dict[str, deque] = {name: deque(maxlen=window) for name in names}
+        self.counts: Dict[str, int] = dict.fromkeys(names, 0)
+        self.totals: Dict[str, float] = dict.fromkeys(names, 0.0)
+        self.maxima: Dict[str, float] = dict.fromkeys(names, 0.0)
+        self._last_capture: Optional[float] = None
+        self._rows = 0
+        self._file: Optional[io.TextIOBase] = None
+        self._writer = None
+
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._open()
+
+    @property
+    def is_jsonl(self) -> bool:
+        return self.path is not None and self.path.suffix.lower() in ('.jsonl', '.json')
+
+    def _open(self):
+        self._file = open(self.path, 'w', newline='', encoding='utf-8')
+        self._rows = 0
+        if not self.is_jsonl:
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self.columns)
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = self.path.with_name(f"{self.path.name}.{i}")
+            if src.exists():
+                src.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups > 0:
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        self._open()
+
+    def _add(self, name: str, value: float):
+        self.samples[name].append(value)
+        self.counts[name] += 1
+        self.totals[name] += value
+        if value > self.maxima[name]:
+            self.maxima[name] = value
+
+    def record(self, timings: Dict[str, float], capture_time: Optional[float] = None):
+        """
+        Record the stage timings of one frame.
+
+        Args:
+            timings: Mapping stage -> duration in milliseconds
+            capture_time: perf_counter() value when the frame was captured,
+                used to measure capture jitter (frame-to-frame interval)
+        """
+        self.frames += 1
+        interval = 0.0
+        if capture_time is not None:
+            if self._last_capture is not None:
+                interval = (capture_time - self._last_capture) * 1000.0
+                self._add('frame_interval', interval)
+            self._last_capture = capture_time
+
+        row = {name: float(timings.get(name, 0.0)) for name in self.stages}
+        row['total'] = sum(row.values())
+        for name, value in row.items():
+            self._add(name, value)
+
+        if self._file is None:
+            return
+
+        if self._rows >= self.max_rows:
+            self._rotate()
+
+        values = {'frame': self.frames, 'timestamp': round(time.time(), 6),
+                  'frame_interval': round(interval, 3)}
+        values.update({name: round(value, 3) for name, value in row.items()})
+        if self.is_jsonl:
+            self._file.write(json.dumps(values) + '\n')
+        else:
+            self._writer.writerow([values[col] for col in self.columns])
+
+        self._rows += 1
+        if self._rows % self.flush_every == 0:
+            self._file.flush()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize collected samples.
+
+        Returns:
+            Dictionary mapping stage -> {mean, max, p50, p90, p99} in milliseconds
+            (mean and max over all frames, percentiles over the last ``window``)
+        """
+        import numpy as np
+
+        result = {}
+        for name, values in self.samples.items():
+            if not values:
+                continue
+            data = np.fromiter(values, dtype=np.float64, count=len(values))
+            stats = {'mean': self.totals[name] / self.counts[name], 'max': self.maxima[name]}
+            for p, v in zip(PERCENTILES, np.percentile(data, PERCENTILES)):
+                stats[f'p{p}'] = float(v)
+            result[name] = stats
+        return result
+
+    def format_summary(self) -> str:
+        """Format the percentile summary as a text table."""
+        header = f"{'stage':<16}" + ''.join(f"{f'p{p}':>9}" for p in PERCENTILES) + f"{'mean':>9}{'max':>9}"
+        recent = f", percentiles over the last {self.window}" if self.frames > self.window else ""
+        lines = [f"Telemetry: {self.frames} frames (ms{recent})", header]
+        for name, stats in self.summary().items():
+            cells = ''.join(f"{stats[f'p{p}']:>9.2f}" for p in PERCENTILES)
+            lines.append(f"{name:<16}{cells}{stats['mean']:>9.2f}{stats['max']:>9.2f}")
+        return '\n'.join(lines)
+
+    def close(self):
+        """Flush and close the telemetry file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ProfilerToggle:
+    """
+    Start/stop cProfile at runtime.
+
+    Each stop writes a ``.prof`` file (open with ``python -m pstats`` or
+    snakeviz) and logs the top functions by cumulative time. On POSIX the
+    profiler can also be toggled from outside with ``kill -USR1 <pid>``.
+
+    Example:
+        >>> profiler = ProfilerToggle(Path("runs/profile"))
+        >>> profiler.install_signal()
+        >>> profiler.toggle()  # start
+        >>> profiler.toggle()  # stop and dump
+    """
+
+    def __init__(self, out_dir: Path, top: int = 15):
+        self.out_dir = Path(out_dir)
+        self.top = top
+        self._profile: Optional[cProfile.Profile] = None
+        self._requested = False
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def install_signal(self, signum: Optional[int] = None) -> bool:
+        """
+        Toggle the profiler on a signal (default SIGUSR1).
+
+        The handler only sets a flag; the loop applies it via poll() so the
+        profiler is always started/stopped from the main loop.
+
+        Returns:
+            True if the handler was installed, False if unsupported
+        """
+        signum = signum if signum is not None else getattr(signal, 'SIGUSR1', None)
+        if signum is None:
+            return False
+
+        def _handler(_signum, _frame):
+            self._requested = True
+
+        signal.signal(signum, _handler)
+        return True
+
+    def poll(self):
+        """Apply a pending toggle request from the signal handler."""
+        if self._requested:
+            self._requested = False
+            self.toggle()
+
+    def toggle(self) -> Optional[Path]:
+        """
+        Start profiling, or stop and dump the current profile.
+
+        Returns:
+            Path of the written .prof file when stopping, otherwise None
+        """
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+            logger.info("Profiler started")
+            return None
+        return self.stop()
+
+    def stop(self) -> Optional[Path]:
+        """Stop profiling (if active) and dump the stats."""
+        if self._profile is None:
+            return None
+
+        profile, self._profile = self._profile, None
+        profile.disable()
+
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        out_path = self.out_dir / f"detect_{datetime.now():%Y%m%d_%H%M%S}.prof"
+        profile.dump_stats(str(out_path))
+
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(self.top)
+        logger.info(f"Profiler stopped, saved: {out_path}\n{stream.getvalue()}")
+        return out_path
@@ -0,0 +1,262 @@
+"""
+Ultralytics dataset adapters for train.py.
+
+PackedDetectionTrainer is a DetectionTrainer that reads a split from packed
+shards (utils.packed_shards) when data.yaml has a ``packed`` directory
+containing that split, and falls back to the loose image/label files
+otherwise. Images are decoded from the memory-mapped shards and labels come
+from the pack index, so no per-image file is opened during training.
+
+LetterboxDetectionTrainer goes one step further when data.yaml has a
+``letterbox`` directory (prepare_cache.py) built at the requested imgsz:
+images come already decoded and resized from utils.letterbox_cache, so an
+epoch does no JPEG decoding at all. Splits without a matching, current
+cache fall back to packed shards and then to the loose files.
+
+This module imports ultralytics; the data preparation scripts do not need it.
+"""
+
+import math
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+from ultralytics.data.dataset import YOLODataset
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import colorstr
+from ultralytics.utils.torch_utils import de_parallel
+
+from .letterbox_cache import LetterboxCache, resize_interpolation, split_images
+from .logger import setup_logger
+from .packed_shards import PackedShards
+
+logger = setup_logger(__name__)
+
+
+class PackedYOLODataset(YOLODataset):
+    """
+    YOLODataset over a PackedShards split.
+
+    Augmentation, mosaic, rect batching and RAM caching work as for loose
+    files; only file discovery, label loading and image decoding change.
+    ``cache='disk'`` (one .npy per image) is mapped to RAM caching.
+    """
+
+    def __init__(self, *args, pack: PackedShards, **kwargs):
+        self.pack = pack
+        if kwargs.get('cache'):
+            kwargs['cache'] = 'ram'
+        super().__init__(*args, **kwargs)
+
+    def get_img_files(self, img_path):
+        files = [self.pack.image_file(i) for i in range(len(self.pack))]
+        if getattr(self, 'fraction', 1.0) < 1:
+            files = files[:round(len(files) * self.fraction)]
+        return files
+
+    def get_labels(self):
+        labels = []
+        for i, im_file in enumerate(self.im_files):
+            class_ids, xywh = self.pack.labels(i)
+            h, w = self.pack.hw[i].tolist()
+            labels.append({
+                'im_file': im_file,
+                'shape': (h, w),
+                'cls': class_ids.astype(np.float32).reshape(-1, 1),
+                'bboxes': xywh.reshape(-1, 4),
+                'segments': [],
+                'keypoints': None,
+                'normalized': True,
+                'bbox_format': 'xywh',
+            })
+        logger.info(f"{self.prefix}{len(labels)} images from {len(self.pack.shards)} packed shards "
+                    f"({self.pack.num_bytes / 1e6:.1f} MB)")
+        return labels
+
+    def check_cache_ram(self, *args, **kwargs) -> bool:
+        # The base check samples images with cv2.imread, which has no file to open here
+        return True
+
+    def load_image(self, i, rect_mode=True):
+        """Decode image ``i`` from its shard and resize it like BaseDataset.load_image."""
+        if self.ims[i] is not None:
+            return self.ims[i], self.im_hw0[i], self.im_hw[i]
+        im = self.pack.image(i)
+        h0, w0 = im.shape[:2]
+        if rect_mode:
+            r = self.imgsz / max(h0, w0)
+            if r != 1:
+                w, h = min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz)
+                im = cv2.resize(im, (w, h), interpolation=resize_interpolation(h0, w0, self.imgsz, self.augment))
+        elif not (h0 == w0 == self.imgsz):
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+
+        # Keep the mosaic buffer behaviour of the base class
+        if self.augment and hasattr(self, 'buffer'):
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                j = self.buffer.pop(0)
+                if self.cache != 'ram':
+                    self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+        return im, (h0, w0), im.shape[:2]
+
+
+class LetterboxYOLODataset(YOLODataset):
+    """
+    YOLODataset over a LetterboxCache split.
+
+    load_image returns the cached resized image (the unpadded part of the
+    letterbox), resized with the interpolation load_image picks for the
+    dataset's mode (see utils.letterbox_cache.resize_interpolation). RAM
+    caching is turned off: the memory-mapped cache already is one.
+    """
+
+    def __init__(self, *args, letterbox: LetterboxCache, **kwargs):
+        self.letterbox = letterbox
+        kwargs['cache'] = False
+        super().__init__(*args, **kwargs)
+
+    def get_img_files(self, img_path):
+        files = self.letterbox.names.tolist()
+        if getattr(self, 'fraction', 1.0) < 1:
+            files = files[:round(len(files) * self.fraction)]
+        return files
+
+    def get_labels(self):
+        labels = []
+        for i, im_file in enumerate(self.im_files):
+            class_ids, xywh = self.letterbox.labels(i, letterboxed=False)
+            h, w = self.letterbox.hw0[i].tolist()
+            labels.append({
+                'im_file': im_file,
+                'shape': (h, w),
+                'cls': class_ids.astype(np.float32).reshape(-1, 1),
+                'bboxes': xywh.reshape(-1, 4),
+                'segments': [],
+                'keypoints': None,
+                'normalized': True,
+                'bbox_format': 'xywh',
+            })
+        logger.info(f"{self.prefix}{len(labels)} images from letterbox cache {self.letterbox.tensor_path} "
+                    f"({self.letterbox.num_bytes / 1e6:.1f} MB)")
+        return labels
+
+    def load_image(self, i, rect_mode=True):
+        """Resized image ``i`` from the cache (no decoding)."""
+        im = self.letterbox.resized(i)
+        h0, w0 = self.letterbox.hw0[i].tolist()
+        if not rect_mode and not (im.shape[0] == im.shape[1] == self.imgsz):
+            im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+
+        if self.augment and hasattr(self, 'buffer'):
+            self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]
+            self.buffer.append(i)
+            if 1 < len(self.buffer) >= self.max_buffer_length:
+                j = self.buffer.pop(0)
+                self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+        return im, (h0, w0), im.shape[:2]
+
+
+class PackedDetectionTrainer(DetectionTrainer):
+    """
+    DetectionTrainer that reads packed splits when data.yaml points to them.
+
+    Example:
+        >>> model = YOLO("yolov8s.pt")
+        >>> model.train(data="datasets/processed/data.yaml", trainer=PackedDetectionTrainer)
+    """
+
+    # Subclasses/train.py turn this off to ignore data.yaml's packed shards
+    use_packed = True
+
+    def _split_of(self, img_path: str, mode: str) -> str:
+        if mode == 'train':
+            return 'train'
+        if self.data.get('test') == img_path and self.data.get('val') != img_path:
+            return 'test'
+        return 'val'
+
+    def build_dataset(self, img_path, mode='train', batch=None):
+        pack_dir = self.data.get('packed') if self.use_packed else None
+        pack: Optional[PackedShards] = None
+        if pack_dir:
+            try:
+                pack = PackedShards.open(Path(pack_dir), self._split_of(str(img_path), mode))
+            except ValueError as e:
+                logger.warning(f"{e}; reading loose files instead. Re-run split_and_prep.py --pack")
+        if pack is None:
+            return super().build_dataset(img_path, mode, batch)
+
+        cfg = self.args
+        stride = max(int(de_parallel(self.model).stride.max() if self.model else 0), 32)
+        return PackedYOLODataset(
+            img_path=img_path,
+            imgsz=cfg.imgsz,
+            batch_size=batch,
+            augment=mode == 'train',
+            hyp=cfg,
+            rect=cfg.rect or mode == 'val',
+            cache=cfg.cache or None,
+            single_cls=cfg.single_cls or False,
+            stride=stride,
+            pad=0.0 if mode == 'train' else 0.5,
+            prefix=colorstr(f'{mode}: '),
+            task=cfg.task,
+            classes=cfg.classes,
+            data=self.data,
+            fraction=cfg.fraction if mode == 'train' else 1.0,
+            pack=pack,
+        )
+
+
+class LetterboxDetectionTrainer(PackedDetectionTrainer):
+    """
+    Trainer that reads pre-letterboxed splits (prepare_cache.py) when they
+    match the requested imgsz, the split's current image and label files and
+    the mode's resize (augmenting for train, plain for val).
+
+    Example:
+        >>> model.train(data="datasets/processed/data.yaml", imgsz=640, trainer=LetterboxDetectionTrainer)
+    """
+
+    def build_dataset(self, img_path, mode='train', batch=None):
+        cache_dir = self.data.get('letterbox')
+        imgsz = self.args.imgsz
+        split = self._split_of(str(img_path), mode)
+        try:
+            cache = LetterboxCache.open(Path(cache_dir), split, imgsz) if cache_dir and isinstance(imgsz, int) else None
+        except ValueError as e:
+            logger.warning(f"{e}; decoding images instead. Re-run prepare_cache.py")
+            cache = None
+        if cache is not None and not cache.is_current(split_images(str(img_path))):
+            logger.warning(f"Letterbox cache of {split}@{imgsz} is stale (images or labels changed); "
+                           f"decoding images instead. Re-run prepare_cache.py")
+            cache = None
+        if cache is not None and cache.augment != (mode == 'train'):
+            logger.warning(f"Letterbox cache of {split}@{imgsz} was resized for "
+                           f"{'training' if cache.augment else 'validation'}, not {mode}; decoding images instead")
+            cache = None
+        if cache is None:
+            return super().build_dataset(img_path, mode, batch)
+
+        cfg = self.args
+        stride = max(int(de_parallel(self.model).stride.max() if self.model else 0), 32)
+        return LetterboxYOLODataset(
+            img_path=img_path,
+            imgsz=imgsz,
+            batch_size=batch,
+            augment=mode == 'train',
+            hyp=cfg,
+            rect=cfg.rect or mode == 'val',
+            single_cls=cfg.single_cls or False,
+            stride=stride,
+            pad=0.0 if mode == 'train' else 0.5,
+            prefix=colorstr(f'{mode}: '),
+            task=cfg.task,
+            classes=cfg.classes,
+            data=self.data,
+            fraction=cfg.fraction if mode == 'train' else 1.0,
+            letterbox=cache,
+        )